@@ -1,48 +1,83 @@
 import sys
 from abc import ABC, abstractmethod
 
-from OpenGL.GL import (glClearColor, glClear, GL_COLOR_BUFFER_BIT, glEnable, GL_DEPTH_TEST, GL_DEPTH_BUFFER_BIT,
-                       glLoadIdentity, glViewport, glOrtho)
-from OpenGL.GLUT import (glutInit, GLUT_RGB, glutInitDisplayMode, glutInitWindowSize, glutCreateWindow,
-                         glutInitWindowPosition, glutGet, GLUT_SCREEN_WIDTH, GLUT_SCREEN_HEIGHT, glutMainLoop,
-                         GLUT_WINDOW_WIDTH, GLUT_WINDOW_HEIGHT, glutKeyboardFunc, glutDisplayFunc, GLUT_DOUBLE,
-                         glutSwapBuffers, glutIdleFunc, glutMouseFunc, glutSpecialFunc, GLUT_DEPTH,
-                         glutReshapeFunc)
+from OpenGL.GL import (glClearColor, glClear, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, glLoadIdentity, glViewport,
+                       glOrtho, glMatrixMode, GL_PROJECTION, GL_MODELVIEW)
 
 import color
+from graphics import gl, glut, profiler
 
 
 class WindowABC(ABC):
-    def __init__(self, title, width=1024, height=768, background_color=color.Smoke):
-        self.base_width = width
-        self.base_height = height
-
-        glutInit(sys.argv)
-        glutInitDisplayMode(GLUT_RGB | GLUT_DOUBLE | GLUT_DEPTH)
-        glutInitWindowSize(width, height)
-        glutInitWindowPosition((self.screen_width - width) // 2, (self.screen_height - height) // 2)
-        glutCreateWindow(title)
+    """
+    With ``render_on_demand`` the window is redrawn only after input, a resize or ``invalidate()``; ``handle_idle``
+    runs only between ``start_animation()`` and ``stop_animation()``. Otherwise ``handle_idle`` runs continuously.
 
-        glutKeyboardFunc(self.handle_key)
-        glutDisplayFunc(self._draw)
-        glutIdleFunc(self.handle_idle)
-        glutMouseFunc(self.handle_mouse)
-        glutSpecialFunc(self.handle_special_key)
-        glutReshapeFunc(self.handle_reshape)
+    Window and screen sizes are cached, and ``handle_reshape`` sets up the projection only when the window is
+    resized or ``update_projection()`` is called.
+    """
 
-        glEnable(GL_DEPTH_TEST)
+    def __init__(self, title, width=1024, height=768, background_color=color.Smoke, render_on_demand=True):
+        self.base_width = width
+        self.base_height = height
+        self.render_on_demand = render_on_demand
+
+        glut.init(sys.argv)
+        glut.init_display_mode(glut.DisplayMode.RGB, glut.DisplayMode.DOUBLE, glut.DisplayMode.DEPTH)
+        glut.init_window_size(width, height)
+        self._screen_width = glut.get_screen_width()
+        self._screen_height = glut.get_screen_height()
+        glut.init_window_position((self.screen_width - width) // 2, (self.screen_height - height) // 2)
+        glut.create_window(title)
+        self._width = glut.get_window_width()
+        self._height = glut.get_window_height()
+
+        glut.keyboard_func(self._handle_key)
+        glut.display_func(self._draw)
+        if not render_on_demand:
+            glut.idle_func(self.handle_idle)
+        glut.mouse_func(self._handle_mouse)
+        glut.special_func(self._handle_special_key)
+        glut.reshape_func(self._reshape)
+
+        gl.enable(gl.Capability.DEPTH_TEST)
 
         if background_color is not None:
             self.fill_color(*color.Smoke, 1.)
 
-    def handle_reshape(self, width, height):
+    def _reshape(self, width, height):
+        self._width = width
+        self._height = height
+        glViewport(0, 0, width, height)
+        self.update_projection()
+
+    def update_projection(self):
+        glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
-        aspect = height / width
+        self.handle_reshape(self._width, self._height)
+        glMatrixMode(GL_MODELVIEW)
+        self.invalidate()
 
-        glViewport(0, 0, width, height)
-        bw = self.width / 2
+    def handle_reshape(self, width, height):
+        """
+        Sets up the projection, called with the projection matrix current and reset.
+        """
+        aspect = height / width
+        bw = width / 2
         glOrtho(-bw, bw, -bw * aspect, bw * aspect, -bw, bw)
 
+    def _handle_mouse(self, button, state, x, y):
+        self.handle_mouse(button, state, x, y)
+        self.invalidate()
+
+    def _handle_key(self, key, x, y):
+        self.handle_key(key, x, y)
+        self.invalidate()
+
+    def _handle_special_key(self, key, x, y):
+        self.handle_special_key(key, x, y)
+        self.invalidate()
+
     def handle_mouse(self, button, state, x, y):
         pass
 
@@ -63,11 +98,26 @@ class WindowABC(ABC):
     def handle_idle(self):
         pass
 
+    @staticmethod
+    def invalidate():
+        glut.post_redisplay()
+
+    def start_animation(self):
+        glut.idle_func(self.handle_idle)
+
+    def stop_animation(self):
+        if self.render_on_demand:
+            glut.idle_func(None)
+
     def _draw(self):
         self.clear_color_buffer()
         self.clear_depth_buffer()
-        self.draw()
-        glutSwapBuffers()
+        glLoadIdentity()
+        with profiler.scope('draw'):
+            self.draw()
+        profiler.draw_hud(glut)
+        with profiler.scope('swap_buffers'):
+            glut.swap_buffers()
 
     @abstractmethod
     def draw(self):
@@ -75,23 +125,23 @@ class WindowABC(ABC):
 
     @property
     def screen_width(self):
-        return glutGet(GLUT_SCREEN_WIDTH)
+        return self._screen_width
 
     @property
     def screen_height(self):
-        return glutGet(GLUT_SCREEN_HEIGHT)
+        return self._screen_height
 
     @property
     def width(self):
-        return glutGet(GLUT_WINDOW_WIDTH)
+        return self._width
 
     @property
     def height(self):
-        return glutGet(GLUT_WINDOW_HEIGHT)
+        return self._height
 
     @staticmethod
     def show():
-        glutMainLoop()
+        glut.main_loop()
 
     @classmethod
     def fill_color(cls, red, green, blue, alpha=1.):
@@ -0,0 +1,7 @@
+"""
+Headless benchmarks of the task scenes, see ``python -m benchmarks --help``.
+"""
+import os
+
+# scenes render offscreen unless told otherwise; has to be set before graphics is imported
+os.environ.setdefault('GRAPHICS_HEADLESS', 'egl')
@@ -0,0 +1,192 @@
+"""
+Runs the task scenes headless and reports frame times::
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --sweep --scene explosion --baseline results.json
+    python -m benchmarks --compare old.json new.json
+
+Every run happens in a fresh process, so peak RSS and first-frame latency are not skewed by earlier runs.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.scenes import ROOT, SCENES, load_task
+
+# +1 when higher is better, -1 when lower is better
+METRICS = {
+    'fps': 1,
+    'p50_ms': -1,
+    'p95_ms': -1,
+    'p99_ms': -1,
+    'first_frame_ms': -1,
+    'peak_rss_mb': -1,
+    'gl_calls_per_frame': -1,
+}
+
+
+def run_scene(name, parameters, frames, size):
+    """
+    Renders ``frames`` frames of a scene in this process and returns its measurements.
+    """
+    from OpenGL.GL import glGetString, GL_RENDERER
+
+    from graphics import profiler
+    from graphics.headless import run
+    from graphics.profiler import Profiler
+
+    scene = SCENES[name]
+    os.chdir(ROOT)
+    module = load_task(scene.script)
+    if scene.configure is not None:
+        scene.configure(module, **parameters)
+
+    timestamps = []
+    renderer = []
+
+    def before_frame(frame, glut):
+        timestamps.append(time.perf_counter())
+        if frame == 0:
+            renderer.append(glGetString(GL_RENDERER).decode())
+            Profiler.history_size = frames
+            profiler.enable()
+        scene.script_input(frame, glut)
+
+    start = time.perf_counter()
+    run(module.main, frames=frames, size=size, capture=False, before_frame=before_frame)
+    timestamps.append(time.perf_counter())
+
+    frame_times = 1e3 * np.diff(timestamps)[1:]
+    summary = profiler.summary()
+    return {
+        'scene': name,
+        'parameters': parameters,
+        'fps': 1e3 / frame_times.mean(),
+        'p50_ms': np.percentile(frame_times, 50),
+        'p95_ms': np.percentile(frame_times, 95),
+        'p99_ms': np.percentile(frame_times, 99),
+        'first_frame_ms': 1e3 * (timestamps[1] - start),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'gl_calls_per_frame': summary['gl_calls'],
+        'vertices_per_frame': summary['vertices'],
+        'gpu_ms': summary['gpu_ms'],
+        'renderer': renderer[0],
+    }
+
+
+def runs(scene_names, sweep):
+    for name in scene_names:
+        yield name, {}
+        if sweep:
+            for parameter, values in SCENES[name].sweeps.items():
+                for value in values:
+                    yield name, {parameter: value}
+
+
+def run_worker(name, parameters, frames, size):
+    command = [sys.executable, '-m', 'benchmarks', '--worker', name, '--parameters', json.dumps(parameters),
+               '--frames', str(frames), '--size', size]
+    completed = subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE, check=True, universal_newlines=True)
+    # the tasks print on their own, the measurements are the last line
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def run_key(result):
+    return result['scene'], json.dumps(result['parameters'], sort_keys=True)
+
+
+def compare(baseline, results, threshold):
+    """
+    Returns ``(scene, parameters, metric, old, new)`` for every metric that got worse by more than ``threshold``.
+    """
+    if (baseline['frames'], baseline['size']) != (results['frames'], results['size']):
+        print('warning: the baseline ran {} frames at {}, these results {} frames at {}'.format(
+            baseline['frames'], baseline['size'], results['frames'], results['size']))
+    old_results = {run_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        old = old_results.get(run_key(result))
+        if old is None:
+            continue
+        for metric, direction in METRICS.items():
+            if not old[metric]:
+                continue
+            change = (result[metric] - old[metric]) / old[metric]
+            if direction * change < -threshold:
+                regressions.append((result['scene'], result['parameters'], metric, old[metric], result[metric]))
+    return regressions
+
+
+def print_results(results):
+    print('{:<14} {:<26} {:>8} {:>8} {:>8} {:>8} {:>9} {:>8} {:>9}'.format(
+        'scene', 'parameters', 'fps', 'p50 ms', 'p95 ms', 'p99 ms', 'first ms', 'rss MB', 'GL calls'))
+    for result in results:
+        parameters = ' '.join('{}={}'.format(*item) for item in sorted(result['parameters'].items()))
+        print('{:<14} {:<26} {:>8.1f} {:>8.2f} {:>8.2f} {:>8.2f} {:>9.1f} {:>8.1f} {:>9.1f}'.format(
+            result['scene'], parameters, result['fps'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            result['first_frame_ms'], result['peak_rss_mb'], result['gl_calls_per_frame']))
+
+
+def print_regressions(regressions):
+    for scene, parameters, metric, old, new in regressions:
+        print('REGRESSION {} {} {}: {:.2f} -> {:.2f}'.format(scene, parameters or '', metric, old, new))
+    if not regressions:
+        print('no regressions')
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark the task scenes headless.')
+    parser.add_argument('--scene', action='append', choices=sorted(SCENES), help='default: every scene')
+    parser.add_argument('--sweep', action='store_true', help='also run the parameter sweeps of the scenes')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--size', default='1024x768', help='WIDTHxHEIGHT')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--baseline', help='flag regressions against an earlier --output')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'RESULTS'), help='compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--parameters', default='{}', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    size = tuple(int(value) for value in args.size.lower().split('x'))
+    if args.worker:
+        print(json.dumps(run_scene(args.worker, json.loads(args.parameters), args.frames, size)))
+        return 0
+
+    if args.compare:
+        baseline, results = (json.load(open(file_name)) for file_name in args.compare)
+        regressions = compare(baseline, results, args.threshold)
+        print_regressions(regressions)
+        return 1 if regressions else 0
+
+    results = []
+    for name, parameters in runs(args.scene or sorted(SCENES), args.sweep):
+        results.append(run_worker(name, parameters, args.frames, args.size))
+    print_results(results)
+
+    results = {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'renderer': results[0]['renderer'] if results else None},
+        'frames': args.frames,
+        'size': list(size),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        regressions = compare(json.load(open(args.baseline)), results, args.threshold)
+        print_regressions(regressions)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
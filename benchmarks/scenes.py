@@ -0,0 +1,128 @@
+"""
+The benchmarked scenes: which task runs, the input scripted for every frame and the parameters that can be swept.
+"""
+import importlib.util
+import os
+
+import attr
+
+from graphics import SphereLod
+from graphics.glut import Glut
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_task(script):
+    """
+    Imports a task script as a module without running its ``main``.
+    """
+    name = os.path.splitext(script)[0].replace('.', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@attr.s(frozen=True)
+class Scene(object):
+    """
+    ``script_input(frame, glut)`` runs before every frame; ``configure(module, **parameters)`` adjusts the loaded
+    task before its ``main`` runs, with no parameters for the default run. ``sweeps`` maps a parameter name to the
+    values ``--sweep`` goes through.
+    """
+    name = attr.ib()
+    script = attr.ib()
+    script_input = attr.ib()
+    configure = attr.ib(default=None)
+    sweeps = attr.ib(factory=dict)
+
+
+def rotate_cube(frame, glut):
+    # a full turn around y, tilting up and down on the way
+    glut.callback('special')(Glut.SpecialKey.RIGHT.value, 0, 0)
+    tilt = Glut.SpecialKey.UP if frame % 120 < 60 else Glut.SpecialKey.DOWN
+    glut.callback('special')(tilt.value, 0, 0)
+
+
+def sweep_spotlight(frame, glut):
+    keyboard = glut.callback('keyboard')
+    if frame == 0:
+        keyboard(b' ', 0, 0)
+    # lights sweep 2 units to one side and back while the camera orbits
+    keyboard(b',' if frame % 40 < 20 else b'.', 0, 0)
+    keyboard(b'[', 0, 0)
+
+
+def explode_with_fog(frame, glut):
+    keyboard = glut.callback('keyboard')
+    if frame == 0:
+        keyboard(b'p', 0, 0)
+        keyboard(b'f', 0, 0)
+    if frame % 2:
+        keyboard(b'[', 0, 0)
+
+
+def stress_cubes(frame, glut):
+    if frame == 0:
+        glut.callback('keyboard')(b's', 0, 0)
+    rotate_cube(frame, glut)
+
+
+def configure_stress(module, grid=None, instancing=None):
+    if grid is not None:
+        module.STRESS_GRID = grid
+    if instancing is not None:
+        module.STRESS_INSTANCING = instancing
+
+
+def configure_lighting(module, wall_detailing=None, sphere_detailing=None):
+    settings = module.settings
+    if wall_detailing is not None:
+        settings.wall_detailing = wall_detailing
+    if sphere_detailing is not None:
+        settings.sphere_detailing = sphere_detailing
+        settings.sphere_lod = SphereLod(max_detailing=sphere_detailing, renderer=settings.sphere_meshes)
+
+
+def configure_explosion(module, particle_count=None, **parameters):
+    configure_lighting(module, **parameters)
+    settings = module.settings
+    # the sphere collapses within 10 frames instead of 50 so most frames show the explosion
+    settings.sphere_radius_delta = settings.sphere_initial_radius / 10
+    if particle_count is not None:
+        explosion = settings.explosion
+        settings.explosion = type(explosion)(explosion.position, explosion.power, particle_count,
+                                             explosion.particle_size, 0, settings.explosion_rate,
+                                             settings.explosion_life_time, settings.explosion_workers,
+                                             settings.explosion_integrator, settings.explosion_adaptive,
+                                             settings.collision_world)
+
+
+def configure_parallel_explosion(module, workers=1, **parameters):
+    # enough particles for ParallelSimulation to hand them to its pool; one worker steps them in the render process
+    module.settings.explosion_workers = workers
+    configure_explosion(module, particle_count=100000, **parameters)
+
+
+SCENES = {
+    scene.name: scene for scene in (
+        Scene('cube', 'task_3.py', rotate_cube),
+        Scene('cube_stress', 'task_3.py', stress_cubes, configure_stress, {
+            'grid': (10, 16, 24),
+            'instancing': (False,),
+        }),
+        Scene('textured_cube', 'task_4.py', rotate_cube),
+        Scene('spotlight', 'task_5.pure.py', sweep_spotlight, configure_lighting, {
+            'wall_detailing': (20, 70, 140, 280),
+            'sphere_detailing': (16, 64, 500),
+        }),
+        Scene('explosion', 'task_6.py', explode_with_fog, configure_explosion, {
+            'particle_count': (200, 2000, 20000),
+            'wall_detailing': (20, 140, 280),
+            'sphere_detailing': (16, 64, 500),
+        }),
+        Scene('parallel_explosion', 'task_6.py', explode_with_fog, configure_parallel_explosion, {
+            'workers': (1, 2, 4),
+        }),
+    )
+}
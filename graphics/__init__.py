@@ -1,8 +1,27 @@
+import graphics.backend
 import graphics.gl
 import graphics.glu
 import graphics.glut
+import graphics.headless
+from graphics.cube import Cube, cube_grid
+from graphics.culling import BoundingBox, BoundingSphere, CullingStats, Frustum, FrustumCuller
+from graphics.curve import (CurveTessellator, adaptive_curve, circle, conical_spiral, curve_mesh, parametric_curve,
+                            spiral_bounds, spiral_function)
 from graphics.gl import GlColor
+from graphics.lighting import FogState, Light, Material
+from graphics.mesh import Mesh, grid_quads
+from graphics.particles import ParticleRenderer
+from graphics.profiler import Profiler
+from graphics.resources import ResourceManager
+from graphics.scene import SceneGraph, SceneNode
+from graphics.scheduler import Scheduler
+from graphics.sphere import SphereLod, SphereMeshCache
 
 gl = graphics.gl.Gl()
 glu = graphics.glu.Glu()
-glut = graphics.glut.Glut()
+if graphics.backend.headless_backend() is None:
+    glut = graphics.glut.Glut()
+else:
+    glut = graphics.headless.HeadlessGlut(graphics.backend.headless_backend())
+resources = ResourceManager()
+profiler = Profiler()
@@ -0,0 +1,34 @@
+"""
+Renders a task offscreen: ``python -m graphics task_6.py --frames 120 --size 640x480 --output frames.npy``.
+"""
+import argparse
+import os
+import sys
+
+from graphics.backend import VARIABLE, headless_backend
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m graphics', description='Render a task offscreen.')
+    parser.add_argument('script')
+    parser.add_argument('--frames', type=int, default=1)
+    parser.add_argument('--size', default='640x480', help='WIDTHxHEIGHT')
+    parser.add_argument('--output', help='save the frames as a .npy array of shape (frames, height, width, 3)')
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from graphics.headless import run
+
+    size = tuple(int(value) for value in args.size.lower().split('x'))
+    frames = run(args.script, frames=args.frames, size=size, capture=args.output is not None)
+    if args.output:
+        np.save(args.output, np.stack(frames))
+    print('rendered {} frames of {}x{}'.format(args.frames, *size))
+
+
+if __name__ == '__main__':
+    if headless_backend() is None:
+        # the platform is chosen when OpenGL is first imported, so start over with it set
+        os.environ[VARIABLE] = 'egl'
+        os.execv(sys.executable, [sys.executable, '-m', 'graphics'] + sys.argv[1:])
+    main(sys.argv[1:])
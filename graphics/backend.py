@@ -0,0 +1,22 @@
+"""
+Chooses the PyOpenGL platform from ``GRAPHICS_HEADLESS``. Imported first by ``graphics``, since PyOpenGL settles on a
+platform the first time ``OpenGL.GL`` is imported.
+"""
+import os
+
+VARIABLE = 'GRAPHICS_HEADLESS'
+
+
+def headless_backend():
+    """
+    ``'egl'`` or ``'osmesa'`` when rendering headless, ``None`` for regular GLUT windows.
+    """
+    value = os.environ.get(VARIABLE, '').lower()
+    if value in ('', '0', 'false', 'no'):
+        return None
+    return 'osmesa' if value == 'osmesa' else 'egl'
+
+
+if headless_backend() is not None:
+    os.environ.setdefault('PYOPENGL_PLATFORM', headless_backend())
+    os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
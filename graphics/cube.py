@@ -0,0 +1,180 @@
+from enum import Enum
+
+import numpy as np
+
+from graphics.gl import Gl, GlColor
+from graphics.mesh import Mesh
+from graphics.particles import ParticleRenderer
+from graphics.shader import Program
+
+_INSTANCED_VERTEX_SHADER = '''
+#version 120
+
+attribute vec4 instance;  // xyz: center, w: scale
+
+varying vec4 color;
+
+void main() {
+    color = gl_Color;
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(gl_Vertex.xyz * instance.w + instance.xyz, 1.0);
+}
+'''
+
+_INSTANCED_FRAGMENT_SHADER = '''
+#version 120
+
+varying vec4 color;
+
+void main() {
+    gl_FragColor = color;
+}
+'''
+
+# corners of a face in its own xy plane and their texture coordinates, in the order the tasks used to draw them
+_FACE_CORNERS = np.array([(1, 1), (1, -1), (-1, -1), (-1, 1)], np.float32)
+_FACE_TEXTURE_COORDINATES = np.array([(1, 0), (1, 1), (0, 1), (0, 0)], np.float32)
+_FACE_INDICES = np.array([0, 1, 2, 0, 2, 3], np.uint32)
+_INDICES_PER_FACE = len(_FACE_INDICES)
+_INDEX_SIZE = 4
+
+
+class Cube(object):
+    """
+    An axis-aligned cube centered at the origin, built once into buffer objects.
+
+    Every face has its own color and texture coordinates; a face's texture repeats ``texture_scales[face]`` times
+    along each side. ``draw()`` takes a single draw call, one more per textured face when ``textures`` are given,
+    and ``draw_instanced()`` draws any number of copies of the cube with a single call.
+    """
+
+    class Face(Enum):
+        FRONT = 0
+        BACK = 1
+        TOP = 2
+        BOTTOM = 3
+        RIGHT = 4
+        LEFT = 5
+
+    def __init__(self, size: float, colors, texture_scales=None, instancing: bool = None):
+        """
+        :param colors: one ``(red, green, blue)`` color in ``[0, 255]`` per face, in ``Face`` order
+        :param texture_scales: maps a ``Face`` to its texture repeat, ``1`` for the faces left out
+        :param instancing: whether ``draw_instanced`` uses hardware instancing, by default when supported
+        """
+        self.size = size
+        texture_scales = texture_scales or {}
+        h = size / 2
+        x, y = h * _FACE_CORNERS[:, 0], h * _FACE_CORNERS[:, 1]
+        # the tasks drew each face in the xy plane and moved it into place with glTranslatef/glRotatef
+        faces = {
+            self.Face.FRONT: (x, y, np.full(4, h)),
+            self.Face.BACK: (x, y, np.full(4, -h)),
+            self.Face.TOP: (x, np.full(4, h), y),
+            self.Face.BOTTOM: (x, np.full(4, -h), y),
+            self.Face.RIGHT: (np.full(4, h), y, -x),
+            self.Face.LEFT: (np.full(4, -h), y, -x),
+        }
+        positions = np.concatenate([np.stack(faces[face], axis=1) for face in self.Face])
+        texture_coordinates = np.concatenate([
+            _FACE_TEXTURE_COORDINATES * texture_scales.get(face, 1.) for face in self.Face
+        ])
+        colors = np.repeat(np.asarray(colors, np.float32) / 255, 4, axis=0)
+        indices = np.concatenate([_FACE_INDICES + 4 * face.value for face in self.Face])
+        self._mesh = Mesh(Gl.BeginMode.TRIANGLES, positions, texture_coordinates=texture_coordinates, colors=colors,
+                          indices=indices)
+
+        if instancing is None:
+            instancing = ParticleRenderer.instancing_supported()
+        self.instancing = instancing
+        self._program = None
+        self._instance_buffer = None
+
+    @classmethod
+    def _draw_faces(cls, first: int, count: int):
+        Gl.draw_elements(Gl.BeginMode.TRIANGLES, count * _INDICES_PER_FACE,
+                         offset=first * _INDICES_PER_FACE * _INDEX_SIZE)
+
+    def draw(self, textures=None):
+        """
+        :param textures: maps a ``Face`` to the texture drawn on it; the other faces are drawn in their colors
+        """
+        if not textures:
+            self._mesh.draw()
+            return
+
+        self._mesh.bind()
+        Gl.bind_texture(0)
+        first = None
+        for face in list(self.Face) + [None]:
+            if face is not None and face not in textures:
+                if first is None:
+                    first = face.value
+            elif first is not None:
+                self._draw_faces(first, (len(self.Face) if face is None else face.value) - first)
+                first = None
+
+        Gl.disable_client_state(Gl.ClientState.COLOR_ARRAY)
+        Gl.color3(GlColor(255, 255, 255))
+        for face, texture in textures.items():
+            Gl.bind_texture(texture)
+            self._draw_faces(face.value, 1)
+        self._mesh.unbind()
+
+    def draw_instanced(self, instances):
+        """
+        :param instances: ``(n, 4)`` array of cube centers and scales relative to ``size``
+        """
+        if not len(instances):
+            return
+        if not self.instancing:
+            self._mesh.bind()
+            for x, y, z, scale in instances:
+                Gl.push_matrix()
+                Gl.translate(x, y, z)
+                Gl.scale(scale, scale, scale)
+                Gl.draw_elements(Gl.BeginMode.TRIANGLES, self._mesh.index_count)
+                Gl.pop_matrix()
+            self._mesh.unbind()
+            return
+
+        if self._program is None:
+            self._program = Program(_INSTANCED_VERTEX_SHADER, _INSTANCED_FRAGMENT_SHADER)
+            self._instance_buffer = Gl.gen_buffers(1)
+        program = self._program
+        program.use()
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, self._instance_buffer)
+        Gl.buffer_data(Gl.BufferTarget.ARRAY_BUFFER, np.ascontiguousarray(instances, np.float32),
+                       Gl.BufferUsage.STREAM_DRAW)
+        location = program.attribute_location('instance')
+        Gl.vertex_attrib_pointer(location, 4)
+        Gl.vertex_attrib_divisor(location, 1)
+        Gl.enable_vertex_attrib_array(location)
+
+        self._mesh.bind()
+        Gl.draw_elements_instanced(Gl.BeginMode.TRIANGLES, self._mesh.index_count, len(instances))
+        self._mesh.unbind()
+
+        Gl.disable_vertex_attrib_array(location)
+        Gl.vertex_attrib_divisor(location, 0)
+        Program.release()
+
+    def delete(self):
+        self._mesh.delete()
+        if self._program is not None:
+            Gl.delete_buffers(self._instance_buffer)
+            self._program.delete()
+            self._program = None
+
+
+def cube_grid(side: int, size: float, gap: float = 0.5):
+    """
+    Instances for ``Cube.draw_instanced``: ``side ** 3`` cubes filling a ``size``-wide cube of space, each shrunk
+    by ``gap`` of its cell.
+    """
+    cell = size / side
+    ticks = (np.arange(side, dtype=np.float32) + 0.5) * cell - size / 2
+    x, y, z = np.meshgrid(ticks, ticks, ticks, indexing='ij')
+    instances = np.empty((side ** 3, 4), np.float32)
+    instances[:, 0], instances[:, 1], instances[:, 2] = x.ravel(), y.ravel(), z.ravel()
+    instances[:, 3] = (1 - gap) / side
+    return instances
@@ -0,0 +1,132 @@
+import attr
+import numpy as np
+
+
+def _max_scale(matrix):
+    return np.linalg.norm(matrix[..., :3, :3], axis=-2).max(axis=-1)
+
+
+@attr.s(slots=True)
+class BoundingSphere(object):
+    center = attr.ib(converter=lambda center: np.asarray(center, np.float64))
+    radius = attr.ib(type=float)
+
+    def transformed(self, matrix):
+        return BoundingSphere(matrix[:3, :3] @ self.center + matrix[:3, 3], self.radius * _max_scale(matrix))
+
+    def visible(self, frustum):
+        return bool(frustum.spheres_visible(self.center[None], self.radius)[0])
+
+
+@attr.s(slots=True)
+class BoundingBox(object):
+    minimum = attr.ib(converter=lambda minimum: np.asarray(minimum, np.float64))
+    maximum = attr.ib(converter=lambda maximum: np.asarray(maximum, np.float64))
+
+    def transformed(self, matrix):
+        # the axis-aligned box around the transformed box
+        center = (self.minimum + self.maximum) / 2
+        extent = np.abs(matrix[:3, :3]) @ ((self.maximum - self.minimum) / 2)
+        center = matrix[:3, :3] @ center + matrix[:3, 3]
+        return BoundingBox(center - extent, center + extent)
+
+    def visible(self, frustum):
+        return bool(frustum.boxes_visible(self.minimum[None], self.maximum[None])[0])
+
+
+class Frustum(object):
+    """
+    The six planes of the view volume of ``matrix``, a row-major ``projection @ view`` matrix, in the space
+    ``view`` transforms from. Tests are conservative: volumes near a corner may pass although they are outside.
+    """
+
+    def __init__(self, matrix):
+        matrix = np.asarray(matrix, np.float64)
+        planes = np.array([
+            matrix[3] + matrix[0], matrix[3] - matrix[0],
+            matrix[3] + matrix[1], matrix[3] - matrix[1],
+            matrix[3] + matrix[2], matrix[3] - matrix[2],
+        ])
+        self.planes = planes / np.linalg.norm(planes[:, :3], axis=1)[:, None]
+
+    def distances(self, points):
+        """
+        ``(n, 6)`` signed distances of ``points`` to the planes, positive on the inner side.
+        """
+        return np.asarray(points) @ self.planes[:, :3].T + self.planes[:, 3]
+
+    def spheres_visible(self, centers, radii):
+        return (self.distances(centers) >= -np.reshape(radii, (-1, 1))).all(axis=1)
+
+    def boxes_visible(self, minimum, maximum):
+        # a box is outside a plane when even its corner farthest along the plane normal is
+        normals = self.planes[:, :3]
+        positive = normals >= 0
+        corners = np.where(positive[None], np.asarray(maximum)[:, None], np.asarray(minimum)[:, None])
+        return ((corners * normals).sum(axis=2) + self.planes[:, 3] >= 0).all(axis=1)
+
+
+@attr.s(slots=True)
+class CullingStats(object):
+    objects = attr.ib(type=int, default=0)
+    culled_objects = attr.ib(type=int, default=0)
+    particles = attr.ib(type=int, default=0)
+    culled_particles = attr.ib(type=int, default=0)
+
+
+class FrustumCuller(object):
+    """
+    Tests bounding volumes and particles against the frustum given to ``begin_frame`` and counts what it culls.
+
+    Without a frustum everything is visible.
+    """
+
+    def __init__(self, batch_size: int = 256):
+        self.batch_size = batch_size
+        self.frustum = None
+        self.stats = CullingStats()
+        self.last_frame = CullingStats()
+
+    def begin_frame(self, frustum: Frustum = None):
+        self.frustum = frustum
+        self.last_frame, self.stats = self.stats, CullingStats()
+
+    def visible(self, bounds, matrix=None):
+        """
+        :param bounds: a ``BoundingSphere`` or ``BoundingBox``, in the space of ``matrix`` when it is given
+        """
+        self.stats.objects += 1
+        if self.frustum is None or bounds is None:
+            return True
+        if matrix is not None:
+            bounds = bounds.transformed(matrix)
+        visible = bounds.visible(self.frustum)
+        if not visible:
+            self.stats.culled_objects += 1
+        return visible
+
+    def visible_particles(self, positions, radius: float):
+        """
+        Mask of the particles of radius ``radius`` that may be visible.
+
+        Particles are first rejected ``batch_size`` at a time by the bounding boxes of consecutive runs, and only
+        those in the surviving batches are tested one by one.
+        """
+        count = len(positions)
+        self.stats.particles += count
+        if self.frustum is None or not count:
+            return np.ones(count, bool)
+
+        batches = -(-count // self.batch_size)
+        padded = np.empty((batches * self.batch_size, 3), positions.dtype)
+        padded[:count] = positions
+        # the padding repeats the last particle so it does not widen the last box
+        padded[count:] = positions[-1]
+        padded = padded.reshape(batches, self.batch_size, 3)
+        batch_visible = self.frustum.boxes_visible(padded.min(axis=1) - radius, padded.max(axis=1) + radius)
+
+        visible = np.repeat(batch_visible, self.batch_size)[:count]
+        candidates = np.flatnonzero(visible)
+        visible[candidates] = self.frustum.spheres_visible(positions[candidates], radius)
+        self.stats.culled_particles += count - int(visible.sum())
+        return visible
@@ -0,0 +1,145 @@
+import numpy as np
+
+from graphics.gl import Gl
+from graphics.mesh import Mesh
+
+
+def _evaluate(function, t):
+    return np.stack(np.broadcast_arrays(*function(t)), axis=1)
+
+
+def parametric_curve(function, start: float, stop: float, samples: int):
+    """
+    Samples ``function`` at ``samples`` evenly spaced parameters from ``start`` to ``stop`` inclusive.
+
+    ``function(t)`` gets the whole ``(samples,)`` parameter array and returns the ``x, y, z`` coordinate arrays.
+    """
+    return _evaluate(function, np.linspace(start, stop, samples)).astype(np.float32)
+
+
+def adaptive_curve(function, start: float, stop: float, pixels_per_unit: float, tolerance: float = 0.5,
+                   initial_segments: int = 8, max_depth: int = 12):
+    """
+    Samples ``function`` like ``parametric_curve``, halving every segment whose midpoint lies more than
+    ``tolerance`` pixels off its chord at ``pixels_per_unit``, up to ``max_depth`` times.
+
+    Features narrower than the ``initial_segments`` can be missed, so curves that wind a lot need more of them.
+    """
+    t = np.linspace(start, stop, initial_segments + 1)
+    points = _evaluate(function, t)
+    pending = np.ones(initial_segments, bool)
+    for _ in range(max_depth):
+        index = np.flatnonzero(pending)
+        if not len(index):
+            break
+        middle_t = (t[index] + t[index + 1]) / 2
+        middle = _evaluate(function, middle_t)
+        error = np.linalg.norm(middle - (points[index] + points[index + 1]) / 2, axis=1) * pixels_per_unit
+        split = error > tolerance
+        index, middle_t, middle = index[split], middle_t[split], middle[split]
+
+        # both halves of a split segment are checked again, the segments that passed are final
+        pending = np.zeros(len(t) - 1, bool)
+        pending[index] = True
+        pending = np.insert(pending, index + 1, True)
+        t = np.insert(t, index + 1, middle_t)
+        points = np.insert(points, index + 1, middle, axis=0)
+    return points.astype(np.float32)
+
+
+def curve_mesh(points, usage: Gl.BufferUsage = Gl.BufferUsage.STATIC_DRAW):
+    return Mesh(Gl.BeginMode.LINE_STRIP, points, usage=usage)
+
+
+class CurveTessellator(object):
+    """
+    Tessellates curves finely enough for the current view and keeps the meshes in ``resources``.
+
+    The screen scale is rounded up to a power of ``bucket_ratio`` and every ``(name, zoom bucket)`` is cached
+    under its own name, so zooming back and forth reuses meshes and the chord error stays under ``tolerance``
+    pixels anywhere in a bucket. Meshes are rebuilt when a curve's ``parameters`` change.
+    """
+
+    def __init__(self, resources, tolerance: float = 0.5, bucket_ratio: float = 2., max_depth: int = 12):
+        self.resources = resources
+        self.tolerance = tolerance
+        self.bucket_ratio = bucket_ratio
+        self.max_depth = max_depth
+
+    @classmethod
+    def pixels_per_unit(cls, center=(0., 0., 0.), radius: float = 0.):
+        """
+        Pixels covered by a unit length of the current model space at the point of the bounding sphere
+        ``(center, radius)`` closest to the viewer.
+        """
+        # PyOpenGL hands the column-major matrices out as [column][row]
+        projection = np.asarray(Gl.get_matrix(Gl.Matrix.PROJECTION_MATRIX), np.float64)
+        modelview = np.asarray(Gl.get_matrix(Gl.Matrix.MODELVIEW_MATRIX), np.float64)
+        scale = np.linalg.norm(modelview[0, :3]) * projection[1, 1] * Gl.get_viewport()[3] / 2
+        if projection[2, 3] == 0:
+            return scale
+        distance = -(np.append(center, 1.) @ modelview)[2] - radius * np.linalg.norm(modelview[0, :3])
+        near = projection[3, 2] / (projection[2, 2] - 1)
+        return scale / max(distance, near)
+
+    def zoom_bucket(self, pixels_per_unit: float):
+        return int(np.ceil(np.log(pixels_per_unit) / np.log(self.bucket_ratio)))
+
+    def mesh(self, name, parameters, function, start: float, stop: float, center=(0., 0., 0.), radius: float = 0.,
+             mode: Gl.BeginMode = Gl.BeginMode.LINE_STRIP, initial_segments: int = 8):
+        """
+        Returns the ``Mesh`` of ``function`` from ``start`` to ``stop`` (see ``adaptive_curve``) for the current
+        view; ``(center, radius)`` bounds the curve in model space.
+        """
+        bucket = self.zoom_bucket(self.pixels_per_unit(center, radius))
+
+        def build():
+            points = adaptive_curve(function, start, stop, self.bucket_ratio ** bucket, self.tolerance,
+                                    initial_segments, self.max_depth)
+            return Mesh(mode, points)
+
+        return self.resources.mesh('{}@{}'.format(name, bucket), parameters, build)
+
+
+def circle(radius: float):
+    def function(t):
+        return radius * np.cos(t), radius * np.sin(t), 0.
+
+    return function
+
+
+def spiral_function(k: float, alpha: float, beta: float, sigma: float):
+    """
+    ``k`` turns of a spiral on the cone ``z = sigma * r`` whose radius ``r = alpha + beta_n * theta`` grows with
+    ``beta_n = beta * (1 + beta) ** n`` at the ``n``-th of 360 samples per half turn; ``n`` is continuous in
+    ``theta`` and hits the integers at the samples. Returns ``(function, start, stop, samples)``.
+    """
+    if k < 0.5:
+        raise ValueError('a spiral has at least half a turn: k = {}'.format(k))
+    samples = int(2 * k) * 360
+    stop = 2 * np.pi * k
+    step = stop / (samples - 1)
+
+    def function(theta):
+        # closed form of ``beta *= 1 + beta`` applied once per sample, before the sample is taken
+        r = alpha + beta * (1. + beta) ** (1. + theta / step) * theta
+        return r * np.cos(theta), r * np.sin(theta), sigma * np.abs(r)
+
+    return function, 0., stop, samples
+
+
+def spiral_bounds(k: float, alpha: float, beta: float, sigma: float):
+    """
+    Radius of a sphere around the origin holding the ``spiral_function`` curve.
+    """
+    function, _, stop, _ = spiral_function(k, alpha, beta, sigma)
+    r = np.hypot(*_evaluate(function, np.array([0., stop]))[:, :2].T).max()
+    return float(r * np.hypot(1., sigma))
+
+
+def conical_spiral(k: float, alpha: float, beta: float, sigma: float):
+    """
+    The ``spiral_function`` curve at its 360 samples per half turn.
+    """
+    function, start, stop, samples = spiral_function(k, alpha, beta, sigma)
+    return parametric_curve(function, start, stop, samples)
@@ -1,7 +1,9 @@
-from collections import Iterable
+import ctypes
+from collections.abc import Iterable
 from enum import Enum
 
 import attr
+import numpy as np
 from OpenGL.GL import (glClearColor, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_ACCUM_BUFFER_BIT,
                        GL_STENCIL_BUFFER_BIT, glClear, glShadeModel, GL_FLAT, GL_SMOOTH, GL_DEPTH_TEST, GL_CULL_FACE,
                        GL_LIGHTING, GL_LIGHT0, glEnable, glDisable, GL_LIGHT_MODEL_AMBIENT, GL_LIGHT_MODEL_TWO_SIDE,
@@ -16,8 +18,25 @@ from OpenGL.GL import (glClearColor, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, G
                        glPushMatrix, glPopMatrix, GL_COMPILE, glNewList, glEndList, glCallList, glTranslatef, glRotatef,
                        glScalef, glColor3f, GL_LINE_SMOOTH, GL_FOG, GL_FOG_DENSITY, glFogf, GL_FOG_START, GL_FOG_END,
                        glFogi, GL_EXP2, GL_FOG_MODE, glFogfv, GL_FOG_COLOR, GL_FOG_HINT, GL_NICEST, glHint,
-                       GL_MULTISAMPLE)
+                       GL_MULTISAMPLE, glGenBuffers, glBindBuffer, glBufferData, glBufferSubData, glDeleteBuffers,
+                       GL_ARRAY_BUFFER, GL_ELEMENT_ARRAY_BUFFER, GL_STATIC_DRAW, GL_DYNAMIC_DRAW, GL_STREAM_DRAW,
+                       glEnableClientState, glDisableClientState, GL_VERTEX_ARRAY, glVertexPointer, GL_FLOAT,
+                       glDrawArrays, glPointSize, glPointParameterfv, GL_POINT_DISTANCE_ATTENUATION, GL_POINT_SMOOTH,
+                       GL_BLEND, GL_PROGRAM_POINT_SIZE, glGetFloatv, GL_PROJECTION_MATRIX, GL_MODELVIEW_MATRIX,
+                       GL_VIEWPORT, glGetIntegerv, glIsEnabled, glVertexAttribPointer, glEnableVertexAttribArray,
+                       glDisableVertexAttribArray, glVertexAttribDivisor, glDrawElements, glDrawElementsInstanced,
+                       GL_UNSIGNED_INT, GL_NORMAL_ARRAY, GL_TEXTURE_COORD_ARRAY, GL_COLOR_ARRAY, glNormalPointer,
+                       glTexCoordPointer, glColorPointer, GL_POLYGON, GL_TRIANGLE_STRIP, GL_TRIANGLE_FAN,
+                       GL_RESCALE_NORMAL, GL_TEXTURE_2D, glDeleteLists, glGenTextures, glDeleteTextures, glBindTexture,
+                       glTexParameteri, glTexImage2D, glPixelStorei, GL_TEXTURE_WRAP_S, GL_TEXTURE_WRAP_T,
+                       GL_TEXTURE_MIN_FILTER, GL_TEXTURE_MAG_FILTER, GL_REPEAT, GL_CLAMP_TO_EDGE, GL_LINEAR, GL_NEAREST,
+                       GL_RGB, GL_RGBA, GL_LUMINANCE, GL_UNSIGNED_BYTE, GL_UNPACK_ALIGNMENT, glGetLightfv,
+                       glGetMaterialfv, GL_TEXTURE_BINDING_2D, glGenQueries, glDeleteQueries, glBeginQuery,
+                       glEndQuery, glGetQueryObjectiv, GL_TIME_ELAPSED, GL_QUERY_RESULT, GL_QUERY_RESULT_AVAILABLE,
+                       glLoadMatrixf)
+from OpenGL import extensions
 from OpenGL.raw.GL.ARB.multisample import GL_MULTISAMPLE_ARB
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v
 
 
 @attr.s(slots=True, frozen=True)
@@ -38,6 +57,25 @@ class GlColor(object):
 
 
 class Gl(object):
+    # names handed out by gen_* and not yet released by delete_*
+    _live = {
+        'lists': 0,
+        'buffers': 0,
+        'textures': 0,
+    }
+
+    # Shadow copy of the state set through this class. Calls that would not change it are not sent to the driver.
+    # ``debug_state`` compares every skipped value against ``glGet*``.
+    debug_state = False
+    _shadow = {}
+    _state_calls = {
+        'issued': 0,
+        'skipped': 0,
+    }
+    _compiling = False
+    _list_changes_state = False
+    _stateful_lists = set()
+
     class Buffer(Enum):
         COLOR_BUFFER_BIT = GL_COLOR_BUFFER_BIT
         DEPTH_BUFFER_BIT = GL_DEPTH_BUFFER_BIT
@@ -62,6 +100,11 @@ class Gl(object):
         FOG = GL_FOG
         MULTISAMPLE = GL_MULTISAMPLE
         MULTISAMPLE_ARB = GL_MULTISAMPLE_ARB
+        POINT_SMOOTH = GL_POINT_SMOOTH
+        BLEND = GL_BLEND
+        PROGRAM_POINT_SIZE = GL_PROGRAM_POINT_SIZE
+        RESCALE_NORMAL = GL_RESCALE_NORMAL
+        TEXTURE_2D = GL_TEXTURE_2D
 
     class LightModel(Enum):
         LIGHT_MODEL_AMBIENT = GL_LIGHT_MODEL_AMBIENT
@@ -109,6 +152,9 @@ class Gl(object):
         POINTS = GL_POINTS
         TRIANGLES = GL_TRIANGLES
         LINES = GL_LINES
+        POLYGON = GL_POLYGON
+        TRIANGLE_STRIP = GL_TRIANGLE_STRIP
+        TRIANGLE_FAN = GL_TRIANGLE_FAN
 
     class Factor(Enum):
         SRC_ALPHA = GL_SRC_ALPHA
@@ -129,6 +175,50 @@ class Gl(object):
     class FogMode(Enum):
         EXP2 = GL_EXP2
 
+    class BufferTarget(Enum):
+        ARRAY_BUFFER = GL_ARRAY_BUFFER
+        ELEMENT_ARRAY_BUFFER = GL_ELEMENT_ARRAY_BUFFER
+
+    class BufferUsage(Enum):
+        STATIC_DRAW = GL_STATIC_DRAW
+        DYNAMIC_DRAW = GL_DYNAMIC_DRAW
+        STREAM_DRAW = GL_STREAM_DRAW
+
+    class ClientState(Enum):
+        VERTEX_ARRAY = GL_VERTEX_ARRAY
+        NORMAL_ARRAY = GL_NORMAL_ARRAY
+        TEXTURE_COORD_ARRAY = GL_TEXTURE_COORD_ARRAY
+        COLOR_ARRAY = GL_COLOR_ARRAY
+
+    class PointParameter(Enum):
+        POINT_DISTANCE_ATTENUATION = GL_POINT_DISTANCE_ATTENUATION
+
+    class TextureParameter(Enum):
+        TEXTURE_WRAP_S = GL_TEXTURE_WRAP_S
+        TEXTURE_WRAP_T = GL_TEXTURE_WRAP_T
+        TEXTURE_MIN_FILTER = GL_TEXTURE_MIN_FILTER
+        TEXTURE_MAG_FILTER = GL_TEXTURE_MAG_FILTER
+
+    class TextureWrap(Enum):
+        REPEAT = GL_REPEAT
+        CLAMP_TO_EDGE = GL_CLAMP_TO_EDGE
+
+    class TextureFilter(Enum):
+        LINEAR = GL_LINEAR
+        NEAREST = GL_NEAREST
+
+    class PixelFormat(Enum):
+        RGB = GL_RGB
+        RGBA = GL_RGBA
+        LUMINANCE = GL_LUMINANCE
+
+    class Matrix(Enum):
+        PROJECTION_MATRIX = GL_PROJECTION_MATRIX
+        MODELVIEW_MATRIX = GL_MODELVIEW_MATRIX
+
+    class QueryTarget(Enum):
+        TIME_ELAPSED = GL_TIME_ELAPSED
+
     @classmethod
     def clear_color(cls, color: GlColor, alpha=1.0):
         glClearColor(*color.to_float(), alpha)
@@ -144,26 +234,121 @@ class Gl(object):
     def shade_model(cls, mode: ShadingTechnique):
         glShadeModel(mode.value)
 
+    @classmethod
+    def _changes_state(cls, keys, value):
+        """
+        Records ``value`` for every shadow key and tells whether the driver call is needed.
+        """
+        if cls._compiling:
+            # recorded into a display list, not executed: the shadow copy stays as it is
+            cls._list_changes_state = True
+            cls._state_calls['issued'] += 1
+            return True
+        if all(cls._shadow.get(key, _UNKNOWN) == value for key in keys):
+            cls._state_calls['skipped'] += 1
+            if cls.debug_state:
+                for key in keys:
+                    _verify_state(key, value)
+            return False
+        for key in keys:
+            cls._shadow[key] = value
+        cls._state_calls['issued'] += 1
+        return True
+
+    @classmethod
+    def _forget_state(cls, *kinds):
+        for key in [key for key in cls._shadow if key[0] in kinds]:
+            del cls._shadow[key]
+
+    @classmethod
+    def _apply_state(cls, state_key, state, parameters, keys, apply):
+        """
+        Applies ``(parameter, array, frozen value)`` triples of an immutable ``graphics.lighting`` object.
+
+        Re-applying the object that was applied last under ``state_key`` skips every parameter at once; otherwise
+        each parameter goes through the shadow copy under ``keys(parameter)``.
+        """
+        if not cls._compiling and cls._shadow.get(state_key) is state:
+            cls._state_calls['skipped'] += len(parameters)
+            if cls.debug_state:
+                for parameter, _, value in parameters:
+                    for key in keys(parameter):
+                        _verify_state(key, value)
+            return
+        for parameter, data, value in parameters:
+            if cls._changes_state(keys(parameter), value):
+                apply(parameter, data)
+        if not cls._compiling:
+            cls._shadow[state_key] = state
+
+    @classmethod
+    def reset_state(cls):
+        """
+        Forgets the shadow copy, e.g. after a new context is made current or state was changed bypassing ``Gl``.
+        """
+        cls._shadow.clear()
+
+    @classmethod
+    def state_calls(cls):
+        """
+        Numbers of state-changing calls sent to the driver and skipped as redundant.
+        """
+        return dict(cls._state_calls)
+
+    @classmethod
+    def verify_state(cls):
+        for key, value in cls._shadow.items():
+            # '*_state' keys remember which lighting object was applied last, not a GL value
+            if not key[0].endswith('_state'):
+                _verify_state(key, value)
+
     @classmethod
     def enable(cls, capability: Capability):
-        glEnable(capability.value)
+        if cls._changes_state([('enable', capability)], True):
+            glEnable(capability.value)
+            if capability is cls.Capability.COLOR_MATERIAL:
+                cls._forget_state('material', 'material_state')
 
     @classmethod
     def disable(cls, capability: Capability):
-        glDisable(capability.value)
+        if cls._changes_state([('enable', capability)], False):
+            glDisable(capability.value)
 
     @classmethod
     def light(cls, light: Capability, light_parameter: LightParameter, value):
-        if isinstance(value, Iterable):
+        value = _freeze(value)
+        # positions and directions are transformed by the modelview matrix current at the time of the call,
+        # so the same value does not mean the same state
+        cls._shadow.pop(('light_state', light), None)
+        if light_parameter in _TRANSFORMED_LIGHT_PARAMETERS:
+            cls._state_calls['issued'] += 1
+        elif not cls._changes_state([('light', light, light_parameter)], value):
+            return
+        if isinstance(value, tuple):
             glLightfv(light.value, light_parameter.value, value)
         else:
             glLightf(light.value, light_parameter.value, value)
 
+    @classmethod
+    def light_state(cls, light: Capability, state):
+        """
+        Applies a ``graphics.lighting.Light`` to ``light``.
+        """
+        def apply(parameter, data):
+            glLightfv(light.value, parameter.value, data)
+
+        cls._apply_state(('light_state', light), state, state.static_parameters,
+                         lambda parameter: [('light', light, parameter)], apply)
+        for parameter, data, _ in state.transformed_parameters:
+            cls._state_calls['issued'] += 1
+            apply(parameter, data)
+
     @classmethod
     def light_model(cls, light_model: LightModel, value):
         if isinstance(value, cls.Bool):
-            glLightModelf(light_model.value, value.value)
-        else:
+            if cls._changes_state([('light_model', light_model)], float(value.value)):
+                glLightModelf(light_model.value, value.value)
+        elif cls._changes_state([('light_model', light_model)], _freeze(value)):
             glLightModelfv(light_model.value, value)
 
     @classmethod
@@ -178,13 +363,47 @@ class Gl(object):
     def load_identity(cls):
         glLoadIdentity()
 
+    @classmethod
+    def load_matrix(cls, matrix):
+        """
+        Loads a row-major NumPy matrix that transforms column vectors, like the ones ``graphics.scene`` builds.
+        """
+        glLoadMatrixf(np.ascontiguousarray(np.transpose(matrix), np.float32))
+
     @classmethod
     def material(cls, face: MaterialFace, material_parameter: MaterialParameter, value):
-        if isinstance(value, Iterable):
+        value = _freeze(value)
+        cls._shadow.pop(('material_state',), None)
+        if cls._shadow.get(('enable', cls.Capability.COLOR_MATERIAL)):
+            # glColor may have changed the material behind our back
+            cls._forget_state('material')
+        faces = _MATERIAL_FACES[face]
+        parameters = _MATERIAL_PARAMETERS.get(material_parameter, (material_parameter,))
+        if not cls._changes_state([('material', f, p) for f in faces for p in parameters], value):
+            return
+        if isinstance(value, tuple):
             glMaterialfv(face.value, material_parameter.value, value)
         else:
             glMaterialf(face.value, material_parameter.value, value)
 
+    @classmethod
+    def material_state(cls, state):
+        """
+        Applies a ``graphics.lighting.Material``.
+        """
+        if cls._shadow.get(('enable', cls.Capability.COLOR_MATERIAL)):
+            cls._forget_state('material', 'material_state')
+        faces = _MATERIAL_FACES[state.face]
+
+        def keys(parameter):
+            parameters = _MATERIAL_PARAMETERS.get(parameter, (parameter,))
+            return [('material', face, p) for face in faces for p in parameters]
+
+        def apply(parameter, data):
+            glMaterialfv(state.face.value, parameter.value, data)
+
+        cls._apply_state(('material_state',), state, state.parameters, keys, apply)
+
     @classmethod
     def begin(cls, begin_mode: BeginMode):
         glBegin(begin_mode.value)
@@ -211,8 +430,15 @@ class Gl(object):
 
     @classmethod
     def gen_lists(cls, number: int):
+        cls._live['lists'] += number
         return glGenLists(number)
 
+    @classmethod
+    def delete_lists(cls, list_, number: int = 1):
+        cls._live['lists'] -= number
+        cls._stateful_lists.difference_update(range(list_, list_ + number))
+        glDeleteLists(list_, number)
+
     @classmethod
     def push_matrix(cls):
         glPushMatrix()
@@ -223,15 +449,24 @@ class Gl(object):
 
     @classmethod
     def new_list(cls, list_, mode: ListMode):
+        cls._compiling = list_
+        cls._list_changes_state = False
         glNewList(list_, mode.value)
 
     @classmethod
     def end_list(cls):
         glEndList()
+        if cls._list_changes_state:
+            cls._stateful_lists.add(cls._compiling)
+        else:
+            cls._stateful_lists.discard(cls._compiling)
+        cls._compiling = False
 
     @classmethod
     def call_list(cls, list_):
         glCallList(list_)
+        if list_ in cls._stateful_lists:
+            cls.reset_state()
 
     @classmethod
     def translate(cls, x: float, y: float, z: float):
@@ -251,15 +486,299 @@ class Gl(object):
 
     @classmethod
     def fog(cls, param: FogParam, value):
-        if isinstance(value, Iterable):
+        cls._shadow.pop(('fog_state',), None)
+        value = _freeze(value)
+        if not cls._changes_state([('fog', param)], value):
+            return
+        if isinstance(value, tuple):
             glFogfv(param.value, value)
         else:
             glFogf(param.value, value)
 
     @classmethod
     def fog_mode(cls, param: FogParam, mode: FogMode):
-        glFogi(param.value, mode.value)
+        if cls._changes_state([('fog', param)], float(mode.value)):
+            glFogi(param.value, mode.value)
+
+    @classmethod
+    def fog_state(cls, state):
+        """
+        Applies a ``graphics.lighting.FogState``.
+        """
+        if state.mode is not None:
+            cls.fog_mode(cls.FogParam.FOG_MODE, state.mode)
+
+        def apply(parameter, data):
+            glFogfv(parameter.value, data)
+
+        cls._apply_state(('fog_state',), state, state.parameters, lambda parameter: [('fog', parameter)], apply)
 
     @classmethod
     def hint(cls, name: FogParam, val: FogParam):
         glHint(name.value, val.value)
+
+    @classmethod
+    def gen_buffers(cls, number: int):
+        cls._live['buffers'] += number
+        return glGenBuffers(number)
+
+    @classmethod
+    def delete_buffers(cls, *buffers):
+        cls._live['buffers'] -= len(buffers)
+        glDeleteBuffers(len(buffers), buffers)
+
+    @classmethod
+    def gen_textures(cls, number: int):
+        cls._live['textures'] += number
+        return glGenTextures(number)
+
+    @classmethod
+    def delete_textures(cls, *textures):
+        cls._live['textures'] -= len(textures)
+        if cls._shadow.get(('texture',)) in textures:
+            # deleting the bound texture reverts the binding to 0
+            cls._shadow[('texture',)] = 0
+        glDeleteTextures(textures)
+
+    @classmethod
+    def bind_texture(cls, texture):
+        if cls._changes_state([('texture',)], int(texture)):
+            glBindTexture(GL_TEXTURE_2D, texture)
+
+    @classmethod
+    def tex_parameter(cls, parameter: TextureParameter, value):
+        glTexParameteri(GL_TEXTURE_2D, parameter.value, value.value)
+
+    @classmethod
+    def tex_image_2d(cls, pixel_format: PixelFormat, width: int, height: int, data):
+        glTexImage2D(GL_TEXTURE_2D, 0, pixel_format.value, width, height, 0, pixel_format.value, GL_UNSIGNED_BYTE,
+                     data)
+
+    @classmethod
+    def unpack_alignment(cls, alignment: int):
+        glPixelStorei(GL_UNPACK_ALIGNMENT, alignment)
+
+    @classmethod
+    def live_resources(cls):
+        """
+        Display lists, buffers and textures generated through ``Gl`` and not deleted yet.
+        """
+        return dict(cls._live)
+
+    @classmethod
+    def timer_queries_supported(cls):
+        return bool(glBeginQuery) and extensions.hasGLExtension('GL_ARB_timer_query')
+
+    @classmethod
+    def gen_queries(cls, number: int):
+        return [int(query) for query in glGenQueries(number)]
+
+    @classmethod
+    def delete_queries(cls, *queries):
+        glDeleteQueries(len(queries), queries)
+
+    @classmethod
+    def begin_query(cls, target: QueryTarget, query):
+        glBeginQuery(target.value, query)
+
+    @classmethod
+    def end_query(cls, target: QueryTarget):
+        glEndQuery(target.value)
+
+    @classmethod
+    def query_result_available(cls, query):
+        return bool(glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE))
+
+    @classmethod
+    def query_result(cls, query):
+        result = ctypes.c_uint64()
+        glGetQueryObjectui64v(query, GL_QUERY_RESULT, ctypes.byref(result))
+        return result.value
+
+    @classmethod
+    def bind_buffer(cls, target: BufferTarget, buffer):
+        glBindBuffer(target.value, buffer)
+
+    @classmethod
+    def buffer_data(cls, target: BufferTarget, data, usage: BufferUsage):
+        glBufferData(target.value, data.nbytes, data, usage.value)
+
+    @classmethod
+    def buffer_sub_data(cls, target: BufferTarget, offset: int, data):
+        glBufferSubData(target.value, offset, data.nbytes, data)
+
+    @classmethod
+    def enable_client_state(cls, state: ClientState):
+        glEnableClientState(state.value)
+
+    @classmethod
+    def disable_client_state(cls, state: ClientState):
+        glDisableClientState(state.value)
+
+    @classmethod
+    def vertex_pointer(cls, size: int, stride: int = 0, offset: int = 0, data=None):
+        """
+        Points the vertex array at ``data`` or, when it is omitted, at ``offset`` in the bound array buffer.
+        """
+        glVertexPointer(size, GL_FLOAT, stride, _pointer(data, offset))
+
+    @classmethod
+    def normal_pointer(cls, stride: int = 0, offset: int = 0, data=None):
+        glNormalPointer(GL_FLOAT, stride, _pointer(data, offset))
+
+    @classmethod
+    def tex_coord_pointer(cls, size: int, stride: int = 0, offset: int = 0, data=None):
+        glTexCoordPointer(size, GL_FLOAT, stride, _pointer(data, offset))
+
+    @classmethod
+    def color_pointer(cls, size: int, stride: int = 0, offset: int = 0, data=None):
+        glColorPointer(size, GL_FLOAT, stride, _pointer(data, offset))
+
+    @classmethod
+    def draw_arrays(cls, mode: BeginMode, first: int, count: int):
+        glDrawArrays(mode.value, first, count)
+
+    @classmethod
+    def point_size(cls, size: float):
+        glPointSize(size)
+
+    @classmethod
+    def point_parameter(cls, param: PointParameter, value):
+        glPointParameterfv(param.value, value)
+
+    @classmethod
+    def is_enabled(cls, capability: Capability):
+        enabled = cls._shadow.get(('enable', capability))
+        if enabled is None:
+            enabled = bool(glIsEnabled(capability.value))
+        return enabled
+
+    @classmethod
+    def get_matrix(cls, matrix: Matrix):
+        return glGetFloatv(matrix.value)
+
+    @classmethod
+    def get_viewport(cls):
+        return glGetIntegerv(GL_VIEWPORT)
+
+    @classmethod
+    def vertex_attrib_pointer(cls, location: int, size: int, stride: int = 0, offset: int = 0):
+        glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset))
+
+    @classmethod
+    def enable_vertex_attrib_array(cls, location: int):
+        glEnableVertexAttribArray(location)
+
+    @classmethod
+    def disable_vertex_attrib_array(cls, location: int):
+        glDisableVertexAttribArray(location)
+
+    @classmethod
+    def vertex_attrib_divisor(cls, location: int, divisor: int):
+        glVertexAttribDivisor(location, divisor)
+
+    @classmethod
+    def draw_elements(cls, mode: BeginMode, count: int, offset: int = 0, data=None):
+        """
+        Draws ``count`` unsigned int indices from ``data`` or from the currently bound element array buffer.
+        """
+        glDrawElements(mode.value, count, GL_UNSIGNED_INT, _pointer(data, offset))
+
+    @classmethod
+    def draw_elements_instanced(cls, mode: BeginMode, count: int, instances: int, offset: int = 0):
+        glDrawElementsInstanced(mode.value, count, GL_UNSIGNED_INT, ctypes.c_void_p(offset), instances)
+
+    @classmethod
+    def draw_vertex_arrays(cls, mode: BeginMode, positions, normals=None, texture_coordinates=None, colors=None,
+                           indices=None):
+        """
+        Submits whole arrays in a single draw call through client-side vertex arrays.
+
+        Every attribute is an ``(n, k)`` array with one row per vertex; ``indices``, when given, selects vertices
+        in draw order. Inside ``new_list``/``end_list`` the arrays are copied into the display list.
+
+        Returns the number of bytes submitted.
+        """
+        arrays = [
+            (cls.ClientState.VERTEX_ARRAY, cls.vertex_pointer, positions),
+            (cls.ClientState.NORMAL_ARRAY, cls.normal_pointer, normals),
+            (cls.ClientState.TEXTURE_COORD_ARRAY, cls.tex_coord_pointer, texture_coordinates),
+            (cls.ClientState.COLOR_ARRAY, cls.color_pointer, colors),
+        ]
+        enabled = []
+        nbytes = 0
+        for state, pointer, data in arrays:
+            if data is None:
+                continue
+            data = _float_array(data)
+            nbytes += data.nbytes
+            cls.enable_client_state(state)
+            if pointer == cls.normal_pointer:
+                pointer(data=data)
+            else:
+                pointer(data.shape[1], data=data)
+            enabled.append(state)
+
+        if indices is None:
+            cls.draw_arrays(mode, 0, len(positions))
+        else:
+            indices = np.ascontiguousarray(indices, np.uint32).ravel()
+            cls.draw_elements(mode, len(indices), data=indices)
+            nbytes += indices.nbytes
+
+        for state in enabled:
+            cls.disable_client_state(state)
+        return nbytes
+
+
+_UNKNOWN = object()
+
+_TRANSFORMED_LIGHT_PARAMETERS = (Gl.LightParameter.POSITION, Gl.LightParameter.SPOT_DIRECTION)
+
+_MATERIAL_FACES = {
+    Gl.MaterialFace.FRONT: (Gl.MaterialFace.FRONT,),
+    Gl.MaterialFace.BACK: (Gl.MaterialFace.BACK,),
+    Gl.MaterialFace.FRONT_AND_BACK: (Gl.MaterialFace.FRONT, Gl.MaterialFace.BACK),
+}
+
+_MATERIAL_PARAMETERS = {
+    Gl.MaterialParameter.AMBIENT_AND_DIFFUSE: (Gl.MaterialParameter.AMBIENT, Gl.MaterialParameter.DIFFUSE),
+}
+
+
+def _freeze(value):
+    if isinstance(value, Iterable):
+        return tuple(float(v) for v in value)
+    return float(value)
+
+
+def _query_state(key):
+    kind = key[0]
+    if kind == 'enable':
+        return bool(glIsEnabled(key[1].value))
+    if kind == 'light':
+        return glGetLightfv(key[1].value, key[2].value)
+    if kind == 'material':
+        return glGetMaterialfv(key[1].value, key[2].value)
+    if kind == 'fog':
+        return glGetFloatv(key[1].value)
+    if kind == 'light_model':
+        return glGetFloatv(key[1].value)
+    if kind == 'texture':
+        return glGetIntegerv(GL_TEXTURE_BINDING_2D)
+    raise KeyError(key)
+
+
+def _verify_state(key, expected):
+    actual = np.ravel(_query_state(key)).astype(np.float64)
+    expected = np.ravel(expected).astype(np.float64)
+    if not np.allclose(actual[:len(expected)], expected, rtol=1e-5, atol=1e-6):
+        raise AssertionError('GL state {} is {}, shadow copy has {}'.format(key, actual, expected))
+
+
+def _float_array(data):
+    return np.ascontiguousarray(data, np.float32)
+
+
+def _pointer(data, offset):
+    return ctypes.c_void_p(offset) if data is None else data
@@ -1,13 +1,22 @@
+import time
 from enum import Enum
 
 from OpenGL.GLUT import (glutInit, glutInitDisplayMode, glutInitWindowSize, glutInitWindowPosition, glutCreateWindow,
                          glutMainLoop, glutKeyboardFunc, glutDisplayFunc, glutIdleFunc, glutMouseFunc, glutSpecialFunc,
                          glutReshapeFunc, glutGet, glutSwapBuffers, GLUT_RGB, GLUT_DOUBLE, GLUT_DEPTH,
                          GLUT_SCREEN_WIDTH, GLUT_SCREEN_HEIGHT, GLUT_WINDOW_WIDTH, GLUT_WINDOW_HEIGHT, glutSolidSphere,
-                         glutPostRedisplay, GLUT_SINGLE, GLUT_MULTISAMPLE)
+                         glutPostRedisplay, GLUT_SINGLE, GLUT_MULTISAMPLE, glutBitmapCharacter,
+                         GLUT_BITMAP_8_BY_13, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_RIGHT, GLUT_KEY_DOWN)
+from OpenGL.GL import glWindowPos2i
+
+from graphics.gl import Gl
+from graphics.profiler import Profiler
 
 
 class Glut(object):
+    # whether ``clock`` follows the wall clock, so a simulation can be left to run on a thread of its own
+    real_time = True
+
     class State(Enum):
         SCREEN_WIDTH = GLUT_SCREEN_WIDTH
         SCREEN_HEIGHT = GLUT_SCREEN_HEIGHT
@@ -24,6 +33,12 @@ class Glut(object):
         SINGLE = GLUT_SINGLE
         MULTISAMPLE = GLUT_MULTISAMPLE
 
+    class SpecialKey(Enum):
+        LEFT = GLUT_KEY_LEFT
+        UP = GLUT_KEY_UP
+        RIGHT = GLUT_KEY_RIGHT
+        DOWN = GLUT_KEY_DOWN
+
     @classmethod
     def init(cls, argv):
         glutInit(argv)
@@ -48,6 +63,7 @@ class Glut(object):
     @classmethod
     def create_window(cls, title):
         glutCreateWindow(title)
+        Gl.reset_state()
 
     @classmethod
     def main_loop(cls):
@@ -55,27 +71,27 @@ class Glut(object):
 
     @classmethod
     def keyboard_func(cls, callback):
-        glutKeyboardFunc(callback)
+        glutKeyboardFunc(Profiler.callback('keyboard', callback))
 
     @classmethod
     def display_func(cls, callback):
-        glutDisplayFunc(callback)
+        glutDisplayFunc(Profiler.callback('display', callback))
 
     @classmethod
     def idle_func(cls, callback):
-        glutIdleFunc(callback)
+        glutIdleFunc(Profiler.callback('idle', callback))
 
     @classmethod
     def mouse_func(cls, callback):
-        glutMouseFunc(callback)
+        glutMouseFunc(Profiler.callback('mouse', callback))
 
     @classmethod
     def special_func(cls, callback):
-        glutSpecialFunc(callback)
+        glutSpecialFunc(Profiler.callback('special', callback))
 
     @classmethod
     def reshape_func(cls, callback):
-        glutReshapeFunc(callback)
+        glutReshapeFunc(Profiler.callback('reshape', callback))
 
     @classmethod
     def get(cls, state: State):
@@ -108,3 +124,23 @@ class Glut(object):
     @classmethod
     def post_redisplay(cls):
         glutPostRedisplay()
+
+    @classmethod
+    def clock(cls):
+        """
+        Monotonic time in seconds that ``Scheduler`` runs on.
+        """
+        return time.monotonic()
+
+    @classmethod
+    def sleep(cls, seconds: float):
+        time.sleep(seconds)
+
+    @classmethod
+    def bitmap_string(cls, x: int, y: int, text: str):
+        """
+        Draws ``text`` at window coordinates ``(x, y)`` in the current color.
+        """
+        glWindowPos2i(x, y)
+        for character in text:
+            glutBitmapCharacter(GLUT_BITMAP_8_BY_13, ord(character))
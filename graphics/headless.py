@@ -0,0 +1,274 @@
+"""
+Offscreen rendering without a window or a display server.
+
+Set ``GRAPHICS_HEADLESS=egl`` (EGL, surfaceless on Mesa) or ``GRAPHICS_HEADLESS=osmesa`` before anything imports
+OpenGL; ``graphics.glut`` then becomes a ``HeadlessGlut`` that renders into a framebuffer object and drives the
+registered callbacks for a fixed number of frames. From the command line::
+
+    python -m graphics task_6.py --frames 120 --size 640x480 --output frames.npy
+"""
+import ctypes
+import os
+import runpy
+import sys
+
+import numpy as np
+from OpenGL.GL import (glGenFramebuffers, glBindFramebuffer, glGenRenderbuffers, glBindRenderbuffer,
+                       glRenderbufferStorage, glFramebufferRenderbuffer, glCheckFramebufferStatus,
+                       glDeleteFramebuffers, glDeleteRenderbuffers, glReadPixels, glPixelStorei, glViewport, glFinish,
+                       GL_FRAMEBUFFER, GL_RENDERBUFFER, GL_RGBA8, GL_DEPTH24_STENCIL8, GL_COLOR_ATTACHMENT0,
+                       GL_DEPTH_STENCIL_ATTACHMENT, GL_FRAMEBUFFER_COMPLETE, GL_RGB, GL_UNSIGNED_BYTE,
+                       GL_PACK_ALIGNMENT)
+
+from graphics.backend import VARIABLE
+from graphics.gl import Gl
+from graphics.glut import Glut
+from graphics.profiler import Profiler
+from graphics.sphere import SphereMeshCache
+
+
+class HeadlessContext(object):
+    """
+    A GL context without a window; everything is drawn into a framebuffer object of a fixed size.
+    """
+
+    def __init__(self, width: int, height: int, backend_name: str = 'egl'):
+        self.width = width
+        self.height = height
+        self.backend = backend_name
+        if backend_name == 'osmesa':
+            self._create_osmesa()
+        else:
+            self._create_egl()
+        self._create_framebuffer()
+
+    def _create_egl(self):
+        from OpenGL import EGL
+
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        if not EGL.eglInitialize(display, None, None):
+            raise RuntimeError('eglInitialize failed')
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        attributes = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                      EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        if not EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+                or not count.value:
+            raise RuntimeError('no EGL config supports desktop OpenGL')
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+            raise RuntimeError('eglMakeCurrent failed')
+        self._display = display
+        self._context = context
+
+    def _create_osmesa(self):
+        from OpenGL import arrays, osmesa
+
+        self._context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self._context:
+            raise RuntimeError('OSMesaCreateContextExt failed')
+        # OSMesa needs a buffer of its own even though drawing goes to the framebuffer object
+        self._osmesa_buffer = arrays.GLubyteArray.zeros((self.height, self.width, 4))
+        if not osmesa.OSMesaMakeCurrent(self._context, self._osmesa_buffer, GL_UNSIGNED_BYTE,
+                                        self.width, self.height):
+            raise RuntimeError('OSMesaMakeCurrent failed')
+
+    def _create_framebuffer(self):
+        self._framebuffer = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self._framebuffer)
+        self._renderbuffers = glGenRenderbuffers(2)
+        color, depth = self._renderbuffers
+        glBindRenderbuffer(GL_RENDERBUFFER, color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+        glBindRenderbuffer(GL_RENDERBUFFER, depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, depth)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError('offscreen framebuffer is incomplete')
+        glViewport(0, 0, self.width, self.height)
+
+    def read_pixels(self):
+        """
+        Returns the current frame as a ``(height, width, 3)`` ``uint8`` array, top row first.
+        """
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        data = glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE)
+        pixels = np.frombuffer(data, np.uint8).reshape(self.height, self.width, 3)
+        return pixels[::-1].copy()
+
+    def destroy(self):
+        glDeleteFramebuffers(1, [self._framebuffer])
+        glDeleteRenderbuffers(2, self._renderbuffers)
+        if self.backend == 'osmesa':
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self._context)
+        else:
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self._display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(self._display, self._context)
+
+
+class HeadlessGlut(Glut):
+    """
+    Drop-in replacement for ``Glut`` that renders offscreen.
+
+    ``main_loop`` reshapes once to the configured size and then runs the idle and display callbacks for
+    ``frames`` frames; ``before_frame(frame, glut)``, when given, can script input between frames. Every
+    ``swap_buffers`` appends the frame to ``frames_captured`` when ``capture`` is set.
+
+    ``clock`` is virtual: it advances by ``frame_time`` per frame and ``sleep`` returns at once, so scheduled
+    simulations run the same steps on every run however fast frames render.
+    """
+
+    real_time = False
+
+    def __init__(self, backend_name: str = 'egl'):
+        self.backend = backend_name
+        self.size = (640, 480)
+        self.frames = 1
+        self.frame_time = 1 / 60
+        self.time = 0.
+        self.capture = True
+        self.before_frame = None
+        self.context = None
+        self.frames_captured = []
+        self.redisplay_pending = False
+        self._callbacks = {}
+        self._spheres = None
+
+    def configure(self, frames: int = None, size=None, capture: bool = None, before_frame=None,
+                  frame_time: float = None):
+        if frames is not None:
+            self.frames = frames
+        if frame_time is not None:
+            self.frame_time = frame_time
+        if size is not None:
+            self.size = tuple(size)
+        if capture is not None:
+            self.capture = capture
+        self.before_frame = before_frame
+
+    def init(self, argv):
+        pass
+
+    def init_display_mode(self, *modes):
+        pass
+
+    def init_window_size(self, width, height):
+        pass
+
+    def init_window_position(self, x: int, y: int):
+        pass
+
+    def create_window(self, title):
+        if self.context is not None:
+            self.context.destroy()
+        self.context = HeadlessContext(*self.size, backend_name=self.backend)
+        self.frames_captured = []
+        self._spheres = None
+        Gl.reset_state()
+
+    def main_loop(self):
+        width, height = self.size
+        if 'reshape' in self._callbacks:
+            self._callbacks['reshape'](width, height)
+        for frame in range(self.frames):
+            if self.before_frame is not None:
+                self.before_frame(frame, self)
+            if self._callbacks.get('idle') is not None:
+                self._callbacks['idle']()
+            self.redisplay_pending = False
+            self._callbacks['display']()
+            self.time += self.frame_time
+
+    def keyboard_func(self, callback):
+        self._callbacks['keyboard'] = Profiler.callback('keyboard', callback)
+
+    def display_func(self, callback):
+        self._callbacks['display'] = Profiler.callback('display', callback)
+
+    def idle_func(self, callback):
+        self._callbacks['idle'] = Profiler.callback('idle', callback)
+
+    def mouse_func(self, callback):
+        self._callbacks['mouse'] = Profiler.callback('mouse', callback)
+
+    def special_func(self, callback):
+        self._callbacks['special'] = Profiler.callback('special', callback)
+
+    def reshape_func(self, callback):
+        self._callbacks['reshape'] = Profiler.callback('reshape', callback)
+
+    def callback(self, name):
+        """
+        The callback registered under ``keyboard``, ``display``, ``idle``, ``mouse``, ``special`` or ``reshape``.
+        """
+        return self._callbacks.get(name)
+
+    def get(self, state: Glut.State):
+        if state in (Glut.State.WINDOW_WIDTH, Glut.State.SCREEN_WIDTH):
+            return self.size[0]
+        return self.size[1]
+
+    def get_screen_width(self):
+        return self.size[0]
+
+    def get_screen_height(self):
+        return self.size[1]
+
+    def get_window_width(self):
+        return self.size[0]
+
+    def get_window_height(self):
+        return self.size[1]
+
+    def swap_buffers(self):
+        glFinish()
+        if self.capture:
+            self.frames_captured.append(self.context.read_pixels())
+
+    def clock(self):
+        return self.time
+
+    def sleep(self, seconds: float):
+        pass
+
+    def solid_sphere(self, radius: float, slices: int, stacks: int):
+        if self._spheres is None:
+            self._spheres = SphereMeshCache()
+        self._spheres.solid_sphere(radius, slices, stacks)
+
+    def post_redisplay(self):
+        self.redisplay_pending = True
+
+    def bitmap_string(self, x: int, y: int, text: str):
+        # GLUT's bitmap fonts need a GLUT window
+        pass
+
+
+def run(main, frames: int = 1, size=(640, 480), capture: bool = True, before_frame=None):
+    """
+    Runs ``main`` (a task's ``main`` function or the path of a task script) headless and returns the captured
+    frames. ``graphics.glut`` must be a ``HeadlessGlut``, i.e. the process was started with ``GRAPHICS_HEADLESS``.
+    """
+    import graphics
+
+    glut = graphics.glut
+    if not isinstance(glut, HeadlessGlut):
+        raise RuntimeError('set {} before importing graphics to render headless'.format(VARIABLE))
+    glut.configure(frames=frames, size=size, capture=capture, before_frame=before_frame)
+    if callable(main):
+        main()
+    else:
+        path = os.path.abspath(main)
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(path))
+        sys.path.insert(0, os.path.dirname(path))
+        try:
+            runpy.run_path(path, run_name='__main__')
+        finally:
+            sys.path.remove(os.path.dirname(path))
+            os.chdir(cwd)
+    return glut.frames_captured
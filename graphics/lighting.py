@@ -0,0 +1,125 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from graphics.gl import Gl, _freeze
+
+
+class _State(ABC):
+    """
+    Immutable set of GL parameters, each converted once into a contiguous float32 array.
+
+    ``parameters`` holds ``(parameter, array, frozen value)`` triples; the frozen values keep ``Gl``'s shadow copy
+    in sync without converting anything again.
+    """
+
+    __slots__ = ('parameters', '_values')
+
+    def __init__(self, values):
+        values = {key: value for key, value in values.items() if value is not None}
+        parameters = tuple(
+            (parameter, np.ascontiguousarray(np.atleast_1d(value), np.float32), _freeze(value))
+            for parameter, value in values.items()
+        )
+        object.__setattr__(self, 'parameters', parameters)
+        object.__setattr__(self, '_values', values)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def replace(self, **changes):
+        """
+        Returns a copy with some parameters changed, like ``attr.evolve``.
+        """
+        kwargs = self._kwargs()
+        kwargs.update(changes)
+        return type(self)(**kwargs)
+
+    @abstractmethod
+    def _kwargs(self):
+        pass
+
+
+class Light(_State):
+    """
+    Light source parameters. Spot and attenuation parameters fall back to the OpenGL defaults, so a light can be
+    switched from a spot light to a point light by applying another ``Light``; colors that are not given are
+    left untouched.
+
+    The position and spot direction are transformed by the modelview matrix when they are applied, so they are
+    kept apart in ``transformed_parameters`` and sent on every ``apply``.
+    """
+
+    __slots__ = ('static_parameters', 'transformed_parameters')
+
+    def __init__(self, ambient=None, diffuse=None, specular=None, position=None,
+                 spot_direction=(0., 0., -1.), spot_exponent=0., spot_cutoff=180.,
+                 constant_attenuation=1., linear_attenuation=0., quadratic_attenuation=0.):
+        super().__init__({
+            Gl.LightParameter.AMBIENT: ambient,
+            Gl.LightParameter.DIFFUSE: diffuse,
+            Gl.LightParameter.SPECULAR: specular,
+            Gl.LightParameter.POSITION: position,
+            Gl.LightParameter.SPOT_DIRECTION: spot_direction,
+            Gl.LightParameter.SPOT_EXPONENT: spot_exponent,
+            Gl.LightParameter.SPOT_CUTOFF: spot_cutoff,
+            Gl.LightParameter.CONSTANT_ATTENUATION: constant_attenuation,
+            Gl.LightParameter.LINEAR_ATTENUATION: linear_attenuation,
+            Gl.LightParameter.QUADRATIC_ATTENUATION: quadratic_attenuation,
+        })
+        transformed = (Gl.LightParameter.POSITION, Gl.LightParameter.SPOT_DIRECTION)
+        object.__setattr__(self, 'static_parameters',
+                           tuple(parameter for parameter in self.parameters if parameter[0] not in transformed))
+        object.__setattr__(self, 'transformed_parameters',
+                           tuple(parameter for parameter in self.parameters if parameter[0] in transformed))
+
+    def _kwargs(self):
+        return {parameter.name.lower(): value for parameter, value in self._values.items()}
+
+    def apply(self, light: Gl.Capability):
+        Gl.light_state(light, self)
+
+
+class Material(_State):
+    __slots__ = ('face',)
+
+    def __init__(self, ambient=None, diffuse=None, ambient_and_diffuse=None, specular=None, emission=None,
+                 shininess=None, face: Gl.MaterialFace = Gl.MaterialFace.FRONT_AND_BACK):
+        super().__init__({
+            Gl.MaterialParameter.AMBIENT: ambient,
+            Gl.MaterialParameter.DIFFUSE: diffuse,
+            Gl.MaterialParameter.AMBIENT_AND_DIFFUSE: ambient_and_diffuse,
+            Gl.MaterialParameter.SPECULAR: specular,
+            Gl.MaterialParameter.EMISSION: emission,
+            Gl.MaterialParameter.SHININESS: shininess,
+        })
+        object.__setattr__(self, 'face', face)
+
+    def _kwargs(self):
+        kwargs = {parameter.name.lower(): value for parameter, value in self._values.items()}
+        kwargs['face'] = self.face
+        return kwargs
+
+    def apply(self):
+        Gl.material_state(self)
+
+
+class FogState(_State):
+    __slots__ = ('mode',)
+
+    def __init__(self, mode: Gl.FogMode = None, density=None, start=None, end=None, color=None):
+        super().__init__({
+            Gl.FogParam.FOG_DENSITY: density,
+            Gl.FogParam.FOG_START: start,
+            Gl.FogParam.FOG_END: end,
+            Gl.FogParam.FOG_COLOR: color,
+        })
+        object.__setattr__(self, 'mode', mode)
+
+    def _kwargs(self):
+        kwargs = {parameter.name[len('FOG_'):].lower(): value for parameter, value in self._values.items()}
+        kwargs['mode'] = self.mode
+        return kwargs
+
+    def apply(self):
+        Gl.fog_state(self)
@@ -0,0 +1,100 @@
+import numpy as np
+
+from graphics.gl import Gl
+
+
+class Mesh(object):
+    """
+    Vertex data uploaded once into buffer objects and drawn with a single call.
+    """
+
+    def __init__(self, mode: Gl.BeginMode, positions, normals=None, texture_coordinates=None, colors=None,
+                 indices=None, usage: Gl.BufferUsage = Gl.BufferUsage.STATIC_DRAW):
+        self.mode = mode
+        self.usage = usage
+        self.vertex_count = len(positions)
+        self._attributes = []
+        attributes = [
+            (Gl.ClientState.VERTEX_ARRAY, positions),
+            (Gl.ClientState.NORMAL_ARRAY, normals),
+            (Gl.ClientState.TEXTURE_COORD_ARRAY, texture_coordinates),
+            (Gl.ClientState.COLOR_ARRAY, colors),
+        ]
+        for state, data in attributes:
+            if data is None:
+                continue
+            data = np.ascontiguousarray(data, np.float32)
+            buffer = Gl.gen_buffers(1)
+            Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, buffer)
+            Gl.buffer_data(Gl.BufferTarget.ARRAY_BUFFER, data, usage)
+            self._attributes.append((state, buffer, data.shape[1]))
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, 0)
+
+        self.index_count = 0
+        self._index_buffer = None
+        if indices is not None:
+            indices = np.ascontiguousarray(indices, np.uint32).ravel()
+            self._index_buffer = Gl.gen_buffers(1)
+            Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, self._index_buffer)
+            Gl.buffer_data(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, indices, usage)
+            Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, 0)
+            self.index_count = len(indices)
+
+    @property
+    def nbytes(self):
+        attributes = sum(4 * size * self.vertex_count for _, _, size in self._attributes)
+        return attributes + 4 * self.index_count
+
+    def bind(self):
+        for state, buffer, size in self._attributes:
+            Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, buffer)
+            Gl.enable_client_state(state)
+            if state is Gl.ClientState.VERTEX_ARRAY:
+                Gl.vertex_pointer(size)
+            elif state is Gl.ClientState.NORMAL_ARRAY:
+                Gl.normal_pointer()
+            elif state is Gl.ClientState.TEXTURE_COORD_ARRAY:
+                Gl.tex_coord_pointer(size)
+            else:
+                Gl.color_pointer(size)
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, 0)
+        if self._index_buffer is not None:
+            Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, self._index_buffer)
+
+    def unbind(self):
+        if self._index_buffer is not None:
+            Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, 0)
+        for state, _, _ in self._attributes:
+            Gl.disable_client_state(state)
+
+    def draw(self):
+        self.bind()
+        if self._index_buffer is None:
+            Gl.draw_arrays(self.mode, 0, self.vertex_count)
+        else:
+            Gl.draw_elements(self.mode, self.index_count)
+        self.unbind()
+
+    def delete(self):
+        buffers = [buffer for _, buffer, _ in self._attributes]
+        if self._index_buffer is not None:
+            buffers.append(self._index_buffer)
+        Gl.delete_buffers(*buffers)
+        self._attributes = []
+        self._index_buffer = None
+
+
+def grid_quads(min_edge: float, max_edge: float, step: float, z: float):
+    """
+    Positions of a square ``QUADS`` grid in the ``z`` plane, in the same vertex order the per-vertex loops used.
+    """
+    ticks = np.arange(min_edge, max_edge, step)
+    x, y = np.meshgrid(ticks, ticks, indexing='ij')
+    x, y = x.ravel(), y.ravel()
+    quads = np.empty((len(x), 4, 3), np.float32)
+    quads[:, :, 2] = z
+    quads[:, 0, 0], quads[:, 0, 1] = x, y
+    quads[:, 1, 0], quads[:, 1, 1] = x, y + step
+    quads[:, 2, 0], quads[:, 2, 1] = x + step, y + step
+    quads[:, 3, 0], quads[:, 3, 1] = x + step, y
+    return quads.reshape(-1, 3)
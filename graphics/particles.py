@@ -0,0 +1,185 @@
+from enum import Enum
+
+import numpy as np
+from OpenGL.GL import glDrawElementsInstanced, glVertexAttribDivisor
+
+from graphics.gl import Gl
+from graphics.shader import Program
+from graphics.sphere import unit_sphere
+
+_INSTANCED_VERTEX_SHADER = '''
+#version 120
+
+attribute vec4 instance;  // xyz: center, w: diameter
+
+uniform vec2 lights_enabled;
+
+varying vec4 color;
+
+vec4 shade(int i, vec3 position, vec3 normal) {
+    vec3 direction = gl_LightSource[i].position.xyz;
+    float attenuation = 1.0;
+    if (gl_LightSource[i].position.w != 0.0) {
+        direction -= position;
+        float distance = length(direction);
+        attenuation = 1.0 / (gl_LightSource[i].constantAttenuation +
+                             gl_LightSource[i].linearAttenuation * distance +
+                             gl_LightSource[i].quadraticAttenuation * distance * distance);
+    }
+    direction = normalize(direction);
+    if (gl_LightSource[i].spotCutoff <= 90.0) {
+        float spot = dot(-direction, normalize(gl_LightSource[i].spotDirection));
+        attenuation *= spot < gl_LightSource[i].spotCosCutoff ? 0.0 : pow(spot, gl_LightSource[i].spotExponent);
+    }
+    float diffuse = max(dot(normal, direction), 0.0);
+    return attenuation * (gl_FrontLightProduct[i].ambient + diffuse * gl_FrontLightProduct[i].diffuse);
+}
+
+void main() {
+    vec4 eye = gl_ModelViewMatrix * vec4(gl_Vertex.xyz * (0.5 * instance.w) + instance.xyz, 1.0);
+    vec3 normal = normalize(gl_NormalMatrix * gl_Vertex.xyz);
+
+    color = gl_FrontLightModelProduct.sceneColor;
+    if (lights_enabled.x > 0.0) color += shade(0, eye.xyz, normal);
+    if (lights_enabled.y > 0.0) color += shade(1, eye.xyz, normal);
+    color.a = gl_FrontMaterial.diffuse.a;
+
+    gl_FogFragCoord = abs(eye.z);
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+'''
+
+_INSTANCED_FRAGMENT_SHADER = '''
+#version 120
+
+uniform float fog_enabled;
+
+varying vec4 color;
+
+void main() {
+    float fog = clamp(exp(-pow(gl_Fog.density * gl_FogFragCoord, 2.0)), 0.0, 1.0);
+    gl_FragColor = mix(color, mix(gl_Fog.color, color, fog), fog_enabled);
+}
+'''
+
+
+class ParticleRenderer(object):
+    """
+    Draws a whole particle system with a single draw call.
+
+    ``INSTANCED`` renders a lit sphere mesh per particle from one per-instance buffer of ``(x, y, z, diameter)``.
+    ``POINTS`` is the fixed-function fallback: the same buffer is drawn as round, distance-attenuated points,
+    which any OpenGL 1.5 implementation (Mesa's software rasterizers included) can handle. Points share a single
+    size, the mean of the given diameters.
+    """
+
+    class Mode(Enum):
+        INSTANCED = 'instanced'
+        POINTS = 'points'
+
+    def __init__(self, mode: Mode = None, sphere_detailing: int = 12, capacity: int = 1024):
+        self._instances = np.zeros((capacity, 4), np.float32)
+        self._instance_buffer = Gl.gen_buffers(1)
+        self._program = None
+        self._mesh_buffer = None
+        self._index_buffer = None
+        self._index_count = 0
+
+        if mode is None:
+            mode = self.Mode.INSTANCED if self.instancing_supported() else self.Mode.POINTS
+        if mode is self.Mode.INSTANCED:
+            self._init_instancing(sphere_detailing)
+        self.mode = mode
+
+    @classmethod
+    def instancing_supported(cls):
+        return bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor)
+
+    def _init_instancing(self, sphere_detailing):
+        self._program = Program(_INSTANCED_VERTEX_SHADER, _INSTANCED_FRAGMENT_SHADER)
+
+        vertices, _, indices = unit_sphere(sphere_detailing, sphere_detailing)
+        self._mesh_buffer, self._index_buffer = Gl.gen_buffers(2)
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, self._mesh_buffer)
+        Gl.buffer_data(Gl.BufferTarget.ARRAY_BUFFER, vertices, Gl.BufferUsage.STATIC_DRAW)
+        Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, self._index_buffer)
+        Gl.buffer_data(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, indices, Gl.BufferUsage.STATIC_DRAW)
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, 0)
+        Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, 0)
+        self._index_count = len(indices)
+
+    def _upload(self, positions, sizes):
+        count = len(positions)
+        if count > len(self._instances):
+            self._instances = np.zeros((max(count, 2 * len(self._instances)), 4), np.float32)
+        instances = self._instances[:count]
+        instances[:, :3] = positions
+        instances[:, 3] = sizes
+
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, self._instance_buffer)
+        Gl.buffer_data(Gl.BufferTarget.ARRAY_BUFFER, instances, Gl.BufferUsage.STREAM_DRAW)
+        return count
+
+    def draw(self, positions, sizes=1.0):
+        """
+        :param positions: ``(n, 3)`` array of particle centers
+        :param sizes: particle diameter, either a scalar or an ``(n,)`` array
+        """
+        if not len(positions):
+            return
+        count = self._upload(positions, sizes)
+        if self.mode is self.Mode.INSTANCED:
+            self._draw_instanced(count)
+        else:
+            self._draw_points(count)
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, 0)
+
+    def _draw_instanced(self, count):
+        program = self._program
+        program.use()
+        program.set_uniform('lights_enabled',
+                            float(Gl.is_enabled(Gl.Capability.LIGHT0)), float(Gl.is_enabled(Gl.Capability.LIGHT1)))
+        program.set_uniform('fog_enabled', float(Gl.is_enabled(Gl.Capability.FOG)))
+
+        location = program.attribute_location('instance')
+        Gl.vertex_attrib_pointer(location, 4)
+        Gl.vertex_attrib_divisor(location, 1)
+        Gl.enable_vertex_attrib_array(location)
+
+        Gl.bind_buffer(Gl.BufferTarget.ARRAY_BUFFER, self._mesh_buffer)
+        Gl.enable_client_state(Gl.ClientState.VERTEX_ARRAY)
+        Gl.vertex_pointer(3)
+        Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, self._index_buffer)
+
+        Gl.draw_elements_instanced(Gl.BeginMode.TRIANGLES, self._index_count, count)
+
+        Gl.bind_buffer(Gl.BufferTarget.ELEMENT_ARRAY_BUFFER, 0)
+        Gl.disable_client_state(Gl.ClientState.VERTEX_ARRAY)
+        Gl.disable_vertex_attrib_array(location)
+        Gl.vertex_attrib_divisor(location, 0)
+        Program.release()
+
+    def _draw_points(self, count):
+        # size in pixels of a unit-diameter point seen from a unit distance
+        projection = Gl.get_matrix(Gl.Matrix.PROJECTION_MATRIX)
+        viewport_height = Gl.get_viewport()[3]
+        pixels = float(np.mean(self._instances[:count, 3])) * projection[1][1] * viewport_height / 2
+
+        Gl.point_size(pixels)
+        Gl.point_parameter(Gl.PointParameter.POINT_DISTANCE_ATTENUATION, [0., 0., 1.])
+        Gl.enable(Gl.Capability.POINT_SMOOTH)
+
+        Gl.enable_client_state(Gl.ClientState.VERTEX_ARRAY)
+        Gl.vertex_pointer(3, stride=self._instances.strides[0])
+        Gl.draw_arrays(Gl.BeginMode.POINTS, 0, count)
+        Gl.disable_client_state(Gl.ClientState.VERTEX_ARRAY)
+
+        Gl.disable(Gl.Capability.POINT_SMOOTH)
+        Gl.point_parameter(Gl.PointParameter.POINT_DISTANCE_ATTENUATION, [1., 0., 0.])
+        Gl.point_size(1.)
+
+    def delete(self):
+        buffers = [buffer for buffer in (self._instance_buffer, self._mesh_buffer, self._index_buffer) if buffer]
+        Gl.delete_buffers(*buffers)
+        if self._program is not None:
+            self._program.delete()
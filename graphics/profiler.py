@@ -0,0 +1,339 @@
+import functools
+import json
+import time
+from collections import Counter, deque
+
+import attr
+import numpy as np
+
+from graphics.gl import Gl, GlColor
+from graphics.glu import Glu
+
+# bookkeeping wrappers that never reach the driver, and the profiler's own timer queries
+_UNCOUNTED = {
+    'reset_state', 'state_calls', 'verify_state', 'live_resources', 'timer_queries_supported', 'gen_queries',
+    'delete_queries', 'begin_query', 'end_query', 'query_result_available', 'query_result',
+}
+
+# vertices submitted by the wrappers that draw; compound wrappers such as draw_vertex_arrays end up in these
+_VERTEX_COUNTS = {
+    'vertex3': lambda *args: 1,
+    'draw_arrays': lambda mode, first, count: count,
+    'draw_elements': lambda mode, count, *args, **kwargs: count,
+    'draw_elements_instanced': lambda mode, count, instances, *args, **kwargs: count * instances,
+}
+
+_FRAME_BUDGET = 1 / 60
+
+
+@attr.s(slots=True)
+class FrameStats(object):
+    """
+    What happened between the end of the previous frame and the end of this one's display callback.
+
+    ``start`` and ``duration`` (seconds) cover the display callback; ``scopes`` holds ``(name, start, duration,
+    depth)`` for every timed scope and callback, idle and input included. ``gpu_time`` stays ``None`` until the
+    timer query comes back, or for good without timer query support.
+    """
+    index = attr.ib()
+    start = attr.ib(default=None)
+    duration = attr.ib(default=0.)
+    gpu_time = attr.ib(default=None)
+    calls = attr.ib(factory=Counter)
+    vertices = attr.ib(default=0)
+    state_calls = attr.ib(factory=dict)
+    scopes = attr.ib(factory=list)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def scope_times(self):
+        times = Counter()
+        for name, _, duration, _ in self.scopes:
+            times[name] += duration
+        return times
+
+
+class _Scope(object):
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        Profiler._depth += 1
+
+    def __exit__(self, *exc_info):
+        Profiler._depth -= 1
+        Profiler._frame.scopes.append((self.name, self.start, time.perf_counter() - self.start, Profiler._depth))
+
+
+class _NoScope(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_SCOPE = _NoScope()
+
+
+class Profiler(object):
+    """
+    Per-frame timings and GL call counts.
+
+    Enabling swaps the ``Gl`` and ``Glu`` wrappers for counting ones and disabling puts the originals back, so a
+    disabled profiler costs one flag check per GLUT callback and per ``scope``. Frames are delimited by the display
+    callback and the last ``history_size`` of them are kept for the HUD and for ``export_trace``.
+    """
+    enabled = False
+    history_size = 600
+
+    _frame = FrameStats(0)
+    _history = deque(maxlen=history_size)
+    _depth = 0
+    _originals = {}
+    _gpu = False
+    _free_queries = []
+    _pending_queries = deque()
+    _epoch = time.perf_counter()
+
+    @classmethod
+    def enable(cls, gpu: bool = True):
+        if cls.enabled:
+            return
+        for owner in (Gl, Glu):
+            cls._instrument(owner)
+        cls._gpu = gpu and Gl.timer_queries_supported()
+        cls._history = deque(maxlen=cls.history_size)
+        cls._frame = FrameStats(0)
+        cls._depth = 0
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        if not cls.enabled:
+            return
+        for (owner, name), method in cls._originals.items():
+            setattr(owner, name, method)
+        cls._originals.clear()
+        queries = cls._free_queries + [query for _, query in cls._pending_queries]
+        if queries:
+            Gl.delete_queries(*queries)
+        cls._free_queries = []
+        cls._pending_queries.clear()
+        cls.enabled = False
+
+    @classmethod
+    def toggle(cls):
+        if cls.enabled:
+            cls.disable()
+        else:
+            cls.enable()
+
+    @classmethod
+    def _instrument(cls, owner):
+        for name, method in list(vars(owner).items()):
+            if name.startswith('_') or name in _UNCOUNTED or not isinstance(method, classmethod):
+                continue
+            cls._originals[(owner, name)] = method
+            setattr(owner, name, staticmethod(cls._counted(name, getattr(owner, name), _VERTEX_COUNTS.get(name))))
+
+    @classmethod
+    def _counted(cls, name, method, vertices):
+        @functools.wraps(method)
+        def counted(*args, **kwargs):
+            frame = cls._frame
+            frame.calls[name] += 1
+            if vertices is not None:
+                frame.vertices += vertices(*args, **kwargs)
+            return method(*args, **kwargs)
+        return counted
+
+    @classmethod
+    def scope(cls, name):
+        """
+        ``with profiler.scope('explosion'):`` times the block as part of the current frame.
+        """
+        if not cls.enabled:
+            return _NO_SCOPE
+        return _Scope(name)
+
+    @classmethod
+    def callback(cls, name, callback):
+        """
+        Wraps a GLUT callback so it is timed while the profiler is enabled; ``display`` delimits frames.
+        """
+        if callback is None:
+            return None
+
+        @functools.wraps(callback)
+        def profiled(*args):
+            if not cls.enabled:
+                return callback(*args)
+            if name != 'display':
+                with _Scope(name):
+                    return callback(*args)
+            cls._begin_frame()
+            try:
+                with _Scope(name):
+                    return callback(*args)
+            finally:
+                if cls.enabled:
+                    cls._end_frame()
+        return profiled
+
+    @classmethod
+    def _begin_frame(cls):
+        frame = cls._frame
+        frame.start = time.perf_counter()
+        frame.state_calls = Gl.state_calls()
+        if cls._gpu:
+            query = cls._free_queries.pop() if cls._free_queries else Gl.gen_queries(1)[0]
+            Gl.begin_query(Gl.QueryTarget.TIME_ELAPSED, query)
+            cls._pending_queries.append((frame, query))
+
+    @classmethod
+    def _end_frame(cls):
+        frame = cls._frame
+        frame.duration = time.perf_counter() - frame.start
+        state_calls = Gl.state_calls()
+        frame.state_calls = {key: value - frame.state_calls.get(key, 0) for key, value in state_calls.items()}
+        if cls._gpu:
+            Gl.end_query(Gl.QueryTarget.TIME_ELAPSED)
+            cls._collect_queries()
+        cls._history.append(frame)
+        cls._frame = FrameStats(frame.index + 1)
+
+    @classmethod
+    def _collect_queries(cls):
+        # results arrive a few frames late; waiting for them would stall the pipeline
+        while cls._pending_queries and Gl.query_result_available(cls._pending_queries[0][1]):
+            frame, query = cls._pending_queries.popleft()
+            # the first query after a context starts up reads back garbage on some drivers (llvmpipe)
+            if frame.index:
+                frame.gpu_time = Gl.query_result(query) / 1e9
+            cls._free_queries.append(query)
+
+    @classmethod
+    def frames(cls):
+        return list(cls._history)
+
+    @classmethod
+    def summary(cls, frames: int = None):
+        """
+        Means over the last ``frames`` frames (all kept frames by default), times in milliseconds.
+        """
+        history = list(cls._history)[-frames:] if frames else list(cls._history)
+        if not history:
+            return {}
+        gpu_times = [frame.gpu_time for frame in history if frame.gpu_time is not None]
+        scopes = Counter()
+        for frame in history:
+            scopes.update(frame.scope_times())
+        return {
+            'frames': len(history),
+            'cpu_ms': 1e3 * sum(frame.duration for frame in history) / len(history),
+            'max_cpu_ms': 1e3 * max(frame.duration for frame in history),
+            'gpu_ms': 1e3 * sum(gpu_times) / len(gpu_times) if gpu_times else None,
+            'gl_calls': sum(frame.total_calls for frame in history) / len(history),
+            'vertices': sum(frame.vertices for frame in history) / len(history),
+            'scopes_ms': {name: 1e3 * total / len(history) for name, total in scopes.most_common()},
+        }
+
+    @classmethod
+    def draw_hud(cls, text_renderer=None, frames: int = 120, pixels_per_ms: float = 4.):
+        """
+        Draws a bar per recent frame (green within 60 FPS, yellow within 30 FPS, red beyond) in the bottom-left
+        corner, and a text summary through ``text_renderer.bitmap_string`` when one is given.
+        """
+        if not cls.enabled or not cls._history:
+            return
+        measured, cls._frame = cls._frame, FrameStats(-1)
+        try:
+            cls._draw_hud(text_renderer, list(cls._history)[-frames:], pixels_per_ms)
+        finally:
+            cls._frame = measured
+
+    @classmethod
+    def _draw_hud(cls, text_renderer, history, pixels_per_ms):
+        x, y, width, height = Gl.get_viewport()
+        durations = np.array([frame.duration for frame in history])
+        count = len(durations)
+
+        bars = np.zeros((count, 2, 3), np.float32)
+        bars[:, :, 0] = 10 + 2 * np.arange(count)[:, None]
+        bars[:, 0, 1] = 10
+        bars[:, 1, 1] = 10 + 1e3 * durations * pixels_per_ms
+        colors = np.empty((count, 2, 3), np.float32)
+        colors[:] = np.where((durations <= _FRAME_BUDGET)[:, None],
+                             [0.2, 0.8, 0.2], np.where((durations <= 2 * _FRAME_BUDGET)[:, None],
+                                                       [0.9, 0.8, 0.1], [0.9, 0.2, 0.2]))[:, None]
+        budget = np.array([[10, 10 + 1e3 * _FRAME_BUDGET * pixels_per_ms, 0],
+                           [10 + 2 * count, 10 + 1e3 * _FRAME_BUDGET * pixels_per_ms, 0]], np.float32)
+
+        capabilities = [Gl.Capability.LIGHTING, Gl.Capability.DEPTH_TEST, Gl.Capability.FOG,
+                        Gl.Capability.TEXTURE_2D, Gl.Capability.CULL_FACE]
+        enabled = [capability for capability in capabilities if Gl.is_enabled(capability)]
+        for capability in enabled:
+            Gl.disable(capability)
+        Gl.matrix_mode(Gl.MatrixMode.PROJECTION)
+        Gl.push_matrix()
+        Gl.load_identity()
+        Gl.ortho(0, width, 0, height, -1, 1)
+        Gl.matrix_mode(Gl.MatrixMode.MODELVIEW)
+        Gl.push_matrix()
+        Gl.load_identity()
+
+        Gl.draw_vertex_arrays(Gl.BeginMode.LINES, bars.reshape(-1, 3), colors=colors.reshape(-1, 3))
+        Gl.draw_vertex_arrays(Gl.BeginMode.LINES, budget, colors=np.ones((2, 3), np.float32))
+
+        if text_renderer is not None:
+            Gl.color3(GlColor(255, 255, 255))
+            summary = cls.summary(len(history))
+            gpu = '{:.2f}'.format(summary['gpu_ms']) if summary['gpu_ms'] is not None else '-'
+            lines = ['cpu {:.2f} ms  gpu {} ms  {:.0f} calls  {:.0f} vertices'.format(
+                summary['cpu_ms'], gpu, summary['gl_calls'], summary['vertices'])]
+            lines += ['{} {:.2f} ms'.format(name, ms) for name, ms in list(summary['scopes_ms'].items())[:6]]
+            for line_number, line in enumerate(lines):
+                text_renderer.bitmap_string(10, height - 20 - 15 * line_number, line)
+
+        Gl.pop_matrix()
+        Gl.matrix_mode(Gl.MatrixMode.PROJECTION)
+        Gl.pop_matrix()
+        Gl.matrix_mode(Gl.MatrixMode.MODELVIEW)
+        for capability in enabled:
+            Gl.enable(capability)
+
+    @classmethod
+    def export_trace(cls, file_name):
+        """
+        Writes the kept frames in the Chrome trace event format (chrome://tracing, Perfetto).
+        """
+        def microseconds(seconds):
+            return (seconds - cls._epoch) * 1e6
+
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 1, 'args': {'name': 'cpu'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 2, 'args': {'name': 'gpu'}},
+        ]
+        for frame in cls._history:
+            events.append({'name': 'frame {}'.format(frame.index), 'cat': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1,
+                           'ts': microseconds(frame.start), 'dur': frame.duration * 1e6,
+                           'args': {'gl_calls': dict(frame.calls), 'vertices': frame.vertices,
+                                    'state_calls': frame.state_calls}})
+            for name, start, duration, depth in frame.scopes:
+                events.append({'name': name, 'cat': 'scope', 'ph': 'X', 'pid': 1, 'tid': 1,
+                               'ts': microseconds(start), 'dur': duration * 1e6})
+            if frame.gpu_time is not None:
+                events.append({'name': 'frame {}'.format(frame.index), 'cat': 'gpu', 'ph': 'X', 'pid': 1, 'tid': 2,
+                               'ts': microseconds(frame.start), 'dur': frame.gpu_time * 1e6})
+            events.append({'name': 'gl', 'ph': 'C', 'pid': 1, 'ts': microseconds(frame.start),
+                           'args': {'calls': frame.total_calls, 'vertices': frame.vertices}})
+        with open(file_name, 'w') as trace:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+
+import attr
+
+from graphics.gl import Gl
+
+
+@attr.s(slots=True)
+class _Resource(object):
+    parameters = attr.ib()
+    handle = attr.ib()
+    delete = attr.ib()
+    nbytes = attr.ib(type=int)
+
+
+class ResourceManager(object):
+    """
+    Keeps GL objects (display lists, meshes, textures) under a name together with the parameters they were
+    generated from.
+
+    Asking for a name with the parameters it was built with returns the cached object; asking with different
+    parameters deletes the stale object and builds a new one. When ``budget`` (in bytes) is set, the least
+    recently used objects are deleted until the estimated total fits into it.
+    """
+
+    def __init__(self, budget: int = None):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._resources = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self._resources
+
+    def __len__(self):
+        return len(self._resources)
+
+    def display_list(self, name, parameters, build, nbytes: int = 0):
+        """
+        Returns a display list compiled from whatever ``build()`` draws.
+
+        ``build()`` may return the number of bytes it submitted, which then replaces the ``nbytes`` estimate.
+        """
+        estimate = [nbytes]
+
+        def compile_list():
+            list_ = Gl.gen_lists(1)
+            try:
+                Gl.new_list(list_, Gl.ListMode.COMPILE)
+                try:
+                    estimate[0] = build() or nbytes
+                finally:
+                    Gl.end_list()
+            except BaseException:
+                Gl.delete_lists(list_)
+                raise
+            return list_
+
+        return self._get(name, parameters, compile_list, Gl.delete_lists, lambda _: estimate[0])
+
+    def mesh(self, name, parameters, build):
+        """
+        Returns the ``Mesh`` produced by ``build()``.
+        """
+        return self._get(name, parameters, build, lambda mesh: mesh.delete(), lambda mesh: mesh.nbytes)
+
+    def texture(self, name, parameters, build, nbytes: int = 0):
+        """
+        Returns the texture name produced by ``build()``.
+        """
+        return self._get(name, parameters, build, Gl.delete_textures, lambda _: nbytes)
+
+    def _get(self, name, parameters, build, delete, measure):
+        resource = self._resources.get(name)
+        if resource is not None:
+            if resource.parameters == parameters:
+                self.hits += 1
+                self._resources.move_to_end(name)
+                return resource.handle
+            self.invalidate(name)
+
+        self.misses += 1
+        handle = build()
+        resource = _Resource(parameters, handle, delete, measure(handle))
+        self._resources[name] = resource
+        self.nbytes += resource.nbytes
+        self._evict(keep=name)
+        return handle
+
+    def _evict(self, keep):
+        if self.budget is None:
+            return
+        for name in list(self._resources):
+            if self.nbytes <= self.budget:
+                break
+            if name != keep:
+                self.invalidate(name)
+                self.evictions += 1
+
+    def invalidate(self, name):
+        resource = self._resources.pop(name, None)
+        if resource is not None:
+            self.nbytes -= resource.nbytes
+            resource.delete(resource.handle)
+
+    def clear(self):
+        for name in list(self._resources):
+            self.invalidate(name)
+
+    def stats(self):
+        return dict(
+            resources=len(self._resources),
+            nbytes=self.nbytes,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            **Gl.live_resources()
+        )
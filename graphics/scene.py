@@ -0,0 +1,184 @@
+import numpy as np
+
+from graphics.gl import Gl
+
+
+def translation(x: float, y: float, z: float):
+    matrix = np.identity(4)
+    matrix[:3, 3] = x, y, z
+    return matrix
+
+
+def rotation(angle: float, x: float, y: float, z: float):
+    """
+    Rotation by ``angle`` degrees around the axis ``(x, y, z)``, like ``glRotatef``.
+    """
+    axis = np.array([x, y, z], np.float64)
+    axis /= np.linalg.norm(axis)
+    x, y, z = axis
+    angle = np.radians(angle)
+    c, s = np.cos(angle), np.sin(angle)
+    matrix = np.identity(4)
+    matrix[:3, :3] = (1 - c) * np.outer(axis, axis) + [[c, -z * s, y * s], [z * s, c, -x * s], [-y * s, x * s, c]]
+    return matrix
+
+
+def scaling(x: float, y: float, z: float):
+    return np.diag([x, y, z, 1.])
+
+
+def look_at(eye, center, up):
+    """
+    The view matrix ``gluLookAt`` multiplies with.
+    """
+    eye = np.asarray(eye, np.float64)
+    forward = np.asarray(center, np.float64) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    matrix = np.identity(4)
+    matrix[0, :3] = side
+    matrix[1, :3] = np.cross(side, forward)
+    matrix[2, :3] = -forward
+    return matrix @ translation(*-eye)
+
+
+def perspective(field_of_view_y: float, aspect: float, near: float, far: float):
+    """
+    The projection matrix ``gluPerspective`` multiplies with.
+    """
+    f = 1 / np.tan(np.radians(field_of_view_y) / 2)
+    matrix = np.zeros((4, 4))
+    matrix[0, 0] = f / aspect
+    matrix[1, 1] = f
+    matrix[2, 2] = (far + near) / (near - far)
+    matrix[2, 3] = 2 * far * near / (near - far)
+    matrix[3, 2] = -1
+    return matrix
+
+
+class SceneNode(object):
+    """
+    A transform in a ``SceneGraph``; ``draw()``, when given, is called with the node's world matrix loaded.
+    ``bounds``, a ``BoundingSphere`` or ``BoundingBox`` in the node's own space, lets ``SceneGraph.draw`` cull it.
+    """
+
+    __slots__ = ('graph', 'index', 'parent', 'draw', 'bounds')
+
+    def __init__(self, graph, index: int, parent, draw, bounds):
+        self.graph = graph
+        self.index = index
+        self.parent = parent
+        self.draw = draw
+        self.bounds = bounds
+
+    @property
+    def local(self):
+        return self.graph._local[self.index]
+
+    @local.setter
+    def local(self, matrix):
+        self.graph._local[self.index] = matrix
+        self.graph._dirty[self.index] = True
+
+    def set_transform(self, *matrices):
+        """
+        Sets the local transform to the product of ``matrices``, applied to vertices from last to first like a
+        chain of ``glTranslatef``/``glRotatef``/``glScalef`` calls.
+        """
+        local = np.identity(4)
+        for matrix in matrices:
+            local = local @ matrix
+        self.local = local
+
+    @property
+    def world(self):
+        self.graph.update()
+        return self.graph._world[self.index]
+
+
+class SceneGraph(object):
+    """
+    A tree of ``SceneNode`` transforms whose world matrices live in one ``(n, 4, 4)`` array.
+
+    Setting a local transform only flags the node; ``update()`` then recomputes the world matrices of the flagged
+    nodes and their descendants, one batched ``matmul`` per tree level. ``draw()`` loads each world matrix with
+    ``glLoadMatrixf`` instead of replaying a chain of matrix calls, and ``world_matrices`` are there for CPU-side
+    work such as culling or picking.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.nodes = []
+        self._parents = np.zeros(capacity, np.intp)
+        self._depths = np.zeros(capacity, np.intp)
+        self._local = np.zeros((capacity, 4, 4))
+        self._world = np.zeros((capacity, 4, 4))
+        self._dirty = np.zeros(capacity, bool)
+        self._levels = []
+        self.updates = 0
+
+    def add(self, *matrices, parent: SceneNode = None, draw=None, bounds=None):
+        """
+        Adds a node under ``parent`` with the local transform ``matrices`` (see ``SceneNode.set_transform``).
+        """
+        index = len(self.nodes)
+        if index == len(self._parents):
+            self._grow()
+        node = SceneNode(self, index, parent, draw, bounds)
+        self.nodes.append(node)
+        self._parents[index] = -1 if parent is None else parent.index
+        self._depths[index] = 0 if parent is None else self._depths[parent.index] + 1
+        node.set_transform(*matrices)
+        self._levels = [np.flatnonzero(self._depths[:len(self.nodes)] == depth)
+                        for depth in range(self._depths[:len(self.nodes)].max() + 1)]
+        return node
+
+    def _grow(self):
+        capacity = 2 * len(self._parents)
+        for name in ('_parents', '_depths', '_local', '_world', '_dirty'):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    @property
+    def world_matrices(self):
+        self.update()
+        return self._world[:len(self.nodes)]
+
+    def update(self):
+        count = len(self.nodes)
+        dirty = self._dirty[:count]
+        if not dirty.any():
+            return
+        self.updates += 1
+        for depth, level in enumerate(self._levels):
+            if depth:
+                # a node moves along with its parent
+                dirty[level] |= dirty[self._parents[level]]
+            level = level[dirty[level]]
+            if not len(level):
+                continue
+            if depth:
+                self._world[level] = self._world[self._parents[level]] @ self._local[level]
+            else:
+                self._world[level] = self._local[level]
+        dirty[:] = False
+
+    def draw(self, view=None, culler=None):
+        """
+        Draws every node that has ``draw`` under the ``view`` matrix, by default the current modelview matrix,
+        which is restored afterwards. A ``FrustumCuller`` with a frustum in world space skips the nodes whose
+        bounds are outside it.
+        """
+        if view is None:
+            view = np.transpose(Gl.get_matrix(Gl.Matrix.MODELVIEW_MATRIX))
+        world = self.world_matrices
+        for node in self.nodes:
+            if node.draw is None:
+                continue
+            if culler is not None and not culler.visible(node.bounds, world[node.index]):
+                continue
+            Gl.load_matrix(view @ world[node.index])
+            node.draw()
+        Gl.load_matrix(view)
@@ -0,0 +1,73 @@
+class Scheduler(object):
+    """
+    Fixed-timestep loop on top of the GLUT idle callback.
+
+    ``step()`` runs once per ``time_step`` seconds of ``glut.clock()`` whatever the frame rate, at most ``max_steps``
+    times per tick; a backlog beyond that is dropped rather than caught up with. Frames are requested at most
+    ``max_fps`` times a second (every tick when ``None``) and ``alpha``, in ``[0, 1)``, tells how far the clock is
+    into the next step so drawing can interpolate between steps.
+
+    Between frames the idle callback sleeps until the next step or frame is due. While paused it is unregistered,
+    so GLUT blocks waiting for input.
+    """
+
+    def __init__(self, glut, step, time_step: float = 1 / 60, max_fps: float = 60, max_steps: int = 5):
+        self.glut = glut
+        self.step = step
+        self.time_step = time_step
+        self.frame_interval = 1 / max_fps if max_fps else 0.
+        self.max_steps = max_steps
+        self.alpha = 0.
+        self.paused = True
+        self._previous = None
+        self._accumulator = 0.
+        self._next_frame = 0.
+
+    def start(self, paused: bool = False):
+        if paused:
+            self.pause()
+        else:
+            self.resume()
+
+    def pause(self):
+        self.paused = True
+        self.glut.idle_func(None)
+
+    def resume(self):
+        self.paused = False
+        # time spent paused is not simulated
+        self._previous = None
+        self.glut.idle_func(self.tick)
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def tick(self):
+        now = self.glut.clock()
+        if self._previous is None:
+            self._previous = now
+            self._next_frame = now
+        self._accumulator += now - self._previous
+        self._previous = now
+
+        steps = 0
+        while self._accumulator >= self.time_step:
+            if steps == self.max_steps:
+                self._accumulator %= self.time_step
+                break
+            self.step()
+            self._accumulator -= self.time_step
+            steps += 1
+        self.alpha = self._accumulator / self.time_step
+
+        if now >= self._next_frame:
+            self._next_frame += self.frame_interval
+            if self._next_frame < now:
+                self._next_frame = now + self.frame_interval
+            self.glut.post_redisplay()
+            return
+        next_step = now + self.time_step - self._accumulator
+        self.glut.sleep(min(self._next_frame, next_step) - now)
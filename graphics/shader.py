@@ -0,0 +1,44 @@
+from OpenGL.GL import (glUseProgram, glGetUniformLocation, glGetAttribLocation, glDeleteProgram, glUniform1f,
+                       glUniform2f, glUniform3f, glUniform4f, GL_VERTEX_SHADER, GL_FRAGMENT_SHADER)
+from OpenGL.GL.shaders import compileShader, compileProgram
+
+
+class Program(object):
+    _uniform_setters = {
+        1: glUniform1f,
+        2: glUniform2f,
+        3: glUniform3f,
+        4: glUniform4f,
+    }
+
+    def __init__(self, vertex_source: str, fragment_source: str):
+        self.handle = compileProgram(
+            compileShader(vertex_source, GL_VERTEX_SHADER),
+            compileShader(fragment_source, GL_FRAGMENT_SHADER),
+        )
+        self._uniforms = {}
+        self._attributes = {}
+
+    def use(self):
+        glUseProgram(self.handle)
+
+    @classmethod
+    def release(cls):
+        glUseProgram(0)
+
+    def uniform_location(self, name: str):
+        if name not in self._uniforms:
+            self._uniforms[name] = glGetUniformLocation(self.handle, name)
+        return self._uniforms[name]
+
+    def attribute_location(self, name: str):
+        if name not in self._attributes:
+            self._attributes[name] = glGetAttribLocation(self.handle, name)
+        return self._attributes[name]
+
+    def set_uniform(self, name: str, *values: float):
+        self._uniform_setters[len(values)](self.uniform_location(name), *values)
+
+    def delete(self):
+        glDeleteProgram(self.handle)
+        self.handle = None
@@ -0,0 +1,159 @@
+import attr
+import numpy as np
+
+from graphics.gl import Gl
+from graphics.glut import Glut
+from graphics.mesh import Mesh
+from graphics.resources import ResourceManager
+
+
+def unit_sphere(slices: int, stacks: int):
+    """
+    Tessellates a unit sphere around the z axis the way ``glutSolidSphere`` does.
+
+    Returns ``(vertices, texture_coordinates, indices)``; vertices double as normals.
+    """
+    theta = np.linspace(0., np.pi, stacks + 1, dtype=np.float32)[:, None]
+    phi = np.linspace(0., 2 * np.pi, slices + 1, dtype=np.float32)[None, :]
+
+    vertices = np.empty((stacks + 1, slices + 1, 3), np.float32)
+    vertices[..., 0] = np.sin(theta) * np.cos(phi)
+    vertices[..., 1] = np.sin(theta) * np.sin(phi)
+    vertices[..., 2] = np.cos(theta)
+
+    texture_coordinates = np.empty((stacks + 1, slices + 1, 2), np.float32)
+    texture_coordinates[..., 0] = phi / (2 * np.pi)
+    texture_coordinates[..., 1] = 1. - theta / np.pi
+
+    row = np.arange(stacks, dtype=np.uint32)[:, None] * (slices + 1)
+    top = (row + np.arange(slices, dtype=np.uint32)[None, :]).ravel()
+    bottom = top + slices + 1
+    indices = np.stack([top, bottom, top + 1, top + 1, bottom, bottom + 1], axis=1).ravel()
+
+    return vertices.reshape(-1, 3), texture_coordinates.reshape(-1, 2), indices
+
+
+def sphere_triangles(slices: int, stacks: int):
+    """
+    Triangles rasterized by ``glutSolidSphere``: two fans for the caps and quad strips in between.
+    """
+    return 2 * slices * (stacks - 1)
+
+
+@attr.s(slots=True)
+class SphereLodStats(object):
+    spheres = attr.ib(type=int, default=0)
+    triangles = attr.ib(type=int, default=0)
+    baseline_triangles = attr.ib(type=int, default=0)
+
+    @property
+    def saved_triangles(self):
+        return self.baseline_triangles - self.triangles
+
+
+class SphereMeshCache(object):
+    """
+    Unit spheres tessellated once per ``(slices, stacks, textured)`` and kept in buffer objects.
+
+    Any radius is drawn by scaling the cached unit mesh, so shrinking or growing a sphere never re-tessellates it.
+    ``solid_sphere`` mirrors ``Glut.solid_sphere`` and can stand in for it. Meshes live in ``resources``, which
+    may be shared with other geometry so that they count against the same memory budget.
+    """
+
+    def __init__(self, resources: ResourceManager = None):
+        self.resources = resources if resources is not None else ResourceManager()
+
+    def mesh(self, slices: int, stacks: int, textured: bool = False):
+        key = (slices, stacks, textured)
+
+        def build():
+            vertices, texture_coordinates, indices = unit_sphere(slices, stacks)
+            return Mesh(Gl.BeginMode.TRIANGLES, vertices, normals=vertices,
+                        texture_coordinates=texture_coordinates if textured else None, indices=indices)
+
+        return self.resources.mesh(('sphere',) + key, key, build)
+
+    def solid_sphere(self, radius: float, slices: int, stacks: int, textured: bool = False):
+        mesh = self.mesh(slices, stacks, textured)
+        Gl.push_matrix()
+        Gl.scale(radius, radius, radius)
+        Gl.enable(Gl.Capability.RESCALE_NORMAL)
+        mesh.draw()
+        Gl.disable(Gl.Capability.RESCALE_NORMAL)
+        Gl.pop_matrix()
+
+
+class SphereLod(object):
+    """
+    Picks ``glutSolidSphere`` slices and stacks from the radius a sphere covers on screen.
+
+    A level is refined as soon as the sphere needs more segments than it provides, but it is only coarsened once
+    the requirement drops ``hysteresis`` below the next coarser level, so spheres sitting on a level boundary
+    do not flicker between two tessellations.
+
+    Spheres are drawn by ``renderer.solid_sphere(radius, slices, stacks)``: ``Glut`` by default, or a
+    ``SphereMeshCache`` to reuse tessellations across frames.
+    """
+
+    def __init__(self, levels=(6, 8, 12, 16, 24, 32, 48, 64, 96, 128), max_detailing: int = None,
+                 pixels_per_segment: float = 6.0, hysteresis: float = 0.25, renderer=Glut):
+        self.renderer = renderer
+        if max_detailing is not None:
+            levels = [level for level in levels if level < max_detailing] + [max_detailing]
+        self.levels = sorted(levels)
+        self.max_detailing = self.levels[-1]
+        self.pixels_per_segment = pixels_per_segment
+        self.hysteresis = hysteresis
+        self.stats = SphereLodStats()
+        self.last_frame = SphereLodStats()
+        self._current = {}
+
+    def begin_frame(self):
+        self.last_frame, self.stats = self.stats, SphereLodStats()
+
+    @classmethod
+    def projected_radius(cls, radius: float, center=(0., 0., 0.)):
+        """
+        Radius in pixels of a sphere drawn at ``center`` under the current modelview and projection matrices.
+        """
+        modelview = np.asarray(Gl.get_matrix(Gl.Matrix.MODELVIEW_MATRIX), np.float64).T
+        projection = np.asarray(Gl.get_matrix(Gl.Matrix.PROJECTION_MATRIX), np.float64).T
+        viewport_height = Gl.get_viewport()[3]
+
+        eye = modelview @ np.array([*center, 1.])
+        scale = np.linalg.norm(modelview[:3, :3], axis=0).max()
+        w = (projection @ eye)[3]
+        if w <= 0:
+            return 0.
+        return radius * scale * projection[1, 1] * viewport_height / (2 * w)
+
+    def detailing(self, pixels: float, key=None):
+        required = 2 * np.pi * pixels / self.pixels_per_segment
+        ideal = int(np.searchsorted(self.levels, required))
+        ideal = min(ideal, len(self.levels) - 1)
+
+        current = self._current.get(key)
+        if current is not None and ideal < current:
+            coarser = self.levels[current - 1]
+            if required > coarser * (1 - self.hysteresis):
+                ideal = current
+        self._current[key] = ideal
+        return self.levels[ideal]
+
+    def solid_sphere(self, radius: float, center=(0., 0., 0.), key=None):
+        """
+        Draws a sphere of ``radius`` around ``center`` at the detailing its size on screen calls for.
+        """
+        detailing = self.detailing(self.projected_radius(radius, center), key)
+        translated = any(center)
+        if translated:
+            Gl.push_matrix()
+            Gl.translate(*center)
+        self.renderer.solid_sphere(radius, detailing, detailing)
+        if translated:
+            Gl.pop_matrix()
+
+        self.stats.spheres += 1
+        self.stats.triangles += sphere_triangles(detailing, detailing)
+        self.stats.baseline_triangles += sphere_triangles(self.max_detailing, self.max_detailing)
+        return detailing
@@ -0,0 +1,188 @@
+import time
+import warnings
+from concurrent import futures
+
+import numpy as np
+from PIL import Image
+
+from graphics.gl import Gl
+
+_PIXEL_FORMATS = {
+    'RGB': Gl.PixelFormat.RGB,
+    'RGBA': Gl.PixelFormat.RGBA,
+    'L': Gl.PixelFormat.LUMINANCE,
+}
+
+
+def image_pixels(image: Image.Image, flip: bool = False):
+    """
+    Returns ``(pixels, pixel_format)`` where ``pixels`` is a contiguous ``uint8`` array copied straight out of
+    PIL's decoded buffer. Modes other than RGB, RGBA and L are converted to RGBA when they carry transparency
+    and to RGB otherwise. ``flip`` reverses the rows so that the first row is the bottom of the image, as OpenGL
+    expects.
+    """
+    if image.mode not in _PIXEL_FORMATS:
+        transparent = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+    pixels = np.asarray(image, np.uint8)
+    if flip:
+        pixels = np.ascontiguousarray(pixels[::-1])
+    return pixels, _PIXEL_FORMATS[image.mode]
+
+
+def upload_texture(texture, pixels, pixel_format: Gl.PixelFormat,
+                   wrap: Gl.TextureWrap = Gl.TextureWrap.REPEAT, filter_: Gl.TextureFilter = Gl.TextureFilter.LINEAR):
+    height, width = pixels.shape[:2]
+    Gl.bind_texture(texture)
+    Gl.tex_parameter(Gl.TextureParameter.TEXTURE_WRAP_S, wrap)
+    Gl.tex_parameter(Gl.TextureParameter.TEXTURE_WRAP_T, wrap)
+    Gl.tex_parameter(Gl.TextureParameter.TEXTURE_MIN_FILTER, filter_)
+    Gl.tex_parameter(Gl.TextureParameter.TEXTURE_MAG_FILTER, filter_)
+
+    row_bytes = pixels.strides[0]
+    alignment = 4 if row_bytes % 4 == 0 else 1
+    Gl.unpack_alignment(alignment)
+    Gl.tex_image_2d(pixel_format, width, height, pixels)
+    if alignment != 4:
+        Gl.unpack_alignment(4)
+    return texture
+
+
+def load_texture(file_name: str, flip: bool = False,
+                 wrap: Gl.TextureWrap = Gl.TextureWrap.REPEAT, filter_: Gl.TextureFilter = Gl.TextureFilter.LINEAR):
+    with Image.open(file_name) as image:
+        pixels, pixel_format = image_pixels(image, flip)
+    return upload_texture(Gl.gen_textures(1), pixels, pixel_format, wrap, filter_)
+
+
+def decode_image(file_name: str, flip: bool = False, max_size=None):
+    """
+    Decodes an image into ``(pixels, pixel_format)``. With ``max_size`` JPEG images are decoded at the smallest
+    reduced scale (1/2, 1/4 or 1/8) that still covers ``max_size``, skipping most of the full-size decode.
+    """
+    with Image.open(file_name) as image:
+        if max_size is not None:
+            image.draft(image.mode, tuple(max_size))
+        return image_pixels(image, flip)
+
+
+class AsyncTexture(object):
+    def __init__(self, file_name, future, wrap, filter_):
+        self.file_name = file_name
+        self.texture = None
+        self.error = None
+        self.wrap = wrap
+        self.filter = filter_
+        self._future = future
+
+    @property
+    def ready(self):
+        return self.texture is not None
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+
+class TextureLoader(object):
+    """
+    Decodes images on a thread pool (PIL releases the GIL while decoding) and uploads them from the GL thread.
+
+    ``upload`` must be called from the GL thread once per frame; it uploads decoded images until
+    ``upload_budget`` seconds have been spent, so a burst of finished decodes is spread over several frames.
+    Until its texture is ``ready`` an ``AsyncTexture`` should be drawn with a placeholder; an image that cannot be
+    decoded is reported with a warning and keeps its placeholder, with the exception in ``error``.
+    """
+
+    def __init__(self, workers: int = None, upload_budget: float = 0.004):
+        self.upload_budget = upload_budget
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers)
+        self._pending = []  # type: list[AsyncTexture]
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def request(self, file_name: str, flip: bool = False, max_size=None,
+                wrap: Gl.TextureWrap = Gl.TextureWrap.REPEAT, filter_: Gl.TextureFilter = Gl.TextureFilter.LINEAR):
+        future = self._executor.submit(decode_image, file_name, flip, max_size)
+        texture = AsyncTexture(file_name, future, wrap, filter_)
+        self._pending.append(texture)
+        return texture
+
+    def upload(self):
+        """
+        Returns the number of textures uploaded.
+        """
+        if not self._pending:
+            return 0
+        start = time.perf_counter()
+        uploaded = []
+        for texture in self._pending:
+            if not texture._future.done():
+                continue
+            try:
+                pixels, pixel_format = texture._future.result()
+            except Exception as error:
+                texture.error = error
+                texture._future = None
+                warnings.warn('could not decode {}: {}'.format(texture.file_name, error))
+                continue
+            texture.texture = upload_texture(Gl.gen_textures(1), pixels, pixel_format, texture.wrap, texture.filter)
+            texture._future = None
+            uploaded.append(texture)
+            if time.perf_counter() - start >= self.upload_budget:
+                break
+        self._pending = [texture for texture in self._pending if texture._future is not None]
+        return len(uploaded)
+
+    def wait_decoded(self, timeout: float = None):
+        """
+        Blocks until a pending image is decoded or ``timeout`` seconds have passed; returns whether one is ready
+        for ``upload``.
+        """
+        done, _ = futures.wait([texture._future for texture in self._pending], timeout, futures.FIRST_COMPLETED)
+        return bool(done)
+
+    def wait(self):
+        """
+        Blocks until every requested texture is uploaded or has failed.
+        """
+        while self._pending:
+            self.wait_decoded()
+            self.upload()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def _legacy_pixels(image):
+    return np.array(list(image.getdata()), np.uint8)
+
+
+def main(argv):
+    """
+    Measures decoding time and peak RSS for the given images, e.g. ``python -m graphics.texture images/*``.
+    Pass ``--legacy`` to measure the former per-pixel ``getdata`` conversion instead.
+    """
+    import resource
+    import time
+
+    legacy = '--legacy' in argv
+    file_names = [arg for arg in argv if arg != '--legacy']
+    start = time.perf_counter()
+    for file_name in file_names:
+        with Image.open(file_name) as image:
+            if legacy:
+                _legacy_pixels(image)
+            else:
+                image_pixels(image)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('{} images in {:.1f} ms, peak RSS {:.1f} MB'.format(len(file_names), elapsed * 1000, peak_rss))
+
+
+if __name__ == '__main__':
+    import sys
+
+    main(sys.argv[1:])
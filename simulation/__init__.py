@@ -0,0 +1,6 @@
+from simulation.collision import Box, CollisionStats, CollisionWorld, Plane, Sphere
+from simulation.emitter import Emitter
+from simulation.parallel import ParallelSimulation, SharedParticleSystem
+from simulation.particles import Integrator, ParticleSystem
+from simulation.substeps import AdaptiveStepper, SubstepStats
+from simulation.threaded import FrameBuffers, SimulationThread, ThreadTiming, overlap
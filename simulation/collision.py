@@ -0,0 +1,344 @@
+import time
+
+import attr
+import numpy as np
+
+# cells are hashed exactly as long as their coordinates stay within +-2 ** 20
+_CELL_BITS = 21
+_CELL_OFFSET = 1 << (_CELL_BITS - 1)
+# the cell itself and the half of its neighbours with larger keys, so every pair of cells is visited once
+_NEIGHBOURS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)
+                        if (x, y, z) >= (0, 0, 0)], np.int64)
+
+
+def _vector(value):
+    return np.asarray(value, np.float32)
+
+
+def _cell_keys(cells):
+    cells = cells + _CELL_OFFSET
+    return (cells[..., 0] << (2 * _CELL_BITS)) | (cells[..., 1] << _CELL_BITS) | cells[..., 2]
+
+
+def _expand(starts, counts):
+    """
+    Concatenates ``arange(start, start + count)`` for every ``(start, count)``; returns the indices and, for each,
+    the position of the range it came from.
+    """
+    owners = np.repeat(np.arange(len(counts)), counts)
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - counts - starts, counts), owners
+
+
+def _reflect(velocity, normal, restitution):
+    # only the velocity going into the surface is reflected
+    speed = np.einsum('ij,ij->i', velocity, normal)
+    return velocity - ((1 + restitution) * np.minimum(speed, 0.))[:, None] * normal
+
+
+@attr.s(slots=True)
+class Plane(object):
+    """
+    A wall particles stay in front of, optionally limited to the axis-aligned box ``(minimum, maximum)``.
+    """
+    point = attr.ib(converter=_vector)
+    normal = attr.ib(converter=lambda normal: _vector(normal) / np.linalg.norm(normal))
+    minimum = attr.ib(default=(-np.inf,) * 3, converter=_vector)
+    maximum = attr.ib(default=(np.inf,) * 3, converter=_vector)
+    restitution = attr.ib(type=float, default=1.)
+
+
+@attr.s(slots=True)
+class Box(object):
+    minimum = attr.ib(converter=_vector)
+    maximum = attr.ib(converter=_vector)
+    restitution = attr.ib(type=float, default=1.)
+
+
+@attr.s(slots=True)
+class Sphere(object):
+    center = attr.ib(converter=_vector)
+    radius = attr.ib(type=float)
+    restitution = attr.ib(type=float, default=1.)
+
+
+@attr.s(slots=True)
+class CollisionStats(object):
+    particles = attr.ib(type=int, default=0)
+    colliders = attr.ib(type=int, default=0)
+    tests = attr.ib(type=int, default=0)
+    contacts = attr.ib(type=int, default=0)
+    particle_tests = attr.ib(type=int, default=0)
+    particle_contacts = attr.ib(type=int, default=0)
+    skipped_particle_tests = attr.ib(type=int, default=0)
+    seconds = attr.ib(type=float, default=0.)
+
+    @property
+    def pairs(self):
+        return self.particles * self.colliders
+
+    @property
+    def pairs_per_second(self):
+        return self.pairs / self.seconds if self.seconds else 0.
+
+
+class CollisionWorld(object):
+    """
+    Keeps particles out of planes, boxes and spheres and, with ``particle_collisions``, apart from each other.
+
+    Boxes and spheres are registered in the cells of a uniform grid of ``cell_size`` that they overlap; every
+    step the particles are hashed into the same grid and only tested against the colliders sharing their cell.
+    Planes, which extend over many cells, are tested against every particle; given the positions the particles
+    moved from, they are swept, so particles that crossed a plane during the step bounce off it at the point they
+    hit it instead of being pulled back from wherever they ended up. Particle contacts use a grid of
+    particle-diameter cells rebuilt every step; when a step would need more than ``max_particle_tests`` tests,
+    as in a freshly emitted cluster, they are skipped for that step.
+
+    ``resolve`` fits the ``collision_f`` callback of ``Explosion.update`` and leaves its measurements in
+    ``stats``.
+    """
+
+    def __init__(self, colliders=(), cell_size: float = 0.25, particle_radius: float = 0.,
+                 particle_collisions: bool = False, particle_restitution: float = 1.,
+                 max_particle_tests: int = 4000000):
+        self.cell_size = cell_size
+        self.particle_radius = particle_radius
+        self.particle_collisions = particle_collisions
+        self.particle_restitution = particle_restitution
+        self.max_particle_tests = max_particle_tests
+        self.planes = []
+        self.boxes = []
+        self.spheres = []
+        self.stats = CollisionStats()
+        self._grids = None
+        self._boxes = None
+        self._spheres = None
+        for collider in colliders:
+            self.add(collider)
+
+    def add(self, collider):
+        if isinstance(collider, Plane):
+            self.planes.append(collider)
+        elif isinstance(collider, Box):
+            self.boxes.append(collider)
+        elif isinstance(collider, Sphere):
+            self.spheres.append(collider)
+        else:
+            raise TypeError('unsupported collider: {!r}'.format(collider))
+        self._grids = None
+
+    @property
+    def colliders(self):
+        return len(self.planes) + len(self.boxes) + len(self.spheres)
+
+    def _cells(self, points):
+        return np.floor(points / self.cell_size).astype(np.int64)
+
+    def _grid(self, minimum, maximum):
+        """
+        Sorted cell keys of the boxes ``(minimum, maximum)`` and the box each key belongs to.
+        """
+        if not len(minimum):
+            return np.zeros(0, np.int64), np.zeros(0, np.intp)
+        low = self._cells(minimum - self.particle_radius)
+        high = self._cells(maximum + self.particle_radius)
+        keys, owners = [], []
+        for index, (lo, hi) in enumerate(zip(low, high)):
+            ranges = [np.arange(lo[axis], hi[axis] + 1) for axis in range(3)]
+            cells = np.stack(np.meshgrid(*ranges, indexing='ij'), axis=-1).reshape(-1, 3)
+            keys.append(_cell_keys(cells))
+            owners.append(np.full(len(cells), index))
+        keys, owners = np.concatenate(keys), np.concatenate(owners)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], owners[order]
+
+    def _build(self):
+        def array(colliders, name, shape=()):
+            return np.array([getattr(collider, name) for collider in colliders], np.float32).reshape((-1,) + shape)
+
+        self._boxes = (array(self.boxes, 'minimum', (3,)), array(self.boxes, 'maximum', (3,)),
+                       array(self.boxes, 'restitution'))
+        self._spheres = (array(self.spheres, 'center', (3,)), array(self.spheres, 'radius'),
+                         array(self.spheres, 'restitution'))
+        centers, radii, _ = self._spheres
+        self._grids = (
+            self._grid(*self._boxes[:2]),
+            self._grid(centers - radii[:, None], centers + radii[:, None]),
+        )
+
+    def _candidates(self, keys, grid):
+        """
+        ``(particle, collider)`` index pairs of the particles with ``keys`` and the colliders in their cells.
+        """
+        grid_keys, owners = grid
+        starts = np.searchsorted(grid_keys, keys, 'left')
+        counts = np.searchsorted(grid_keys, keys, 'right') - starts
+        entries, particles = _expand(starts, counts)
+        return particles, owners[entries]
+
+    def in_collider_cells(self, position):
+        """
+        Mask of the particles at ``position`` that are in a cell holding a box or sphere.
+        """
+        if self._grids is None:
+            self._build()
+        keys = _cell_keys(self._cells(position))
+        near = np.zeros(len(position), bool)
+        for grid_keys, _ in self._grids:
+            if len(grid_keys):
+                found = np.minimum(np.searchsorted(grid_keys, keys), len(grid_keys) - 1)
+                near |= grid_keys[found] == keys
+        return near
+
+    def resolve(self, particles, previous_position=None):
+        """
+        :param previous_position: where the particles were before the step, to sweep them against the planes
+        """
+        start = time.perf_counter()
+        if self._grids is None:
+            self._build()
+        position, velocity = particles.position, particles.velocity
+        stats = self.stats = CollisionStats(particles=len(position), colliders=self.colliders)
+
+        for plane in self.planes:
+            self._resolve_plane(plane, position, velocity, previous_position)
+        stats.tests += len(position) * len(self.planes)
+
+        if self.boxes or self.spheres:
+            keys = _cell_keys(self._cells(position))
+            box_grid, sphere_grid = self._grids
+            if self.boxes:
+                self._resolve_boxes(*self._candidates(keys, box_grid), position, velocity)
+            if self.spheres:
+                self._resolve_spheres(*self._candidates(keys, sphere_grid), position, velocity)
+
+        if self.particle_collisions and self.particle_radius > 0:
+            self._resolve_particles(position, velocity)
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def _resolve_plane(self, plane, position, velocity, previous_position=None):
+        distance = (position - plane.point) @ plane.normal - self.particle_radius
+        within = ((plane.minimum <= position) & (position <= plane.maximum)).all(axis=1)
+        behind = distance < 0
+        if previous_position is None:
+            crossed = np.zeros(0, np.intp)
+        else:
+            start = (previous_position - plane.point) @ plane.normal - self.particle_radius
+            crossed = np.flatnonzero(behind & (start >= 0))
+            # the point where the particle met the plane has to be on the wall, wherever the step ended
+            fraction = start[crossed] / (start[crossed] - distance[crossed])
+            contact = previous_position[crossed] + fraction[:, None] * (position[crossed] - previous_position[crossed])
+            within[crossed] = ((plane.minimum <= contact) & (contact <= plane.maximum)).all(axis=1)
+            crossed = crossed[within[crossed]]
+        hit = np.flatnonzero(behind & within)
+        if not len(hit):
+            return
+        position[hit] -= distance[hit, None] * plane.normal
+        # a particle that crossed during the step bounces back the rest of the way it went past the plane
+        position[crossed] -= (plane.restitution * distance[crossed])[:, None] * plane.normal
+        velocity[hit] = _reflect(velocity[hit], np.broadcast_to(plane.normal, (len(hit), 3)), plane.restitution)
+        self.stats.contacts += len(hit)
+
+    def _resolve_boxes(self, particles, boxes, position, velocity):
+        self.stats.tests += len(particles)
+        minimum, maximum, restitution = (values[boxes] for values in self._boxes)
+        minimum, maximum = minimum - self.particle_radius, maximum + self.particle_radius
+        points = position[particles]
+        inside = ((minimum < points) & (points < maximum)).all(axis=1)
+        particles, points = particles[inside], points[inside]
+        minimum, maximum, restitution = minimum[inside], maximum[inside], restitution[inside]
+        if not len(particles):
+            return
+
+        # out through the nearest face
+        depths = np.concatenate([points - minimum, maximum - points], axis=1)
+        face = np.argmin(depths, axis=1)
+        axis = face % 3
+        rows = np.arange(len(particles))
+        normal = np.zeros((len(particles), 3), np.float32)
+        normal[rows, axis] = np.where(face < 3, -1., 1.)
+        points[rows, axis] = np.where(face < 3, minimum[rows, axis], maximum[rows, axis])
+        position[particles] = points
+        velocity[particles] = _reflect(velocity[particles], normal, restitution)
+        self.stats.contacts += len(particles)
+
+    def _resolve_spheres(self, particles, spheres, position, velocity):
+        self.stats.tests += len(particles)
+        centers, radii, restitution = (values[spheres] for values in self._spheres)
+        radii = radii + self.particle_radius
+        offset = position[particles] - centers
+        distance = np.linalg.norm(offset, axis=1)
+        inside = distance < radii
+        if not inside.any():
+            return
+        particles, offset, distance = particles[inside], offset[inside], distance[inside]
+        centers, radii, restitution = centers[inside], radii[inside], restitution[inside]
+
+        normal = offset / np.maximum(distance, 1e-12)[:, None]
+        # a particle right at the center leaves upwards
+        normal[distance == 0] = (0., 1., 0.)
+        position[particles] = centers + normal * radii[:, None]
+        velocity[particles] = _reflect(velocity[particles], normal, restitution)
+        self.stats.contacts += len(particles)
+
+    def _particle_pairs(self, position):
+        diameter = 2 * self.particle_radius
+        cells = np.floor(position / diameter).astype(np.int64)
+        keys = _cell_keys(cells)
+        order = np.argsort(keys, kind='stable')
+        cell_keys, firsts, sizes = np.unique(keys[order], return_index=True, return_counts=True)
+        cells = cells[order[firsts]]
+
+        # the neighbours are looked up once per occupied cell rather than once per particle
+        ranges = []
+        for offset in _NEIGHBOURS:
+            keys = _cell_keys(cells + offset)
+            found = np.minimum(np.searchsorted(cell_keys, keys), len(cell_keys) - 1)
+            found = np.where(cell_keys[found] == keys, found, -1)
+            hit = np.flatnonzero(found >= 0)
+            ranges.append((hit, found[hit]))
+        tests = sum(int((sizes[cell] * sizes[other]).sum()) for cell, other in ranges)
+        if tests > self.max_particle_tests:
+            self.stats.skipped_particle_tests += tests
+            return None
+        self.stats.particle_tests += tests
+
+        first, second = [], []
+        for same, (cell, other) in zip(_NEIGHBOURS.any(axis=1) == 0, ranges):
+            # every particle of ``cell`` against every particle of ``other``
+            owners, pairs = _expand(firsts[cell], sizes[cell])
+            pair_counts = sizes[other][pairs]
+            owners, slots = np.repeat(owners, pair_counts), _expand(firsts[other][pairs], pair_counts)[0]
+            owners, others = order[owners], order[slots]
+            if same:
+                # a cell meets itself, keep one of each pair
+                keep = owners < others
+                owners, others = owners[keep], others[keep]
+            first.append(owners)
+            second.append(others)
+        return np.concatenate(first), np.concatenate(second)
+
+    def _resolve_particles(self, position, velocity):
+        pairs = self._particle_pairs(position)
+        if pairs is None:
+            return
+        first, second = pairs
+        offset = position[second] - position[first]
+        distance = np.linalg.norm(offset, axis=1)
+        diameter = 2 * self.particle_radius
+        touching = distance < diameter
+        first, second, offset, distance = first[touching], second[touching], offset[touching], distance[touching]
+        if not len(first):
+            return
+        normal = offset / np.maximum(distance, 1e-12)[:, None]
+
+        # both particles back off half the overlap and exchange the normal part of their approach velocity
+        separation = normal * ((diameter - distance) / 2)[:, None]
+        np.subtract.at(position, first, separation)
+        np.add.at(position, second, separation)
+        approach = np.einsum('ij,ij->i', velocity[second] - velocity[first], normal)
+        impulse = normal * (-(1 + self.particle_restitution) / 2 * np.minimum(approach, 0.))[:, None]
+        np.subtract.at(velocity, first, impulse)
+        np.add.at(velocity, second, impulse)
+        self.stats.particle_contacts += len(first)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from simulation.particles import ParticleSystem
+
+
+class Emitter(object):
+    """
+    Spawns particles at ``position`` into a ``ParticleSystem``, each pushed by an acceleration of a random direction
+    and a strength between ``min_power_ratio * power`` and ``power``.
+
+    ``burst()`` spawns a number of particles at once and ``update()`` keeps spawning ``rate`` particles per second
+    of simulated time. Dead particles are recycled before spawning, and the particles that do not fit are counted
+    in ``dropped``. The random directions and strengths are drawn ``batch_size`` at a time from ``random_state``.
+    """
+
+    def __init__(self, system: ParticleSystem, position, power: float, rate: float = 0., life_time: float = None,
+                 attenuation: float = 0.3, min_power_ratio: float = 0.05, random_state=None, batch_size: int = 1024):
+        self.system = system
+        self.position = position
+        self.power = power
+        self.rate = rate
+        self.life_time = life_time
+        self.attenuation = attenuation
+        self.min_power_ratio = min_power_ratio
+        self.random_state = np.random.RandomState() if random_state is None else random_state
+        self.batch_size = batch_size
+        self.time = None
+        self.emitted = 0
+        self.dropped = 0
+        self._pending = 0.
+        self._kicks = np.empty((0, 3), system.dtype)
+        self._next = 0
+
+    def _draw(self, count: int):
+        if self._next + count > len(self._kicks):
+            size = max(self.batch_size, count)
+            direction = self.random_state.uniform(-1, 1, (size, 3))
+            power = self.random_state.uniform(self.min_power_ratio * self.power, self.power, (size, 1))
+            self._kicks = (direction * power).astype(self.system.dtype)
+            self._next = 0
+        kicks = self._kicks[self._next:self._next + count]
+        self._next += count
+        return kicks
+
+    def burst(self, count: int):
+        self.system.recycle()
+        emitted = min(count, self.system.free)
+        self.dropped += count - emitted
+        if emitted:
+            self.system.emit(self.position, acceleration=self._draw(emitted), attenuation=self.attenuation,
+                             life_time=self.life_time, count=emitted)
+            self.emitted += emitted
+        return emitted
+
+    def update(self, time: float):
+        if self.time is not None and self.rate:
+            self._pending += self.rate * (time - self.time)
+        self.time = time
+        count = int(self._pending)
+        if count:
+            self._pending -= count
+            self.burst(count)
@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from simulation.collision import CollisionWorld
+from simulation.particles import Integrator, ParticleSystem
+from simulation.substeps import AdaptiveStepper
+
+
+class SharedParticleSystem(ParticleSystem):
+    """
+    A ``ParticleSystem`` whose particle attributes live in shared memory blocks. Worker processes attach to the
+    blocks by name and step their shards in place, and the render process reads ``position`` without a copy.
+
+    Without ``names`` the blocks are created and owned by this system and freed by ``close()``; with the ``names``
+    of another system's blocks it attaches to them.
+    """
+
+    def __init__(self, capacity: int, gravitation=None, dtype=np.float32, integrator: Integrator = None,
+                 names=None):
+        self._blocks = {}
+        self._attached = names is not None
+        self._names = names
+        super().__init__(capacity, gravitation, dtype, integrator)
+
+    def _allocate(self, name, shape, fill):
+        if self._attached:
+            block = shared_memory.SharedMemory(self._names[name])
+        else:
+            block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * self.dtype.itemsize)
+        self._blocks[name] = block
+        array = np.ndarray(shape, self.dtype, buffer=block.buf)
+        if not self._attached:
+            array[...] = fill
+        return array
+
+    @property
+    def names(self):
+        return {name: block.name for name, block in self._blocks.items()}
+
+    def close(self):
+        # the arrays must go before the memory they point into
+        for name in self._blocks:
+            setattr(self, '_' + name, None)
+        for block in self._blocks.values():
+            block.close()
+            if not self._attached:
+                block.unlink()
+        self._blocks = {}
+
+
+# the state of a worker process, set up once by ``_attach``
+_worker_system = None
+_worker_collision = None
+_worker_adaptive = False
+
+
+def _attach(names, capacity, gravitation, dtype, integrator, collision, adaptive):
+    global _worker_system, _worker_collision, _worker_adaptive
+    _worker_system = SharedParticleSystem(capacity, gravitation, dtype, integrator, names)
+    _worker_collision = collision
+    _worker_adaptive = adaptive
+
+
+def _step_shard(task):
+    start, stop, previous_time, time = task
+    shard = _worker_system.shard(start, stop)
+    shard.time = previous_time
+    if _worker_adaptive:
+        return AdaptiveStepper(shard, _worker_collision).step(time)
+    shard.step(time)
+    if _worker_collision is not None:
+        return _worker_collision.resolve(shard)
+
+
+class ParallelSimulation(object):
+    """
+    Steps a ``SharedParticleSystem`` on a pool of ``workers`` processes, by default one per CPU, each integrating
+    and colliding a contiguous shard of the particles in place.
+
+    Below ``threshold`` particles, or with fewer than two workers, the system is stepped in this process: a shard
+    has to be worth more than the round trip to the pool. The ``collision`` world is sent to every worker once,
+    when the pool starts, and each worker resolves its shard on its own, so particle-particle contacts across
+    shards are missed. With ``adaptive`` every shard is stepped by an ``AdaptiveStepper`` of its own, which sweeps
+    its particles against the planes of ``collision``.
+
+    The pool is started by the constructor, which should run on the main thread. Its workers are spawned rather
+    than forked, so a process with other threads or a GL context running can start them safely.
+    """
+
+    def __init__(self, system: SharedParticleSystem, workers: int = None, threshold: int = 100000,
+                 collision: CollisionWorld = None, adaptive: bool = False):
+        self.system = system
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.collision = collision
+        self.adaptive = adaptive
+        self.parallel_steps = 0
+        self._stepper = AdaptiveStepper(system, collision) if adaptive else None
+        self._pool = None
+        # spawned workers import the main module again, and a simulation built while they do gets no pool
+        if self.workers >= 2 and multiprocessing.current_process().name == 'MainProcess':
+            self._pool = multiprocessing.get_context('spawn').Pool(self.workers, _attach, (
+                system.names, system.capacity, system.gravitation.tolist(), system.dtype, system.integrator,
+                collision, adaptive,
+            ))
+
+    def step(self, time):
+        """
+        Advances the system to ``time`` and resolves it against ``collision``; returns the ``CollisionStats``, or
+        with ``adaptive`` the ``SubstepStats``, of every shard.
+        """
+        system = self.system
+        count = system.count
+        if count < self.threshold or self._pool is None:
+            if self._stepper is not None:
+                return [self._stepper.step(time)]
+            system.step(time)
+            return [] if self.collision is None else [self.collision.resolve(system)]
+
+        bounds = np.linspace(0, count, self.workers + 1).astype(int).tolist()
+        tasks = [(start, stop, system.time, time) for start, stop in zip(bounds[:-1], bounds[1:])]
+        results = self._pool.map(_step_shard, tasks)
+        system.time = time
+        self.parallel_steps += 1
+        return [] if self.collision is None and not self.adaptive else results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
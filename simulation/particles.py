@@ -0,0 +1,219 @@
+from enum import Enum
+
+import numpy as np
+
+
+class Integrator(Enum):
+    # exact for the acceleration held over the step, as the particles always moved
+    CLOSED_FORM = 0
+    SEMI_IMPLICIT_EULER = 1
+    VELOCITY_VERLET = 2
+
+
+class ParticleSystem(object):
+    """
+    Struct-of-arrays particle storage: every attribute lives in its own contiguous float32 array
+    and the whole system is advanced with a handful of vectorized operations per step.
+
+    The arrays are allocated once at ``capacity``. ``recycle()`` moves the live particles over the dead ones so the
+    live particles stay packed at the front and the freed slots are reused by the next ``emit``.
+
+    Every step moves the particles with ``integrator``; the acceleration of a particle decays by its
+    ``attenuation`` once per step.
+    """
+
+    def __init__(self, capacity: int, gravitation=None, dtype=np.float32, integrator: Integrator = None):
+        self.capacity = capacity
+        self.integrator = integrator or Integrator.CLOSED_FORM
+        self.count = 0
+        self.time = 0.
+        self.dtype = np.dtype(dtype)
+        self.gravitation = np.array(gravitation or [0., 0., 0.], self.dtype)
+
+        self._position = self._allocate('position', (capacity, 3), 0.)
+        self._velocity = self._allocate('velocity', (capacity, 3), 0.)
+        self._acceleration = self._allocate('acceleration', (capacity, 3), 0.)
+        self._attenuation = self._allocate('attenuation', (capacity,), 0.)
+        self._life_time = self._allocate('life_time', (capacity,), np.inf)
+
+        # scratch buffers reused by every step
+        self._total_acceleration = np.empty((capacity, 3), self.dtype)
+        self._delta = np.empty((capacity, 3), self.dtype)
+        self._active = np.empty(capacity, bool)
+        self._step_time = np.empty((capacity, 1), self.dtype)
+        self._step_attenuation = np.empty((capacity, 1), self.dtype)
+        self._half_step_time_squared = np.empty((capacity, 1), self.dtype)
+        self.recycled = 0
+
+    def _allocate(self, name, shape, fill):
+        """
+        Storage of the particle attribute ``name``; subclasses may place it elsewhere, e.g. in shared memory.
+        """
+        return np.full(shape, fill, self.dtype)
+
+    def shard(self, start: int, stop: int):
+        """
+        A system over the particles ``start:stop`` that shares this one's arrays, scratch buffers included, so
+        stepping it updates them in place and disjoint shards can be stepped at the same time.
+        """
+        shard = object.__new__(ParticleSystem)
+        shard.__dict__.update(self.__dict__)
+        for name, array in self.__dict__.items():
+            if isinstance(array, np.ndarray) and name != 'gravitation':
+                setattr(shard, name, array[start:stop])
+        shard.capacity = shard.count = stop - start
+        return shard
+
+    @property
+    def position(self):
+        return self._position[:self.count]
+
+    @property
+    def velocity(self):
+        return self._velocity[:self.count]
+
+    @property
+    def acceleration(self):
+        return self._acceleration[:self.count]
+
+    @property
+    def attenuation(self):
+        return self._attenuation[:self.count]
+
+    @property
+    def life_time(self):
+        return self._life_time[:self.count]
+
+    @property
+    def active(self):
+        return self.life_time > 0
+
+    @property
+    def free(self):
+        return self.capacity - self.count
+
+    def reset(self, time=0.):
+        self.count = 0
+        self.time = time
+
+    def emit(self, position, velocity=None, acceleration=None, attenuation=0.0, life_time=None, count=None):
+        """
+        Appends particles to the system. Every argument is broadcast to ``(count, 3)`` (or ``(count,)`` for the
+        scalar attributes), so a single position may be shared by the whole batch.
+        """
+        if count is None:
+            count = max(len(np.atleast_2d(value)) for value in (position, velocity, acceleration) if value is not None)
+        start, stop = self.count, self.count + count
+        if stop > self.capacity:
+            raise ValueError('particle system capacity exceeded: {} > {}'.format(stop, self.capacity))
+
+        self._position[start:stop] = position
+        self._velocity[start:stop] = 0. if velocity is None else velocity
+        self._acceleration[start:stop] = 0. if acceleration is None else acceleration
+        self._attenuation[start:stop] = attenuation
+        self._life_time[start:stop] = np.inf if life_time is None else life_time
+        self.count = stop
+        return slice(start, stop)
+
+    def recycle(self):
+        """
+        Frees the slots of the particles whose life time is over; returns how many were freed.
+        """
+        n = self.count
+        active = np.greater(self._life_time[:n], 0, out=self._active[:n])
+        alive = int(np.count_nonzero(active))
+        if alive == n:
+            return 0
+
+        # the live particles behind the first ``alive`` slots fill the dead slots among them
+        holes = np.flatnonzero(~active[:alive])
+        movers = alive + np.flatnonzero(active[alive:])
+        for array in (self._position, self._velocity, self._acceleration, self._attenuation, self._life_time):
+            array[holes] = array[movers]
+        self.count = alive
+        self.recycled += n - alive
+        return n - alive
+
+    def reorder(self, order):
+        """
+        Puts the particles in ``order``, a permutation of ``range(count)``.
+        """
+        n = self.count
+        for array in (self._position, self._velocity, self._acceleration, self._attenuation, self._life_time):
+            array[:n] = array[:n][order]
+
+    def step(self, time, fraction: float = 1.):
+        """
+        Advances the particles to ``time``. A step that stands for ``fraction`` of a whole one, such as a sub-step,
+        decays the accelerations by that share of ``attenuation``.
+        """
+        t = time - self.time
+        self.time = time
+        n = self.count
+        if n == 0 or t == 0:
+            return
+
+        attenuation = self._attenuation[:n, None]
+        if fraction != 1:
+            # 1 - (1 - attenuation) ** fraction
+            attenuation = np.subtract(1, attenuation, out=self._step_attenuation[:n])
+            np.power(attenuation, fraction, out=attenuation)
+            np.subtract(1, attenuation, out=attenuation)
+
+        life_time = self._life_time[:n]
+        active = np.greater(life_time, 0, out=self._active[:n])
+        if active.all():
+            dt = t
+        else:
+            # dead particles stand still until they are recycled
+            dt = np.multiply(active[:, None], t, out=self._step_time[:n])
+            attenuation = np.multiply(active[:, None], attenuation, out=self._step_attenuation[:n])
+
+        position = self._position[:n]
+        velocity = self._velocity[:n]
+        acceleration = self._acceleration[:n]
+        total_acceleration = self._total_acceleration[:n]
+        delta = self._delta[:n]
+
+        np.add(acceleration, self.gravitation, out=total_acceleration)
+
+        if self.integrator is Integrator.SEMI_IMPLICIT_EULER:
+            # v += a * t, then x += v * t with the new velocity
+            np.multiply(total_acceleration, dt, out=delta)
+            velocity += delta
+            np.multiply(velocity, dt, out=delta)
+            position += delta
+            self._attenuate(acceleration, attenuation, delta)
+        else:
+            # x += v * t + a * t^2 / 2
+            np.multiply(velocity, dt, out=delta)
+            position += delta
+            if np.isscalar(dt):
+                half_dt_squared = 0.5 * dt * dt
+            else:
+                half_dt_squared = np.multiply(dt, dt, out=self._half_step_time_squared[:n])
+                half_dt_squared *= 0.5
+            np.multiply(total_acceleration, half_dt_squared, out=delta)
+            position += delta
+
+            if self.integrator is Integrator.VELOCITY_VERLET:
+                # v += (a + a') * t / 2 with the acceleration a' at the end of the step
+                np.multiply(total_acceleration, 0.5 * dt, out=delta)
+                velocity += delta
+                self._attenuate(acceleration, attenuation, delta)
+                np.add(acceleration, self.gravitation, out=total_acceleration)
+                np.multiply(total_acceleration, 0.5 * dt, out=delta)
+                velocity += delta
+            else:
+                # v += a * t
+                np.multiply(total_acceleration, dt, out=delta)
+                velocity += delta
+                self._attenuate(acceleration, attenuation, delta)
+
+        life_time -= dt if np.isscalar(dt) else dt[:, 0]
+
+    @classmethod
+    def _attenuate(cls, acceleration, attenuation, scratch):
+        # a -= a * attenuation
+        np.multiply(acceleration, attenuation, out=scratch)
+        acceleration -= scratch
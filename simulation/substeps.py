@@ -0,0 +1,118 @@
+import attr
+import numpy as np
+
+from simulation.collision import CollisionStats, CollisionWorld
+from simulation.particles import ParticleSystem
+
+
+@attr.s(slots=True)
+class SubstepStats(object):
+    particles = attr.ib(type=int, default=0)
+    batches = attr.ib(type=int, default=0)
+    substeps = attr.ib(type=int, default=0)
+    particle_substeps = attr.ib(type=int, default=0)
+    # the collisions of every batch and sub-step of the step added up
+    collision = attr.ib(factory=CollisionStats)
+
+    @property
+    def substeps_per_particle(self):
+        return self.particle_substeps / self.particles if self.particles else 0.
+
+
+class AdaptiveStepper(object):
+    """
+    Steps a ``ParticleSystem`` in batches of ``batch_size`` consecutive particles, splitting the step of every batch
+    into as many sub-steps as its fastest particle needs, up to ``max_substeps``, and colliding it with
+    ``collision`` after each of them.
+
+    A particle may travel ``max_travel`` per sub-step, or only ``collision_travel`` while it is in a cell of a box
+    or sphere of the collision world. Planes need no sub-steps of their own since the particles are swept against
+    them. Slow batches far from colliders thus take the whole step at once.
+
+    With ``group``, when the batches would take ``group_ratio`` times the sub-steps their particles need on their
+    own, the particles are first reordered by the sub-steps they need, so a few fast particles do not drag every
+    batch they are scattered over into small steps.
+    """
+
+    def __init__(self, system: ParticleSystem, collision: CollisionWorld = None, max_travel: float = 0.05,
+                 collision_travel: float = None, batch_size: int = 1024, max_substeps: int = 16, group: bool = True,
+                 group_ratio: float = 1.5):
+        self.system = system
+        self.collision = collision
+        self.max_travel = max_travel
+        if collision_travel is None:
+            collision_travel = collision.cell_size / 4 if collision is not None else max_travel
+        self.collision_travel = collision_travel
+        self.batch_size = batch_size
+        self.max_substeps = max_substeps
+        self.group = group
+        self.group_ratio = group_ratio
+        self.reorders = 0
+        self.stats = SubstepStats()
+        self._previous_position = np.empty((system.capacity, 3), system.dtype)
+
+    def substeps(self, t: float):
+        """
+        How many sub-steps each particle needs to advance ``t`` seconds.
+        """
+        system = self.system
+        position, velocity = system.position, system.velocity
+        acceleration = system.acceleration + system.gravitation
+        travel = np.linalg.norm(velocity, axis=1) * t + np.linalg.norm(acceleration, axis=1) * (t * t / 2)
+        limit = np.full(len(position), self.max_travel, system.dtype)
+        if self.collision is not None and (self.collision.boxes or self.collision.spheres):
+            limit[self.collision.in_collider_cells(position)] = self.collision_travel
+        return np.clip(np.ceil(travel / limit), 1, self.max_substeps).astype(int)
+
+    def _batch_substeps(self, needed):
+        return np.maximum.reduceat(needed, np.arange(0, len(needed), self.batch_size))
+
+    def _batch_cost(self, batches, count):
+        sizes = np.full(len(batches), self.batch_size)
+        sizes[-1] = count - self.batch_size * (len(batches) - 1)
+        return int(batches @ sizes)
+
+    def step(self, time: float):
+        system = self.system
+        t = time - system.time
+        count = system.count
+        stats = self.stats = SubstepStats(particles=count)
+        if self.collision is not None:
+            stats.collision = CollisionStats(particles=count, colliders=self.collision.colliders)
+        if count == 0 or t == 0:
+            system.step(time)
+            return stats
+
+        needed = self.substeps(t)
+        batches = self._batch_substeps(needed)
+        if self.group and self._batch_cost(batches, count) > self.group_ratio * needed.sum():
+            order = np.argsort(needed, kind='stable')
+            system.reorder(order)
+            batches = self._batch_substeps(needed[order])
+            self.reorders += 1
+
+        start_time = system.time
+        for batch, substeps in enumerate(batches.tolist()):
+            start = batch * self.batch_size
+            stop = min(start + self.batch_size, count)
+            shard = system.shard(start, stop)
+            previous = self._previous_position[start:stop]
+            for substep in range(1, substeps + 1):
+                np.copyto(previous, shard.position)
+                shard.step(start_time + t * substep / substeps, 1 / substeps)
+                if self.collision is not None:
+                    self._add_collision(stats.collision, self.collision.resolve(shard, previous))
+            stats.batches += 1
+            stats.substeps += substeps
+            stats.particle_substeps += substeps * (stop - start)
+        system.time = time
+        return stats
+
+    @classmethod
+    def _add_collision(cls, total, stats):
+        total.tests += stats.tests
+        total.contacts += stats.contacts
+        total.particle_tests += stats.particle_tests
+        total.particle_contacts += stats.particle_contacts
+        total.skipped_particle_tests += stats.skipped_particle_tests
+        total.seconds += stats.seconds
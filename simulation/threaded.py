@@ -0,0 +1,196 @@
+import threading
+import time as time_module
+from collections import deque
+from contextlib import contextmanager
+
+import attr
+
+
+class FrameBuffers(object):
+    """
+    Hands frames from one writer thread to one reader thread without locks.
+
+    The writer fills ``back`` and calls ``publish()``; the reader calls ``acquire()`` for the most recent published
+    frame, which stays its own until the next ``acquire()``. Frames move between the two sides through deques,
+    whose ``append`` and ``popleft`` are atomic. With a third frame besides the two sides' own neither has to wait
+    for the other; a frame the reader skipped goes back to the writer.
+    """
+
+    def __init__(self, make_frame, count: int = 3):
+        self.back = make_frame()
+        self.front = make_frame()
+        self.published = 0
+        self.acquired = 0
+        self._free = deque(make_frame() for _ in range(count - 2))
+        self._ready = deque()
+
+    def publish(self):
+        self._ready.append(self.back)
+        self.published += 1
+        back = None
+        while back is None:
+            back = self._pop(self._free) or self._pop(self._ready)
+            if back is None:
+                # the reader is between taking a frame and handing back its previous one
+                time_module.sleep(0)
+        self.back = back
+
+    def acquire(self):
+        latest = None
+        frame = self._pop(self._ready)
+        while frame is not None:
+            if latest is not None:
+                self._free.append(latest)
+            latest = frame
+            frame = self._pop(self._ready)
+        if latest is not None:
+            self._free.append(self.front)
+            self.front = latest
+            self.acquired += 1
+        return self.front
+
+    @classmethod
+    def _pop(cls, frames):
+        try:
+            return frames.popleft()
+        except IndexError:
+            return None
+
+
+@attr.s(slots=True)
+class ThreadTiming(object):
+    """
+    Time a thread spends busy in ``measure()`` blocks out of the wall-clock time since its first block.
+    """
+    name = attr.ib()
+    count = attr.ib(type=int, default=0)
+    busy = attr.ib(type=float, default=0.)
+    started = attr.ib(type=float, default=None)
+
+    @contextmanager
+    def measure(self):
+        start = time_module.perf_counter()
+        if self.started is None:
+            self.started = start
+        try:
+            yield
+        finally:
+            self.busy += time_module.perf_counter() - start
+            self.count += 1
+
+    @property
+    def wall(self):
+        return 0. if self.started is None else time_module.perf_counter() - self.started
+
+    @property
+    def utilization(self):
+        wall = self.wall
+        return self.busy / wall if wall else 0.
+
+
+def overlap(*timings: ThreadTiming):
+    """
+    How many of the threads were busy at once on average, ``1`` when they only ever took turns.
+    """
+    wall = max(timing.wall for timing in timings)
+    return sum(timing.busy for timing in timings) / wall if wall else 0.
+
+
+class SimulationThread(object):
+    """
+    Runs ``step()`` every ``time_step`` seconds of ``clock()`` on a daemon thread, like ``Scheduler`` does on the
+    GLUT idle callback, and after each batch of steps calls ``write(frame)`` on the back frame of ``buffers`` and
+    publishes it. Between batches the thread waits in ``sleep(seconds)``. The thread starts paused.
+
+    Without ``threaded`` no thread is started and the owner calls ``advance()`` instead, e.g. once per rendered
+    frame on a virtual clock, so every frame sees the same steps on every run.
+    """
+
+    def __init__(self, step, write, buffers: FrameBuffers, time_step: float = 1 / 60, max_steps: int = 5,
+                 clock=time_module.perf_counter, sleep=time_module.sleep, threaded: bool = True):
+        self.step = step
+        self.write = write
+        self.buffers = buffers
+        self.time_step = time_step
+        self.max_steps = max_steps
+        self.clock = clock
+        self.sleep = sleep
+        self.threaded = threaded
+        # ``clock()`` at the last ``advance()``
+        self.now = None
+        self.timing = ThreadTiming('simulation')
+        self._running = threading.Event()
+        self._stopped = False
+        self._previous = None
+        self._accumulator = 0.
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+            self._thread.start()
+
+    @property
+    def alpha(self):
+        """
+        How far ``now`` is from the last step towards the next one, in ``[0, 1)`` like ``Scheduler.alpha``.
+        """
+        return self._accumulator / self.time_step
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def stop(self):
+        self._stopped = True
+        self._running.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def advance(self):
+        """
+        Runs the steps due by ``clock()`` and publishes a frame after them; returns how many steps ran.
+        """
+        if self.paused:
+            # time spent paused is not simulated
+            self._previous = None
+            return 0
+        now = self.now = self.clock()
+        if self._previous is None:
+            self._previous = now
+        self._accumulator += now - self._previous
+        self._previous = now
+        if self._accumulator < self.time_step:
+            return 0
+
+        with self.timing.measure():
+            steps = 0
+            while self._accumulator >= self.time_step:
+                if steps == self.max_steps:
+                    self._accumulator %= self.time_step
+                    break
+                self.step()
+                self._accumulator -= self.time_step
+                steps += 1
+            self.write(self.buffers.back)
+            self.buffers.publish()
+        return steps
+
+    def _run(self):
+        while not self._stopped:
+            if self.paused:
+                self._running.wait()
+                self._previous = None
+                continue
+            self.advance()
+            self.sleep(max(self.time_step - self._accumulator, 0.))
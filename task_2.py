@@ -1,14 +1,13 @@
 import sys
-from math import cos, radians, sin
+from math import pi
 
-import numpy as np
 from OpenGL.GL import (glBegin, glEnd, GL_POLYGON, glVertex2d,
                        glColor3f, glPushMatrix, glPopMatrix, glTranslatef, glRotatef)
-from OpenGL.GLUT import GLUT_LEFT_BUTTON, GLUT_RIGHT_BUTTON, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_RIGHT, GLUT_KEY_DOWN, \
-    glutPostRedisplay
+from OpenGL.GLUT import GLUT_LEFT_BUTTON, GLUT_RIGHT_BUTTON, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_RIGHT, GLUT_KEY_DOWN
 
 import color
 from base import WindowABC, rgb_to_f
+from graphics import CurveTessellator, Scheduler, circle, gl, glut, resources
 
 
 class RotatedSquareWindow(WindowABC):
@@ -27,13 +26,14 @@ class RotatedSquareWindow(WindowABC):
         self._square_size = square_size
         self._circle_radius = circle_radius
         self._angle = 0
-        self._should_rotate = False
+        self._angle_step = -1  # degrees per 1/60 s
         self._step = step
+        self._rotation = Scheduler(glut, self._rotate)
+        self._rotation.start(paused=True)
+        self._tessellator = CurveTessellator(resources)
 
-    def handle_idle(self):
-        if self._should_rotate:
-            self._angle -= 1
-            glutPostRedisplay()
+    def _rotate(self):
+        self._angle += self._angle_step
 
     def draw(self):
         self._draw_square()
@@ -41,21 +41,16 @@ class RotatedSquareWindow(WindowABC):
         glPushMatrix()
         glColor3f(*rgb_to_f(*color.Orange))
         glTranslatef(*self._circle_pos, 0)
-        glBegin(GL_POLYGON)
-        for grad in np.linspace(0, 360, 1000):
-            rad = radians(grad)
-            x = self._circle_radius * cos(rad)
-            y = self._circle_radius * sin(rad)
-            glVertex2d(x, y)
-
-        glEnd()
+        radius = self._circle_radius
+        self._tessellator.mesh('circle', radius, circle(radius), 0, 2 * pi, radius=radius,
+                               mode=gl.BeginMode.POLYGON).draw()
         glPopMatrix()
 
     def _draw_square(self):
         glPushMatrix()
         glColor3f(*rgb_to_f(*color.Blue))
         glTranslatef(self._square_x, self._square_y, 0)
-        glRotatef(self._angle, 0, 0, 1.)
+        glRotatef(self._angle + self._rotation.alpha * self._angle_step, 0, 0, 1.)
         glBegin(GL_POLYGON)
         size = self._square_size / 2
         square_vertices = [
@@ -84,14 +79,14 @@ class RotatedSquareWindow(WindowABC):
             self._circle_pos[0] += self._step
         elif key == GLUT_KEY_DOWN:
             self._circle_pos[1] -= self._step
-        glutPostRedisplay()
+        glut.post_redisplay()
 
     def handle_mouse(self, button, state, x, y):
         super().handle_mouse(button, state, x, y)
         if button == GLUT_LEFT_BUTTON:
-            self._should_rotate = True
+            self._rotation.resume()
         elif button == GLUT_RIGHT_BUTTON:
-            self._should_rotate = False
+            self._rotation.pause()
 
 
 def main():
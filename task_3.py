@@ -1,13 +1,20 @@
 import sys
 
 from OpenGL.GL import (glColor3f, glBegin, GL_POLYGON, glEnd,
-                       glVertex3f, glRotatef, glPushMatrix, glPopMatrix, glTranslatef, glLoadIdentity, glViewport,
+                       glVertex3f, glPushMatrix, glPopMatrix, glTranslatef,
                        glOrtho)
 from OpenGL.GLU import gluPerspective
-from OpenGL.GLUT import GLUT_KEY_RIGHT, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_DOWN, glutPostRedisplay
+from OpenGL.GLUT import GLUT_KEY_RIGHT, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_DOWN
 
 import color as Color
 from base import WindowABC, rgb_to_f
+from graphics import glut, Cube, SceneGraph, cube_grid
+from graphics.scene import rotation, translation
+
+FACE_COLORS = (Color.Blue, Color.Orange, Color.Green, Color.Pink, Color.Purple, Color.Red)
+# the stress mode draws STRESS_GRID ** 3 small cubes, instanced unless STRESS_INSTANCING is False
+STRESS_GRID = 16
+STRESS_INSTANCING = None
 
 
 class CubeWindow(WindowABC):
@@ -20,14 +27,16 @@ class CubeWindow(WindowABC):
         self._rotate_x = 0.
         self._rotate_y = 0.
         self._is_perspective = True
+        self._cube = Cube(size, FACE_COLORS, instancing=STRESS_INSTANCING)
+        self._stress_instances = cube_grid(STRESS_GRID, size)
+        self._is_stress = False
+        self._scene = SceneGraph()
+        self._cube_node = self._scene.add(draw=self._draw_cube)
+        self._update_transform()
 
     def handle_reshape(self, width, height):
-
-        glLoadIdentity()
         aspect = height / width
-
-        glViewport(0, 0, width, height)
-        bw = self.width / 2
+        bw = width / 2
         if self._is_perspective:
             gluPerspective(45.0, 1/aspect, 0.1, 2000.0)
         else:
@@ -67,64 +76,21 @@ class CubeWindow(WindowABC):
         self._draw_xy_edge(color)
         glPopMatrix()
 
-    def _draw_zero_plane_xy(self, color):
-        glPushMatrix()
-        glColor3f(*rgb_to_f(*color))
-        glBegin(GL_POLYGON)
-        size = self._size / 2
-        glVertex3f(size, size, 0)
-        glVertex3f(size, -size, 0)
-        glVertex3f(-size, -size, 0)
-        glVertex3f(-size, size, 0)
-        glEnd()
-        glPopMatrix()
-
-    def draw(self):
-        self.handle_reshape(self.width, self.height)
-        size = self._size / 2
-
-        glPushMatrix()
-        if self._is_perspective:
-            glTranslatef(0, 0, -5.64 * size)
-
-        glRotatef(self._rotate_x, 1.0, 0.0, 0.0)
-        glRotatef(self._rotate_y, 0.0, 1.0, 0.0)
-
-        glPushMatrix()
-        glTranslatef(0, 0, size)
-        self._draw_zero_plane_xy(Color.Blue)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, 0, -size)
-        self._draw_zero_plane_xy(Color.Orange)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, size, 0)
-        glRotatef(90, 1, 0, 0)
-        self._draw_zero_plane_xy(Color.Green)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, -size, 0)
-        glRotatef(90, 1, 0, 0)
-        self._draw_zero_plane_xy(Color.Pink)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(size, 0, 0)
-        glRotatef(90, 0, 1, 0)
-        self._draw_zero_plane_xy(Color.Purple)
-        glPopMatrix()
+    def _update_transform(self):
+        self._cube_node.set_transform(
+            translation(0, 0, -5.64 * self._size / 2 if self._is_perspective else 0),
+            rotation(self._rotate_x, 1, 0, 0),
+            rotation(self._rotate_y, 0, 1, 0),
+        )
 
-        glPushMatrix()
-        glTranslatef(-size, 0, 0)
-        glRotatef(90, 0, 1, 0)
-        self._draw_zero_plane_xy(Color.Red)
-        glPopMatrix()
+    def _draw_cube(self):
+        if self._is_stress:
+            self._cube.draw_instanced(self._stress_instances)
+        else:
+            self._cube.draw()
 
-        glPopMatrix()
+    def draw(self):
+        self._scene.draw()
 
     def handle_key(self, key, x, y):
         super().handle_key(key, x, y)
@@ -133,7 +99,10 @@ class CubeWindow(WindowABC):
             sys.exit(0)
         elif key_id == 32:  # SPACE
             self._is_perspective = not self._is_perspective
-            glutPostRedisplay()
+            self.update_projection()
+            self._update_transform()
+        elif key_id == 115:  # s
+            self._is_stress = not self._is_stress
 
     def handle_special_key(self, key, x, y):
         super().handle_special_key(key, x, y)
@@ -145,7 +114,8 @@ class CubeWindow(WindowABC):
             self._rotate_x += 1
         elif key == GLUT_KEY_DOWN:
             self._rotate_x -= 1
-        glutPostRedisplay()
+        self._update_transform()
+        glut.post_redisplay()
 
 
 def main():
@@ -1,12 +1,16 @@
 import sys
 
 from OpenGL.GL import (glColor3f, glBegin, GL_POLYGON, glEnd,
-                       glVertex3f, glRotatef, glPushMatrix, glPopMatrix, glTranslatef, glLoadIdentity, glViewport)
-from OpenGL.GLU import gluPerspective, gluLookAt
-from OpenGL.GLUT import GLUT_KEY_RIGHT, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_DOWN, glutPostRedisplay
+                       glVertex3f, glPushMatrix, glPopMatrix, glTranslatef)
+from OpenGL.GLU import gluPerspective
+from OpenGL.GLUT import GLUT_KEY_RIGHT, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_DOWN
 
 import color as Color
 from base import WindowABC, rgb_to_f
+from graphics import glut, Cube, SceneGraph
+from graphics.scene import look_at, rotation, translation
+
+FACE_COLORS = (Color.Blue, Color.Orange, Color.Green, Color.Pink, Color.Purple, Color.Red)
 
 
 class CubeWindow(WindowABC):
@@ -22,13 +26,13 @@ class CubeWindow(WindowABC):
         self._eye_y = 0
         self._eye_z = 0
         self._eye_step = 100
+        self._cube = Cube(size, FACE_COLORS)
+        self._scene = SceneGraph()
+        self._cube_node = self._scene.add(draw=self._cube.draw)
+        self._update_transform()
 
     def handle_reshape(self, width, height):
-        glLoadIdentity()
         aspect = height / width
-
-        glViewport(0, 0, width, height)
-
         gluPerspective(45.0, 1 / aspect, 0.1, 2000.0)
 
     def _draw_xy_edge(self, color):
@@ -65,67 +69,17 @@ class CubeWindow(WindowABC):
         self._draw_xy_edge(color)
         glPopMatrix()
 
-    def _draw_zero_plane_xy(self, color):
-        glPushMatrix()
-        glColor3f(*rgb_to_f(*color))
-        glBegin(GL_POLYGON)
-        size = self._size / 2
-        glVertex3f(size, size, 0)
-        glVertex3f(size, -size, 0)
-        glVertex3f(-size, -size, 0)
-        glVertex3f(-size, size, 0)
-        glEnd()
-        glPopMatrix()
+    def _update_transform(self):
+        center = -5.64 * self._size / 2
+        self._cube_node.set_transform(
+            translation(0, 0, center),
+            look_at((self._eye_x, self._eye_y, self._eye_z), (0, 0, center), (0, 1, 0)),
+            rotation(self._rotate_x, 1, 0, 0),
+            rotation(self._rotate_y, 0, 1, 0),
+        )
 
     def draw(self):
-
-        self.handle_reshape(self.width, self.height)
-        size = self._size / 2
-
-        glPushMatrix()
-
-        glTranslatef(0, 0, -5.64 * size)
-
-        gluLookAt(self._eye_x, self._eye_y, self._eye_z, 0, 0, -5.64 * size, 0, 1, 0)
-
-        glRotatef(self._rotate_x, 1.0, 0.0, 0.0)
-        glRotatef(self._rotate_y, 0.0, 1.0, 0.0)
-
-        glPushMatrix()
-        glTranslatef(0, 0, size)
-        self._draw_zero_plane_xy(Color.Blue)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, 0, -size)
-        self._draw_zero_plane_xy(Color.Orange)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, size, 0)
-        glRotatef(90, 1, 0, 0)
-        self._draw_zero_plane_xy(Color.Green)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, -size, 0)
-        glRotatef(90, 1, 0, 0)
-        self._draw_zero_plane_xy(Color.Pink)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(size, 0, 0)
-        glRotatef(90, 0, 1, 0)
-        self._draw_zero_plane_xy(Color.Purple)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(-size, 0, 0)
-        glRotatef(90, 0, 1, 0)
-        self._draw_zero_plane_xy(Color.Red)
-        glPopMatrix()
-
-        glPopMatrix()
+        self._scene.draw()
 
     def handle_key(self, key, x, y):
         super().handle_key(key, x, y)
@@ -144,7 +98,8 @@ class CubeWindow(WindowABC):
             self._eye_z -= self._eye_step
         elif key_id == 47:  # /
             self._eye_z += self._eye_step
-        glutPostRedisplay()
+        self._update_transform()
+        glut.post_redisplay()
 
     def handle_special_key(self, key, x, y):
         super().handle_special_key(key, x, y)
@@ -156,7 +111,8 @@ class CubeWindow(WindowABC):
             self._rotate_x += 1
         elif key == GLUT_KEY_DOWN:
             self._rotate_x -= 1
-        glutPostRedisplay()
+        self._update_transform()
+        glut.post_redisplay()
 
 
 def main():
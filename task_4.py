@@ -1,17 +1,17 @@
 import sys
 
-import numpy
-from OpenGL.GL import (glColor3f, glBegin, GL_POLYGON, glEnd,
-                       glVertex3f, glRotatef, glPushMatrix, glPopMatrix, glTranslatef, glLoadIdentity, glViewport,
-                       glBindTexture, glGenTextures, GL_TEXTURE_2D, glTexParameteri, GL_TEXTURE_WRAP_S, GL_REPEAT,
-                       GL_TEXTURE_WRAP_T, GL_TEXTURE_MIN_FILTER, GL_LINEAR, GL_TEXTURE_MAG_FILTER, GL_RGB,
-                       GL_UNSIGNED_BYTE, glEnable, glTexImage2D, glTexCoord2f)
-from OpenGL.GLU import gluPerspective, gluLookAt
-from OpenGL.GLUT import GLUT_KEY_RIGHT, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_DOWN, glutPostRedisplay
-from PIL import Image
+from OpenGL.GLU import gluPerspective
+from OpenGL.GLUT import GLUT_KEY_RIGHT, GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_DOWN
 
 import color as Color
-from base import WindowABC, rgb_to_f
+from base import WindowABC
+from graphics import gl, glut, Cube, SceneGraph
+from graphics.scene import look_at, rotation, translation
+from graphics.texture import TextureLoader
+
+FACE_COLORS = (Color.Blue, Color.Orange, Color.Green, Color.Pink, Color.Purple, Color.Red)
+# faces showing a texture from ``CubeWindow._textures`` once it is uploaded, in their color until then
+FACE_TEXTURES = {Cube.Face.FRONT: 0, Cube.Face.LEFT: 1, Cube.Face.RIGHT: 2}
 
 
 class CubeWindow(WindowABC):
@@ -28,113 +28,51 @@ class CubeWindow(WindowABC):
         self._eye_z = 0
         self._eye_step = 100
 
+        # faces cover roughly ``size`` pixels on screen, so JPEGs can be decoded at a reduced scale
+        self._texture_loader = TextureLoader()
         self._textures = [
-            self.load_texture('images/ray.bmp'),
-            self.load_texture('images/flower.jpg'),
-            self.load_texture('images/plane.jpg'),
+            self._texture_loader.request(file_name, max_size=(int(size), int(size)))
+            for file_name in ('images/ray.bmp', 'images/flower.jpg', 'images/plane.jpg')
         ]
-
-    @classmethod
-    def load_texture(cls, file_name):
-        texture = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture)
-        # Set the texture wrapping parameters
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        # Set texture filtering parameters
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        # load image
-        image = Image.open(file_name)
-        img_data = numpy.array(list(image.getdata()), numpy.uint8)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, image.width, image.height, 0, GL_RGB, GL_UNSIGNED_BYTE, img_data)
-        glEnable(GL_TEXTURE_2D)
-        return texture
+        gl.enable(gl.Capability.TEXTURE_2D)
+        # the ray tiles twice across the front face
+        self._cube = Cube(size, FACE_COLORS, texture_scales={Cube.Face.FRONT: 2})
+        self._scene = SceneGraph()
+        self._cube_node = self._scene.add(draw=lambda: self._cube.draw(self._ready_textures()))
+        self._update_transform()
+        # upload the textures from the idle callback as they are decoded
+        self.start_animation()
+
+    def handle_idle(self):
+        super().handle_idle()
+        # wait for the decodes for up to a frame rather than spinning, and redraw only once a texture is uploaded
+        self._texture_loader.wait_decoded(1 / 60)
+        if self._texture_loader.upload():
+            self.invalidate()
+        if not self._texture_loader.pending:
+            self.stop_animation()
 
     def handle_reshape(self, width, height):
-        glLoadIdentity()
         aspect = height / width
-
-        glViewport(0, 0, width, height)
-
         gluPerspective(45.0, 1 / aspect, 0.1, 2000.0)
 
-    def _draw_zero_plane_xy(self, color, texture_id=None, scale=1.0):
-        glPushMatrix()
-        # glColor3f(*rgb_to_f(*color))
-        apply_texture = texture_id is not None
-        if apply_texture:
-            glColor3f(1, 1, 1)
-            glBindTexture(GL_TEXTURE_2D, self._textures[texture_id])
-            glTexCoord2f(1.0 * scale, 0.0 * scale)
-        else:
-            glColor3f(*rgb_to_f(*color))
-        glBegin(GL_POLYGON)
-        size = self._size / 2
-
-        glVertex3f(size, size, 0)
-        if apply_texture:
-            glTexCoord2f(1.0 * scale, 1.0 * scale)
-        glVertex3f(size, -size, 0)
-        if apply_texture:
-            glTexCoord2f(0.0 * scale, 1.0 * scale)
-        glVertex3f(-size, -size, 0)
-        if apply_texture:
-            glTexCoord2f(0.0 * scale, 0.0 * scale)
-        glVertex3f(-size, size, 0)
-        # if texture is not None:
-        #     glBindTexture(GL_TEXTURE_2D, )
-        glEnd()
-        glPopMatrix()
+    def _ready_textures(self):
+        return {
+            face: self._textures[texture_id].texture
+            for face, texture_id in FACE_TEXTURES.items() if self._textures[texture_id].ready
+        }
+
+    def _update_transform(self):
+        center = -5.64 * self._size / 2
+        self._cube_node.set_transform(
+            translation(0, 0, center),
+            look_at((self._eye_x, self._eye_y, self._eye_z), (0, 0, center), (0, 1, 0)),
+            rotation(self._rotate_x, 1, 0, 0),
+            rotation(self._rotate_y, 0, 1, 0),
+        )
 
     def draw(self):
-
-        self.handle_reshape(self.width, self.height)
-        size = self._size / 2
-
-        glPushMatrix()
-
-        glTranslatef(0, 0, -5.64 * size)
-        gluLookAt(self._eye_x, self._eye_y, self._eye_z, 0, 0, -5.64 * size, 0, 1, 0)
-
-        glRotatef(self._rotate_x, 1.0, 0.0, 0.0)
-        glRotatef(self._rotate_y, 0.0, 1.0, 0.0)
-
-        glPushMatrix()
-        glTranslatef(0, 0, size)
-        self._draw_zero_plane_xy(Color.Blue, 0, 2)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, 0, -size)
-        self._draw_zero_plane_xy(Color.Orange)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, size, 0)
-        glRotatef(90, 1, 0, 0)
-        self._draw_zero_plane_xy(Color.Green)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(0, -size, 0)
-        glRotatef(90, 1, 0, 0)
-        self._draw_zero_plane_xy(Color.Pink)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(size, 0, 0)
-        glRotatef(90, 0, 1, 0)
-        self._draw_zero_plane_xy(Color.Purple, 2)
-        glPopMatrix()
-
-        glPushMatrix()
-        glTranslatef(-size, 0, 0)
-        glRotatef(90, 0, 1, 0)
-        self._draw_zero_plane_xy(Color.Red, 1)
-        glPopMatrix()
-
-        glPopMatrix()
+        self._scene.draw()
 
     def handle_key(self, key, x, y):
         super().handle_key(key, x, y)
@@ -153,7 +91,8 @@ class CubeWindow(WindowABC):
             self._eye_z -= self._eye_step
         elif key_id == 47:  # /
             self._eye_z += self._eye_step
-        glutPostRedisplay()
+        self._update_transform()
+        glut.post_redisplay()
 
     def handle_special_key(self, key, x, y):
         super().handle_special_key(key, x, y)
@@ -165,7 +104,8 @@ class CubeWindow(WindowABC):
             self._rotate_x += 1
         elif key == GLUT_KEY_DOWN:
             self._rotate_x -= 1
-        glutPostRedisplay()
+        self._update_transform()
+        glut.post_redisplay()
 
 
 def main():
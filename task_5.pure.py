@@ -1,13 +1,17 @@
 import sys
 from math import sin, cos, pi, radians
 
-import numpy as np
-
 from graphics import (
     gl,
     glu,
     glut,
     GlColor,
+    Light,
+    Material,
+    SphereLod,
+    SphereMeshCache,
+    grid_quads,
+    resources,
 )
 
 INITIAL_WINDOW_SIZE = (1024, 768)
@@ -54,29 +58,53 @@ class Settings(object):
     point_light_linear_attenuation = 0.2
     point_light_quadratic_attenuation = 0.2
 
-    sphere_material = [*BLUE_COLOR.to_float(), 1.0]
+    point_light = Light(
+        diffuse=point_light_diffuse,
+        position=point_light_position,
+        constant_attenuation=point_light_constant_attenuation,
+        linear_attenuation=point_light_linear_attenuation,
+        quadratic_attenuation=point_light_quadratic_attenuation,
+    )
+    spot_light = Light(
+        diffuse=projection_light_diffuse,
+        position=projection_light_position,
+        spot_cutoff=projection_light_spot_cutoff,
+        spot_direction=projection_light_spot_direction,
+        spot_exponent=projection_light_spot_exponent,
+        constant_attenuation=point_light_constant_attenuation,
+        linear_attenuation=point_light_linear_attenuation,
+        quadratic_attenuation=point_light_quadratic_attenuation,
+    )
+
+    sphere_material = Material(ambient_and_diffuse=[*BLUE_COLOR.to_float(), 1.0])
     sphere_radius = 0.2
     sphere_detailing = 500
+    sphere_meshes = SphereMeshCache(resources)
+    sphere_lod = SphereLod(max_detailing=sphere_detailing, renderer=sphere_meshes)
 
-    wall_material = [*SMOKE_COLOR.to_float(), 1.0]
+    wall_material = Material(ambient_and_diffuse=[*SMOKE_COLOR.to_float(), 1.0])
     wall_z = 0.8
     wall_size = 2
     wall_detailing = 140
 
-    wall_display_list = None
+    def move_lights(self, delta_x):
+        self.point_light_position[0] += delta_x
+        self.projection_light_position[0] += delta_x
+        self.point_light = self.point_light.replace(position=self.point_light_position)
+        self.spot_light = self.spot_light.replace(position=self.projection_light_position)
 
     @property
     def light_ambient(self):
         return [self.light_intensity, self.light_intensity, self.light_intensity, 1]
 
-    @property
-    def sphere_solid_parameters(self):
-        return [self.sphere_radius, self.sphere_detailing, self.sphere_detailing]
-
     @property
     def wall_step(self):
         return 1 / self.wall_detailing
 
+    @property
+    def wall_parameters(self):
+        return self.wall_size, self.wall_detailing, self.wall_z
+
 
 settings = Settings()
 
@@ -92,6 +120,7 @@ def get_window_center(width=None, height=None):
 def display_callback():
     gl.clear(gl.Buffer.COLOR_BUFFER_BIT, gl.Buffer.DEPTH_BUFFER_BIT)
     gl.load_identity()
+    settings.sphere_lod.begin_frame()
 
     x_eye = settings.sphere_center[0] + settings.view_radius * sin(settings.view_theta) * cos(settings.view_phi)
     z_eye = settings.sphere_center[0] + settings.view_radius * sin(settings.view_theta) * sin(settings.view_phi)
@@ -103,57 +132,18 @@ def display_callback():
 
     if settings.projection_enabled:
         gl.enable(gl.Capability.LIGHT1)
-
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.DIFFUSE, settings.projection_light_diffuse)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.POSITION, settings.projection_light_position)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.SPOT_CUTOFF, settings.projection_light_spot_cutoff)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.SPOT_DIRECTION, settings.projection_light_spot_direction)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.SPOT_EXPONENT, settings.projection_light_spot_exponent)
-
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.CONSTANT_ATTENUATION,
-                 settings.point_light_constant_attenuation)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.LINEAR_ATTENUATION, settings.point_light_linear_attenuation)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.QUADRATIC_ATTENUATION,
-                 settings.point_light_quadratic_attenuation)
+        gl.light_state(gl.Capability.LIGHT1, settings.spot_light)
     else:
         gl.enable(gl.Capability.LIGHT0)
+        gl.light_state(gl.Capability.LIGHT0, settings.point_light)
 
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.DIFFUSE, settings.point_light_diffuse)
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.POSITION, settings.point_light_position)
-
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.CONSTANT_ATTENUATION,
-                 settings.point_light_constant_attenuation)
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.LINEAR_ATTENUATION, settings.point_light_linear_attenuation)
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.QUADRATIC_ATTENUATION,
-                 settings.point_light_quadratic_attenuation)
-
-    gl.material(gl.MaterialFace.FRONT_AND_BACK, gl.MaterialParameter.AMBIENT_AND_DIFFUSE, settings.sphere_material)
+    gl.material_state(settings.sphere_material)
 
-    glut.solid_sphere(*settings.sphere_solid_parameters)
+    settings.sphere_lod.solid_sphere(settings.sphere_radius, settings.sphere_center, key='sphere')
 
-    gl.material(gl.MaterialFace.FRONT_AND_BACK, gl.MaterialParameter.AMBIENT_AND_DIFFUSE, settings.wall_material)
+    gl.material_state(settings.wall_material)
 
-    if settings.wall_display_list is None:
-        settings.wall_display_list = gl.gen_lists(1)
-        gl.new_list(settings.wall_display_list, gl.ListMode.COMPILE)
-
-        gl.begin(gl.BeginMode.QUADS)
-
-        min_edge = -settings.wall_size / 2
-        max_edge = -min_edge
-
-        for wall_x in np.arange(min_edge, max_edge, settings.wall_step):
-            for wall_y in np.arange(min_edge, max_edge, settings.wall_step):
-                gl.vertex3(wall_x, wall_y, settings.wall_z)
-                gl.vertex3(wall_x, wall_y + settings.wall_step, settings.wall_z)
-                gl.vertex3(wall_x + settings.wall_step, wall_y + settings.wall_step, settings.wall_z)
-                gl.vertex3(wall_x + settings.wall_step, wall_y, settings.wall_z)
-
-        gl.end()
-
-        gl.end_list()
-
-    gl.call_list(settings.wall_display_list)
+    gl.call_list(resources.display_list('wall', settings.wall_parameters, build_wall))
 
     gl.flush()
 
@@ -163,6 +153,13 @@ def display_callback():
     glut.swap_buffers()
 
 
+def build_wall():
+    min_edge = -settings.wall_size / 2
+    max_edge = -min_edge
+    return gl.draw_vertex_arrays(gl.BeginMode.QUADS,
+                                 grid_quads(min_edge, max_edge, settings.wall_step, settings.wall_z))
+
+
 def reshape_callback(width, height):
     gl.viewport(0, 0, width, height)
     gl.matrix_mode(gl.MatrixMode.PROJECTION)
@@ -195,11 +192,11 @@ def keyboard_callback(key, x, y):
     elif key == b'0':
         settings.light_intensity += 0.1
     elif key == b'.':
-        settings.point_light_position[0] -= 0.1
-        settings.projection_light_position[0] -= 0.1
+        settings.move_lights(-0.1)
     elif key == b',':
-        settings.point_light_position[0] += 0.1
-        settings.projection_light_position[0] += 0.1
+        settings.move_lights(0.1)
+    elif key == b'i':
+        print(settings.sphere_lod.last_frame, resources.stats(), gl.state_calls())
     glut.post_redisplay()
 
 
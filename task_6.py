@@ -1,19 +1,36 @@
+import atexit
 import sys
-from math import sin, cos, pi, sqrt
+from math import sin, cos
 
-import numpy as np
 from OpenGL.GLUT import glutSetOption
 
 from graphics import (
+    BoundingBox,
+    BoundingSphere,
+    CurveTessellator,
+    Frustum,
     gl,
     glu,
-    glut)
-from task_6_helper import Settings, Particle, PINK_COLOR
+    glut,
+    grid_quads,
+    profiler,
+    resources,
+    Scheduler,
+    SceneGraph,
+    spiral_bounds,
+    spiral_function,
+)
+from graphics.scene import look_at, perspective, rotation
+from simulation import FrameBuffers, SimulationThread, ThreadTiming, overlap
+from task_6_helper import SceneFrame, Settings, PINK_COLOR
 
 INITIAL_WINDOW_SIZE = (1024, 768)
 TITLE = 'Lighting'
 
 settings = Settings()
+tessellator = CurveTessellator(resources)
+render_timing = ThreadTiming('render')
+simulation = None
 
 
 def get_window_center(width=None, height=None):
@@ -25,145 +42,134 @@ def get_window_center(width=None, height=None):
 
 
 def display_callback():
+    if simulation is not None and not simulation.threaded:
+        simulation.advance()
+    with render_timing.measure():
+        draw_frame(None if simulation is None else simulation.buffers.acquire())
+
+
+def draw_frame(frame):
     gl.clear_color(PINK_COLOR)
     gl.clear(gl.Buffer.COLOR_BUFFER_BIT, gl.Buffer.DEPTH_BUFFER_BIT)
     gl.load_identity()
+    settings.sphere_lod.begin_frame()
 
     x_eye = settings.sphere_center[0] + settings.view_radius * sin(settings.view_theta) * cos(settings.view_phi)
     z_eye = settings.sphere_center[0] + settings.view_radius * sin(settings.view_theta) * sin(settings.view_phi)
     y_eye = settings.sphere_center[0] + settings.view_radius * cos(settings.view_theta)
 
     glu.look_at(x_eye, y_eye, z_eye, *settings.sphere_center)
+    view = look_at((x_eye, y_eye, z_eye), settings.sphere_center, (0, 1, 0))
+    frustum = None
+    if settings.culling_enabled:
+        projection = perspective(settings.field_of_view_y, settings.aspect, settings.z_near, settings.z_far)
+        frustum = Frustum(projection @ view)
+    settings.culler.begin_frame(frustum)
 
     draw_fog()
-    draw_animation()
-    draw_spiral()
+    with profiler.scope('draw_animation'):
+        draw_animation(frame)
+    with profiler.scope('draw_spiral'):
+        draw_spiral(view, frame)
 
     gl.flush()
 
     gl.disable(gl.Capability.LIGHT0)
     gl.disable(gl.Capability.LIGHT1)
 
-    glut.swap_buffers()
+    profiler.draw_hud(glut)
+    with profiler.scope('swap_buffers'):
+        glut.swap_buffers()
 
 
 def draw_fog():
     if not settings.fog_enabled:
-        gl.fog(gl.FogParam.FOG_DENSITY, 0.0)
+        gl.fog_state(settings.no_fog)
         return
-    gl.fog(gl.FogParam.FOG_DENSITY, 0.5)
-    gl.fog(gl.FogParam.FOG_COLOR, settings.fog_color)
-    gl.fog_mode(gl.FogParam.FOG_MODE, gl.FogMode.EXP2)
-    gl.fog(gl.FogParam.FOG_START, -0.3)
-    gl.fog(gl.FogParam.FOG_END, 0.3)
+    gl.fog_state(settings.fog)
     gl.hint(gl.FogParam.FOG_HINT, gl.FogParam.NICEST)
 
 
-def draw_spiral():
-    gl.push_matrix()
-    gl.rotate(settings.spiral_z_deg, 0, 0, 1)
-    gl.material(gl.MaterialFace.FRONT_AND_BACK, gl.MaterialParameter.AMBIENT_AND_DIFFUSE, settings.spiral_material)
-    if settings.spiral_display_list is None:
-        settings.spiral_display_list = gl.gen_lists(1)
-        gl.new_list(settings.spiral_display_list, gl.ListMode.COMPILE)
-        k = 9.5
-        alpha, beta = 0.01, 0.0006
-        gamma = 1. + beta
-        sigma = -0.8
-        gl.begin(gl.BeginMode.LINE_STRIP)
-        for theta in np.linspace(0., 2 * pi * k, int(2 * k) * 360):
-            beta *= gamma
-            r = alpha + beta * theta
-            x = r * cos(theta)
-            y = r * sin(theta)
-            gl.vertex3(x, y, sigma * sqrt(x ** 2 + y ** 2))
-        gl.end()
-        gl.end_list()
-    gl.call_list(settings.spiral_display_list)
-    gl.pop_matrix()
+def draw_spiral(view, frame):
+    if frame is None:
+        angle = settings.spiral_z_deg + scheduler.alpha * settings.spiral_z_delta
+    else:
+        alpha = frame.alpha
+        # a paused simulation stays where it stopped
+        if frame.clock is not None and not simulation.paused:
+            alpha = min(alpha + (glut.clock() - frame.clock) / settings.step_time, 1.)
+        angle = frame.spiral_z_deg + alpha * settings.spiral_z_delta
+    spiral_node.set_transform(rotation(angle, 0, 0, 1))
+    spiral_node.bounds = BoundingSphere((0, 0, 0), spiral_bounds(*settings.spiral_parameters))
+    gl.material_state(settings.spiral_material)
+    scene.draw(view, settings.culler)
+
+
+def draw_spiral_mesh():
+    with profiler.scope('build_spiral'):
+        spiral = build_spiral()
+    spiral.draw()
+
+
+def build_spiral():
+    parameters = settings.spiral_parameters
+    function, start, stop, _ = spiral_function(*parameters)
+    # a few samples per turn to start from, so that no turn is skipped
+    return tessellator.mesh('spiral', parameters, function, start, stop, radius=spiral_bounds(*parameters),
+                            initial_segments=int(16 * parameters[0]))
 
 
-def draw_animation():
+def build_wall():
+    min_edge = -settings.wall_size / 2
+    max_edge = -min_edge
+    return gl.draw_vertex_arrays(gl.BeginMode.QUADS,
+                                 grid_quads(min_edge, max_edge, settings.wall_step, settings.wall_z))
+
+
+def draw_animation(frame):
     gl.light_model(gl.LightModel.LIGHT_MODEL_AMBIENT, settings.light_ambient)
     if settings.projection_enabled:
         gl.enable(gl.Capability.LIGHT1)
-
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.DIFFUSE, settings.projection_light_diffuse)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.POSITION, settings.projection_light_position)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.SPOT_CUTOFF, settings.projection_light_spot_cutoff)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.SPOT_DIRECTION, settings.projection_light_spot_direction)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.SPOT_EXPONENT, settings.projection_light_spot_exponent)
-
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.CONSTANT_ATTENUATION,
-                 settings.point_light_constant_attenuation)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.LINEAR_ATTENUATION, settings.point_light_linear_attenuation)
-        gl.light(gl.Capability.LIGHT1, gl.LightParameter.QUADRATIC_ATTENUATION,
-                 settings.point_light_quadratic_attenuation)
+        gl.light_state(gl.Capability.LIGHT1, settings.spot_light)
     else:
         gl.enable(gl.Capability.LIGHT0)
-
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.DIFFUSE, settings.point_light_diffuse)
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.POSITION, settings.point_light_position)
-
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.CONSTANT_ATTENUATION,
-                 settings.point_light_constant_attenuation)
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.LINEAR_ATTENUATION, settings.point_light_linear_attenuation)
-        gl.light(gl.Capability.LIGHT0, gl.LightParameter.QUADRATIC_ATTENUATION,
-                 settings.point_light_quadratic_attenuation)
-    if settings.sphere_radius >= settings.sphere_min_radius:
-        gl.material(gl.MaterialFace.FRONT_AND_BACK, gl.MaterialParameter.AMBIENT_AND_DIFFUSE, settings.sphere_material)
-        glut.solid_sphere(*settings.sphere_solid_parameters)
-    gl.material(gl.MaterialFace.FRONT_AND_BACK, gl.MaterialParameter.AMBIENT_AND_DIFFUSE, settings.wall_material)
+        gl.light_state(gl.Capability.LIGHT0, settings.point_light)
+    culler = settings.culler
+    sphere_radius = settings.sphere_radius if frame is None else frame.sphere_radius
+    sphere_bounds = BoundingSphere(settings.sphere_center, sphere_radius)
+    if sphere_radius >= settings.sphere_min_radius and culler.visible(sphere_bounds):
+        gl.material_state(settings.sphere_material)
+        settings.sphere_lod.solid_sphere(sphere_radius, settings.sphere_center, key='sphere')
+    gl.material_state(settings.wall_material)
     min_edge = -settings.wall_size / 2
     max_edge = -min_edge
-    if settings.wall_display_list is None:
-        settings.wall_display_list = gl.gen_lists(1)
-        gl.new_list(settings.wall_display_list, gl.ListMode.COMPILE)
-
+    if culler.visible(BoundingBox((min_edge, min_edge, -settings.wall_z), (min_edge, max_edge, settings.wall_z))):
         gl.begin(gl.BeginMode.QUADS)
-
-        for wall_x in np.arange(min_edge, max_edge, settings.wall_step):
-            for wall_y in np.arange(min_edge, max_edge, settings.wall_step):
-                gl.vertex3(wall_x, wall_y, settings.wall_z)
-                gl.vertex3(wall_x, wall_y + settings.wall_step, settings.wall_z)
-                gl.vertex3(wall_x + settings.wall_step, wall_y + settings.wall_step, settings.wall_z)
-                gl.vertex3(wall_x + settings.wall_step, wall_y, settings.wall_z)
-
+        gl.vertex3(min_edge, max_edge, -settings.wall_z)
+        gl.vertex3(min_edge, max_edge, settings.wall_z)
+        gl.vertex3(min_edge, min_edge, settings.wall_z)
+        gl.vertex3(min_edge, min_edge, -settings.wall_z)
         gl.end()
 
-        gl.end_list()
-
-    gl.begin(gl.BeginMode.QUADS)
-    gl.vertex3(min_edge, max_edge, -settings.wall_z)
-    gl.vertex3(min_edge, max_edge, settings.wall_z)
-    gl.vertex3(min_edge, min_edge, settings.wall_z)
-    gl.vertex3(min_edge, min_edge, -settings.wall_z)
-    gl.end()
-
-    def collision(particle: Particle):
-        x, y, z = particle.position
-        if z > settings.wall_z and (min_edge <= x <= max_edge) and (min_edge <= y <= max_edge):
-            particle.position[2] = settings.wall_z
-            particle.velocity[2] *= -1
-        elif x < min_edge and (min_edge <= y <= max_edge) and (-settings.wall_z <= z <= settings.wall_z):
-            particle.position[0] = min_edge
-            particle.velocity[0] *= -1
+    if culler.visible(BoundingBox((min_edge, min_edge, settings.wall_z), (max_edge, max_edge, settings.wall_z))):
+        gl.call_list(resources.display_list('wall', settings.wall_parameters, build_wall))
 
-    gl.call_list(settings.wall_display_list)
-
-    gl.material(gl.MaterialFace.FRONT_AND_BACK, gl.MaterialParameter.AMBIENT_AND_DIFFUSE, settings.sphere_material)
-    if settings.update_particles:
-        settings.explosion.update(settings.time, collision)
-    else:
-        gl.call_list(settings.explosion.display_list)
+    gl.material_state(settings.sphere_material)
+    with profiler.scope('explosion'):
+        # the particles move in step_callback, here they are only drawn where the last step left them
+        if frame is not None:
+            if frame.exploded:
+                settings.explosion.draw(culler, frame.positions)
+        else:
+            settings.explosion.draw(culler)
 
 
 def reshape_callback(width, height):
     gl.viewport(0, 0, width, height)
     gl.matrix_mode(gl.MatrixMode.PROJECTION)
     gl.load_identity()
-    aspect = width / height
-    glu.perspective(settings.field_of_view_y, aspect, settings.z_near, settings.z_far)
+    settings.aspect = width / height
+    glu.perspective(settings.field_of_view_y, settings.aspect, settings.z_near, settings.z_far)
     gl.matrix_mode(gl.MatrixMode.MODELVIEW)
     gl.load_identity()
 
@@ -192,25 +198,68 @@ def keyboard_callback(key, x, y):
     elif key == b'.':
         settings.wall_detailing = 20
     elif key == b'p':
-        settings.pause = not settings.pause
+        scheduler.toggle_pause()
+        if simulation is not None:
+            simulation.toggle_pause()
     elif key == b'u':
         settings.update_particles = not settings.update_particles
     elif key == b'f':
         settings.fog_enabled = not settings.fog_enabled
+    elif key == b'i':
+        print(settings.sphere_lod.last_frame, settings.culler.last_frame, resources.stats(), gl.state_calls(),
+              settings.explosion.stats, profiler.summary(60))
+        if simulation is not None:
+            print(simulation.timing, render_timing, 'overlap: {:.2f}'.format(overlap(simulation.timing, render_timing)))
+    elif key == b'c':
+        settings.culling_enabled = not settings.culling_enabled
+    elif key in b'kK':
+        # half a turn is the least the spiral is built from
+        settings.spiral_k = max(settings.spiral_k + (0.5 if key == b'K' else -0.5), 0.5)
+    elif key in b'aA':
+        settings.spiral_alpha = max(settings.spiral_alpha + (0.005 if key == b'A' else -0.005), 0.)
+    elif key in b'bB':
+        settings.spiral_beta *= 1.25 if key == b'B' else 0.8
+    elif key in b'sS':
+        settings.spiral_sigma += 0.1 if key == b'S' else -0.1
+    elif key == b'h':
+        profiler.toggle()
+    elif key == b't':
+        profiler.export_trace('task_6.trace.json')
     glut.post_redisplay()
 
 
-def idle_callback():
-    if settings.pause:
-        return
+def step_callback():
     settings.time += settings.delta_time
     settings.spiral_z_deg += settings.spiral_z_delta
 
     settings.sphere_radius -= settings.sphere_radius_delta
     if settings.sphere_radius < settings.sphere_min_radius:
         settings.explosion.explode(settings.time)
+    if settings.update_particles:
+        settings.explosion.step(settings.time)
 
-    glut.post_redisplay()
+
+def start_simulation():
+    global simulation
+
+    def make_frame():
+        frame = SceneFrame(settings.explosion.particle_count)
+        frame.capture(settings)
+        return frame
+
+    # off real time the frames step the simulation themselves, so every frame sees the same steps on every run
+    simulation = SimulationThread(step_callback, lambda frame: frame.capture(settings, simulation),
+                                  FrameBuffers(make_frame), settings.step_time, clock=glut.clock, sleep=glut.sleep,
+                                  threaded=glut.real_time)
+    # registered after the explosion's pool, so the thread stops stepping before the pool is closed
+    atexit.register(simulation.stop)
+    # the scheduler only paces the frames from now on
+    scheduler.step = lambda: None
+
+
+scheduler = Scheduler(glut, step_callback, time_step=settings.step_time, max_fps=settings.max_fps)
+scene = SceneGraph()
+spiral_node = scene.add(draw=draw_spiral_mesh)
 
 
 def init():
@@ -240,7 +289,11 @@ def main():
     glut.display_func(display_callback)
     glut.reshape_func(reshape_callback)
     glut.keyboard_func(keyboard_callback)
-    glut.idle_func(idle_callback)
+    if settings.simulation_thread:
+        start_simulation()
+        if not settings.pause:
+            simulation.resume()
+    scheduler.start(paused=settings.pause)
 
     init()
 
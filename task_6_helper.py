@@ -1,8 +1,12 @@
+import atexit
 from math import radians, pi
 
 import numpy as np
 
-from graphics import GlColor, gl, glut
+from graphics import (FogState, FrustumCuller, GlColor, Light, Material, ParticleRenderer, SphereLod, SphereMeshCache,
+                      gl, resources)
+from simulation import (AdaptiveStepper, CollisionWorld, Emitter, Integrator, ParallelSimulation, ParticleSystem, Plane,
+                        SharedParticleSystem)
 
 RED_COLOR = GlColor(255, 59, 48)
 ORANGE_COLOR = GlColor(255, 149, 0)
@@ -16,88 +20,129 @@ WHITE_COLOR = GlColor(255, 255, 255)
 SMOKE_COLOR = GlColor(250, 250, 250)
 
 
-class Particle(object):
-    def __init__(self, position=None,
-                 velocity=None,
-                 acceleration=None,
-                 gravitation=None,
-                 attenuation=0.0,
-                 initial_time=0.0,
-                 life_time=None):
-        self.position = position or [0., 0., 0.]
-        self.velocity = velocity or [0., 0., 0.]
-        self.acceleration = acceleration or [0., 0., 0.]
-        self.attenuation = attenuation
-        self.gravitation = gravitation or [0., 0., 0.]
-        self.time = initial_time
-        self.life_time = life_time
-
-    def is_active(self):
-        return self.life_time is None or self.life_time > 0
-
-    def update(self, time):
-        t = time - self.time
-        self.time = time
-        if self.life_time is not None:
-            self.life_time -= t
-            print(self.life_time)
-
-        acceleration = [a + g for a, g in zip(self.acceleration, self.gravitation)]
-        self.position = [x + v * t + 0.5 * a * t ** 2 for x, v, a in
-                         zip(self.position, self.velocity, acceleration)]
-        self.velocity = [v + a * t for v, a in zip(self.velocity, acceleration)]
-        self.acceleration = [a - a * self.attenuation for a in self.acceleration]
+def wall_collision_world(size, z):
+    """
+    The back wall at ``z`` and the side wall at ``-size / 2`` that the particles bounce off.
+    """
+    min_edge = -size / 2
+    max_edge = -min_edge
+    inf = float('inf')
+    return CollisionWorld([
+        Plane((0, 0, z), (0, 0, -1), (min_edge, min_edge, -inf), (max_edge, max_edge, inf)),
+        Plane((min_edge, 0, 0), (1, 0, 0), (-inf, min_edge, -z), (inf, max_edge, z)),
+    ])
 
 
 class Explosion(object):
-    def __init__(self, position, power, particle_count=100, particle_size=1.0, seed=None):
+    def __init__(self, position, power, particle_count=100, particle_size=1.0, seed=None, rate=0., life_time=None,
+                 workers=None, integrator=None, adaptive=False, collision=None):
         self.power = power
         self.position = position
         self.particle_size = particle_size
         self.particle_count = particle_count
-        self.particles = []  # type: list[Particle]
+        # the ``CollisionWorld`` the particles bounce off
+        self.collision = collision
+        if workers is None:
+            self.particles = ParticleSystem(particle_count, integrator=integrator)
+            self.simulation = None
+        else:
+            # large explosions are stepped and collided on a pool of processes, which gets the world once
+            self.particles = SharedParticleSystem(particle_count, integrator=integrator)
+            self.simulation = ParallelSimulation(self.particles, workers, collision=collision, adaptive=adaptive)
+            atexit.register(self.particles.close)
+            atexit.register(self.simulation.close)
         self.random_state = np.random.RandomState(seed=seed)
+        # after the blast the emitter keeps spawning ``rate`` particles per second into the recycled slots
+        self.emitter = Emitter(self.particles, position, power, rate, life_time, random_state=self.random_state,
+                               batch_size=particle_count)
+        # with ``adaptive`` fast particles take sub-steps and are swept against the walls so they cannot tunnel
+        self.adaptive = adaptive
+        self.stepper = AdaptiveStepper(self.particles, collision) if adaptive and workers is None else None
+        # the collision stats of the last step
+        self.stats = None
         self.exploded = False
-        self.display_list = None
+        self.renderer = None
 
     def explode(self, time):
         if self.exploded:
             return
 
-        for i in range(self.particle_count):
-            direction = [np.random.uniform(-1, 1) for _ in range(3)]
-            power = np.random.uniform(0.05 * self.power, self.power)
-            acceleration = [d * power for d in direction]
-            self.particles.append(Particle(
-                self.position,
-                acceleration=acceleration,
-                attenuation=0.3,
-                initial_time=time,
-                life_time=None,
-            ))
-
-        self.display_list = gl.gen_lists(1)
-        gl.new_list(self.display_list, gl.ListMode.COMPILE)
-        glut.solid_sphere(0.5, 500, 500)
-        gl.end_list()
-
+        self.particles.reset(time)
+        self.emitter.burst(self.particle_count)
         self.exploded = True
 
-    def update(self, time, collision_f=None):
+    def step(self, time):
+        """
+        Advances the particles without drawing them, which can be done on any thread.
+        """
         if not self.exploded:
             return
-        for i in range(self.particle_count):
-            if self.particles[i].is_active():
-                self.particles[i].update(time)
-
-            gl.push_matrix()
-            gl.translate(*self.particles[i].position)
-            gl.scale(self.particle_size, self.particle_size, self.particle_size)
-            gl.call_list(self.display_list)
-            gl.pop_matrix()
+        if self.simulation is not None:
+            self.stats = self.simulation.step(time)
+        elif self.stepper is not None:
+            self.stats = self.stepper.step(time)
+        else:
+            self.particles.step(time)
+            if self.collision is not None:
+                self.stats = self.collision.resolve(self.particles)
+        self.particles.recycle()
+        self.emitter.update(time)
+
+    def update(self, time, culler=None):
+        self.step(time)
+        self.draw(culler)
+
+    def draw(self, culler=None, positions=None):
+        """
+        :param positions: the particle positions to draw instead of the current ones
+        """
+        if not self.exploded:
+            return
+        if positions is None:
+            positions = self.particles.position
+        if culler is not None:
+            positions = positions[culler.visible_particles(positions, self.particle_size / 2)]
+        if self.renderer is None:
+            self.renderer = ParticleRenderer()
+        self.renderer.draw(positions, self.particle_size)
+
+
+class SceneFrame(object):
+    """
+    The simulated part of the scene, as the simulation thread hands it to the renderer.
+
+    ``clock`` is the simulation clock when the frame was captured and ``alpha`` how far it then was towards the next
+    step, so the renderer can interpolate the frame up to its own clock.
+    """
+
+    __slots__ = ('time', 'clock', 'alpha', 'spiral_z_deg', 'sphere_radius', 'exploded', 'particle_count',
+                 '_positions')
+
+    def __init__(self, capacity):
+        self.time = 0.
+        self.clock = None
+        self.alpha = 0.
+        self.spiral_z_deg = 0.
+        self.sphere_radius = 0.
+        self.exploded = False
+        self.particle_count = 0
+        self._positions = np.zeros((capacity, 3), np.float32)
 
-            if collision_f is not None:
-                collision_f(self.particles[i])
+    @property
+    def positions(self):
+        return self._positions[:self.particle_count]
+
+    def capture(self, settings, simulation=None):
+        self.time = settings.time
+        if simulation is not None:
+            self.clock = simulation.now
+            self.alpha = simulation.alpha
+        self.spiral_z_deg = settings.spiral_z_deg
+        self.sphere_radius = settings.sphere_radius
+        explosion = settings.explosion
+        self.exploded = explosion.exploded
+        self.particle_count = explosion.particles.count
+        np.copyto(self.positions, explosion.particles.position)
 
 
 class Settings(object):
@@ -105,6 +150,10 @@ class Settings(object):
 
     z_near = 0.0001
     z_far = 100
+    aspect = 4 / 3  # kept up to date by the reshape callback
+
+    culling_enabled = True
+    culler = FrustumCuller()
 
     view_radius = 3.0
     view_theta = - 3 * pi / 2
@@ -113,8 +162,11 @@ class Settings(object):
 
     spiral_z_deg = 0
     spiral_z_delta = 2
-    spiral_material = [*GREEN_COLOR.to_float(), 1.0]
-    spiral_display_list = None
+    spiral_material = Material(ambient_and_diffuse=[*GREEN_COLOR.to_float(), 1.0])
+    spiral_k = 9.5
+    spiral_alpha = 0.01
+    spiral_beta = 0.0006
+    spiral_sigma = -0.8
 
     sphere_center = [0, 0, 0]
 
@@ -134,40 +186,76 @@ class Settings(object):
     point_light_linear_attenuation = 0.2
     point_light_quadratic_attenuation = 0.2
 
-    sphere_material = [*BLUE_COLOR.to_float(), 1.0]
+    point_light = Light(
+        diffuse=point_light_diffuse,
+        position=point_light_position,
+        constant_attenuation=point_light_constant_attenuation,
+        linear_attenuation=point_light_linear_attenuation,
+        quadratic_attenuation=point_light_quadratic_attenuation,
+    )
+    spot_light = Light(
+        diffuse=projection_light_diffuse,
+        position=projection_light_position,
+        spot_cutoff=projection_light_spot_cutoff,
+        spot_direction=projection_light_spot_direction,
+        spot_exponent=projection_light_spot_exponent,
+        constant_attenuation=point_light_constant_attenuation,
+        linear_attenuation=point_light_linear_attenuation,
+        quadratic_attenuation=point_light_quadratic_attenuation,
+    )
+
+    sphere_material = Material(ambient_and_diffuse=[*BLUE_COLOR.to_float(), 1.0])
     sphere_initial_radius = 0.2
     sphere_min_radius = sphere_initial_radius / 20
     sphere_radius = sphere_initial_radius
     sphere_radius_delta = sphere_initial_radius / 50
     sphere_detailing = 500
+    sphere_meshes = SphereMeshCache(resources)
+    sphere_lod = SphereLod(max_detailing=sphere_detailing, renderer=sphere_meshes)
 
-    wall_material = [*SMOKE_COLOR.to_float(), 1.0]
+    wall_material = Material(ambient_and_diffuse=[*SMOKE_COLOR.to_float(), 1.0])
     wall_z = 0.8
     wall_size = 2
     wall_detailing = 140
-
-    wall_display_list = None
+    collision_world = wall_collision_world(wall_size, wall_z)
 
     explosion_power = 100
-    explosion = Explosion([0, 0, 0], explosion_power, 200, sphere_initial_radius / 10, 0)
+    explosion_rate = 0.  # particles per second after the blast
+    explosion_life_time = None
+    explosion_workers = None  # processes stepping the particles, None to step them here
+    explosion_integrator = Integrator.CLOSED_FORM
+    explosion_adaptive = True
+    explosion = Explosion([0, 0, 0], explosion_power, 200, sphere_initial_radius / 10, 0, explosion_rate,
+                          explosion_life_time, explosion_workers, explosion_integrator, explosion_adaptive,
+                          collision_world)
 
     time = 0.
-    delta_time = 0.01
+    delta_time = 0.01  # simulated per step
+    step_time = 1 / 60  # seconds of wall-clock time per step
+    max_fps = 60
 
     update_particles = True
+    # steps the simulation on a thread of its own, the display callback draws the latest frame it finished
+    simulation_thread = True
 
     pause = True
     fog_enabled = False
     fog_color = [*PINK_COLOR.to_float(), 0.1]
+    fog = FogState(mode=gl.FogMode.EXP2, density=0.5, color=fog_color, start=-0.3, end=0.3)
+    no_fog = FogState(density=0.0)
 
     @property
     def light_ambient(self):
         return [self.light_intensity, self.light_intensity, self.light_intensity, 1]
 
     @property
-    def sphere_solid_parameters(self):
-        return [self.sphere_radius, self.sphere_detailing, self.sphere_detailing]
+    def spiral_parameters(self):
+        return self.spiral_k, self.spiral_alpha, self.spiral_beta, self.spiral_sigma
 
     @property
     def wall_step(self):
         return 1 / self.wall_detailing
+
+    @property
+    def wall_parameters(self):
+        return self.wall_size, self.wall_detailing, self.wall_z